@@ -7,7 +7,26 @@ import datetime
 import os
 import json
 import altair as alt
-import random
+from storage import get_repository, to_utc_naive
+from market_data import (
+    DISPLAY_COLUMNS, PAGE_SIZES, RESYNC_INTERVAL, SORT_OPTIONS, MarketDataSync,
+    concat_frames, export_csv, format_rupiah, format_wib, page_cursor, page_rows,
+    records_to_frame, snapshot_covers, ticker_from_frame, with_display_columns
+)
+from archive import archive_stats, read_archive
+from constants import KECAMATAN_LIST, KOMODITAS_LIST
+from filter_cache import FilterCache
+from ingest import IngestQueue
+from lokasi import Gazetteer, LocationIndex, normalisasi
+from live_cache import LiveMarketCache
+from loadgen import SeedManager
+from metrics import RERUN_SPAN, REGISTRY, span
+from purge import PurgeManager
+from query_cache import QueryCache
+from rollups import hari_wib, rollup_bands, rollups_to_frame, summarize_rollups
+from search import SearchIndex
+from snapshot import SnapshotRegistry, SnapshotStore, format_bytes
+from timeseries import RESOLUTIONS, TimeSeriesEngine
 
 # ============================================================================
 # 1. PAGE CONFIG (Layout Wide untuk Dashboard Profesional)
@@ -19,6 +38,9 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Durasi span selama rerun ini dikumpulkan untuk panel performa (ADMIN PANEL)
+REGISTRY.begin_trace()
+
 # ============================================================================
 # 2. CUSTOM CSS - GOVERNMENT DASHBOARD STYLE
 # ============================================================================
@@ -176,16 +198,7 @@ st.markdown("""
 # ============================================================================
 # 3. UTILITY FUNCTIONS
 # ============================================================================
-def format_wib(waktu_utc):
-    """Convert UTC to WIB timezone"""
-    if waktu_utc:
-        wib = waktu_utc + datetime.timedelta(hours=7)
-        return wib.strftime("%d-%m-%Y %H:%M")
-    return "-"
-
-def format_rupiah(angka):
-    """Format number to Indonesian Rupiah format"""
-    return f"Rp {angka:,.0f}".replace(",", ".")
+# format_wib & format_rupiah ada di market_data.py (dipakai juga oleh pipeline)
 
 # ============================================================================
 # 4. FIREBASE CONNECTION (Hybrid: Cloud & Local)
@@ -193,157 +206,384 @@ def format_rupiah(angka):
 @st.cache_resource
 def init_firebase():
     """Initialize Firebase with hybrid authentication"""
-    try:
-        if not firebase_admin._apps:
-            # Try local file first
-            if os.path.exists("kunci.json"):
-                cred = credentials.Certificate("kunci.json")
-                st.sidebar.success("🔐 Connected via Local Key")
-            # Fallback to Streamlit Secrets (for Cloud Deploy)
-            elif "textkey" in st.secrets:
-                key_dict = json.loads(st.secrets["textkey"])
-                cred = credentials.Certificate(key_dict)
-                st.sidebar.success("☁️ Connected via Cloud Secrets")
-            else:
-                st.error("❌ No Firebase credentials found!")
-                st.stop()
+    with span("app.init_firebase"):
+        try:
+            if not firebase_admin._apps:
+                # Try local file first
+                if os.path.exists("kunci.json"):
+                    cred = credentials.Certificate("kunci.json")
+                    st.sidebar.success("🔐 Connected via Local Key")
+                # Fallback to Streamlit Secrets (for Cloud Deploy)
+                elif "textkey" in st.secrets:
+                    key_dict = json.loads(st.secrets["textkey"])
+                    cred = credentials.Certificate(key_dict)
+                    st.sidebar.success("☁️ Connected via Cloud Secrets")
+                else:
+                    st.error("❌ No Firebase credentials found!")
+                    st.stop()
             
-            firebase_admin.initialize_app(cred)
-        return firestore.client()
-    except Exception as e:
-        st.error(f"🔥 Firebase Connection Failed: {e}")
-        st.stop()
+                firebase_admin.initialize_app(cred)
+            return firestore.client()
+        except Exception as e:
+            st.error(f"🔥 Firebase Connection Failed: {e}")
+            st.stop()
+
+@st.cache_resource
+def init_repository():
+    """Initialize storage backend (MARKET_BACKEND: firestore | sqlite | memory)"""
+    backend = os.environ.get("MARKET_BACKEND", "firestore")
+    if backend == "firestore":
+        return get_repository(backend, client=init_firebase())
+    return get_repository(backend)
 
-db = init_firebase()
+repo = init_repository()
 
 # ============================================================================
 # 5. DATA SEEDING FUNCTION (AUTO POPULATE DATABASE)
 # ============================================================================
-def seed_dummy_data(jumlah=50):
-    """Generate and insert dummy data to Firestore"""
-    
-    komoditas_list = [
-        "Kopra Kering", "Cengkeh", "Pinang", "Gurita", "Kakao", 
-        "Lobster", "Nilam", "Rotan", "Sagu", "Kelapa Utuh",
-        "Ikan Tuna", "Vanili", "Pala", "Kayu Manis"
-    ]
-    
-    desa_mentawai = [
-        "Taileleu", "Matotonan", "Silabu", "Sirilogui", "Rokdok",
-        "Madobag", "Saumanganyak", "Saibi Samukop", "Bulasat", "Sigapokna",
-        "Bojakan", "Pokai", "Simalegi", "Sitioitoi", "Ugai"
-    ]
-    
-    kecamatan_list = [
-        "Sikakap", "Pagai Utara", "Pagai Selatan", "Sipora Utara", 
-        "Sipora Selatan", "Siberut Selatan", "Siberut Barat", 
-        "Siberut Utara", "Siberut Tengah"
-    ]
-    
-    sumber_list = ["Petani", "Pengepul", "Dinas Pasar", "Masyarakat"]
-    
-    # Harga range per komoditas (untuk realistis)
-    harga_ranges = {
-        "Kopra Kering": (8000, 15000),
-        "Cengkeh": (80000, 150000),
-        "Pinang": (15000, 25000),
-        "Gurita": (45000, 80000),
-        "Kakao": (25000, 40000),
-        "Lobster": (200000, 400000),
-        "Nilam": (150000, 250000),
-        "Rotan": (5000, 12000),
-        "Sagu": (8000, 15000),
-        "Kelapa Utuh": (3000, 6000),
-        "Ikan Tuna": (35000, 60000),
-        "Vanili": (500000, 800000),
-        "Pala": (80000, 120000),
-        "Kayu Manis": (40000, 70000)
-    }
-    
-    batch = db.batch()
-    success_count = 0
-    
-    for i in range(jumlah):
-        komoditas = random.choice(komoditas_list)
-        harga_min, harga_max = harga_ranges.get(komoditas, (10000, 50000))
-        harga = random.randint(harga_min, harga_max)
-        
-        # Randomize waktu dalam 30 hari terakhir
-        days_ago = random.randint(0, 30)
-        hours_ago = random.randint(0, 23)
-        waktu = datetime.datetime.now() - datetime.timedelta(days=days_ago, hours=hours_ago)
-        
-        lokasi = f"{random.choice(desa_mentawai)}, {random.choice(kecamatan_list)}"
-        
-        doc_ref = db.collection("harga_realtime").document()
-        batch.set(doc_ref, {
-            "komoditas": komoditas,
-            "harga_angka": harga,
-            "range_harga": format_rupiah(harga),
-            "waktu_ambil": waktu,
-            "sumber": random.choice(sumber_list),
-            "lokasi": lokasi,
-            "status": "Verified" if random.random() > 0.1 else "Pending"
-        })
-        success_count += 1
-        
-        # Commit batch setiap 500 operasi (Firestore limit)
-        if (i + 1) % 500 == 0:
-            batch.commit()
-            batch = db.batch()
-    
-    # Commit sisa data
-    batch.commit()
-    return success_count
+@st.cache_resource
+def init_seed_manager():
+    """Background dummy-data jobs (one at a time per process)"""
+    # Distribusi dari constants.py, dibuat vectorized per batch (lihat loadgen.py);
+    # seed=None: data acak & doc id otomatis, jadi generate ulang menambah data
+    return SeedManager(repo, seed=None)
 
 # ============================================================================
-# 6. DATA FETCHING (with Caching)
+# 6. DATA FETCHING (Live Listener / Incremental Delta Sync)
 # ============================================================================
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def fetch_market_data(limit=1000):
-    """Fetch market data from Firestore with caching"""
+# Jumlah dokumen terbaru yang dipegang snapshot dashboard
+SNAPSHOT_LIMIT = 1000
+
+@st.cache_resource
+def init_snapshot_store():
+    """Last snapshot on disk (Arrow IPC), loaded once per process for a fast cold start"""
+    store = SnapshotStore(backend=repo.name)
+    store.load()
+    return store
+
+@st.cache_resource
+def init_live_cache():
+    """Process-wide listener on harga_realtime, updated by push"""
+    cold = init_snapshot_store().loaded
+    live = LiveMarketCache(repo, limit=SNAPSHOT_LIMIT,
+                           initial_frame=cold.frame if cold else None)
+    if cold is None:
+        # Tanpa snapshot di disk, render pertama menunggu snapshot awal listener
+        live.wait_ready(timeout=30)
+    return live
+
+@st.cache_resource
+def init_market_sync():
+    """Shared market frame, synced every 5 minutes with delta queries"""
+    # Delta sync tidak melihat hapus oleh proses lain: full reload tiap jam
+    sync = MarketDataSync(repo, limit=SNAPSHOT_LIMIT, ttl=300,
+                          resync_interval=RESYNC_INTERVAL)
+    cold = init_snapshot_store().loaded
+    if cold is not None and cold.mark is not None:
+        # Render dari snapshot disk, delta sync sejak mark-nya jalan di background
+        # (full reload kalau snapshot lebih tua dari interval resync)
+        sync.seed(cold.frame, cold.mark, cold.saved_at)
+    return sync
+
+@st.cache_resource
+def init_ingest_queue():
+    """Write-behind queue for form submissions (local journal + background flusher)"""
+    # Flusher jalan di thread sendiri (tanpa ScriptRunContext): cache & sync
+    # di-resolve di sini, di thread script, lalu diteruskan ke callback
+    query_cache = init_query_cache()
+    sync = None if repo.supports_watch else init_market_sync()
+    return IngestQueue(
+        repo, on_flush=lambda records: invalidate_for_records(records, query_cache, sync)
+    )
+
+def with_pending_reports(df, version):
+    """Prepend reports still waiting in the ingest journal to the snapshot"""
+    pending = init_ingest_queue().pending()
+    if not pending:
+        return df
+
+    def merge():
+        df_pending = records_to_frame(pending[::-1])
+        return concat_frames([df_pending, df]).drop_duplicates("Doc_ID").reset_index(drop=True)
+    # Objek frame yang sama selama snapshot & isi journal sama (cache filter tetap hit)
+    return init_query_cache().get(("pending", version, tuple(r["id"] for r in pending)), merge)
+
+@st.cache_resource
+def init_snapshots():
+    """Versioned read-only snapshot shared by every session (no per-session copy)"""
+    snapshots = SnapshotRegistry()
+    REGISTRY.gauge("snapshot", lambda: {
+        "version": snapshots.version,
+        "live_versions": len(snapshots.versions()),
+        "bytes": snapshots.total_bytes(),
+    })
+    return snapshots
+
+def fetch_market_data(full_reload=False):
+    """Fetch market data from the live cache (or delta sync if no push support)"""
+    with span("app.fetch_market_data"):
+        return load_market_data(full_reload)
+
+def load_market_data(full_reload=False):
     try:
-        docs = db.collection('harga_realtime').order_by(
-            'waktu_ambil', 
-            direction=firestore.Query.DESCENDING
-        ).limit(limit).stream()
+        if repo.supports_watch:
+            live = init_live_cache()
+            if full_reload:
+                live.restart()
+                live.wait_ready(timeout=30)
+            df = live.frame()
+        else:
+            df = init_market_sync().get(full_reload=full_reload)
         
-        all_data = []
-        ticker_items = []
+        # Frame yang sama untuk semua session; versi baru hanya kalau datanya berubah
+        store = init_snapshot_store()
+        snap = init_snapshots().publish(df, source="disk" if store.is_loaded(df) else repo.name)
+        df = snap.frame
+        # Versi baru disimpan ke disk (throttled, background) untuk cold start berikutnya
+        store.save_async(snap, None if repo.supports_watch else init_market_sync().mark)
         
-        for doc in docs:
-            d = doc.to_dict()
-            lokasi_raw = d.get('lokasi', '-')
-            
-            all_data.append({
-                "Komoditas": d.get('komoditas'),
-                "Harga": d.get('range_harga'),
-                "Harga_Angka": d.get('harga_angka', 0),
-                "Lokasi": lokasi_raw,
-                "Sumber": d.get('sumber'),
-                "Status": d.get('status', 'Verified'),
-                "Waktu": format_wib(d.get('waktu_ambil')),
-                "Raw_Time": d.get('waktu_ambil')
-            })
-            
-            # Ambil 10 data terbaru untuk running text
-            if len(ticker_items) < 10:
-                ticker_items.append(
-                    f"{d.get('komoditas')} ({lokasi_raw}): {d.get('range_harga')}"
-                )
+        # Laporan yang belum terkirim ke backend langsung ikut tampil
+        df = with_pending_reports(df, snap.version)
         
-        return pd.DataFrame(all_data), ticker_items
+        # Ambil 10 data terbaru untuk running text
+        return df, ticker_from_frame(df)
     
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         return pd.DataFrame(), []
 
+@st.cache_resource
+def init_query_cache():
+    """Shared query cache: single-flight loads, stale-while-revalidate, targeted invalidation"""
+    cache = QueryCache()
+    REGISTRY.gauge("query_cache", cache.stats)
+    return cache
+
+# Nilai dari query cache dipakai bersama semua session: jangan dimutasi
+def fetch_rollups(start=None, end=None):
+    """Daily rollups (komoditas x kecamatan x hari WIB) for a date range"""
+    try:
+        with span("app.fetch_rollups"):
+            return init_query_cache().get(
+                ("rollups", start, end),
+                lambda: rollups_to_frame(repo.fetch_rollups(start, end)),
+                ttl=300,
+            )
+    except Exception as e:
+        st.error(f"Error fetching rollups: {e}")
+        return rollups_to_frame([])
+
+def fetch_record_count():
+    """Records currently stored (aggregation count; rollups keep purged history)"""
+    try:
+        return init_query_cache().get(("count",), repo.count_records, ttl=300)
+    except Exception as e:
+        st.error(f"Error counting records: {e}")
+        return None
+
+def load_table_page(sort_by, page_size, cursor):
+    _, field, descending = SORT_OPTIONS[sort_by]
+    # Ambil 1 ekstra untuk tahu ada halaman berikutnya atau tidak
+    docs = repo.fetch_page(field, descending, page_size + 1, cursor)
+    has_next = len(docs) > page_size
+    docs = docs[:page_size]
+    next_cursor = page_cursor(docs[-1], sort_by) if has_next else None
+    with span("app.records_to_frame"):
+        return records_to_frame(docs), next_cursor
+
+def fetch_table_page(sort_by, page_size, cursor=None):
+    """One table page straight from the backend (cursor-based, start_after)"""
+    return init_query_cache().get(
+        ("page", sort_by, page_size, cursor),
+        lambda: load_table_page(sort_by, page_size, cursor),
+    )
+
+def load_filtered_data(komoditas, hari):
+    since = (datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+             - datetime.timedelta(days=hari))
+    docs = repo.fetch_filtered(komoditas=komoditas, since=since)
+    with span("app.records_to_frame"):
+        return records_to_frame(docs)
+
+def fetch_filtered_data(komoditas, hari):
+    """Komoditas & date filter pushed down to the backend query, cached per filter"""
+    return init_query_cache().get(
+        ("filtered", komoditas, hari), lambda: load_filtered_data(komoditas, hari)
+    )
+
+def fetch_archive_data(komoditas, hari):
+    """Archived (Parquet) rows for the filter, read lazily with partition pruning"""
+    def load():
+        since = (datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+                 - datetime.timedelta(days=hari))
+        return read_archive(start=since, komoditas=komoditas)
+    # Arsip hanya berubah lewat job arsip/purge (invalidasi eksplisit)
+    return init_query_cache().get(("archive", komoditas, hari), load, ttl=600, stale=3600)
+
+@st.cache_resource
+def init_location_index():
+    """Gazetteer (kosakata + lokasi yang pernah muncul) & prefix index lokasi -> baris"""
+    return LocationIndex(Gazetteer())
+
+@st.cache_resource
+def init_filter_cache():
+    """LRU of filter results + statistics, shared by every session"""
+    cache = FilterCache(lokasi_index=init_location_index())
+    REGISTRY.gauge("filter_cache", cache.stats)
+    return cache
+
+def pilih_saran_lokasi():
+    """Callback pills saran: isi box Cari Lokasi dengan nama yang dipilih"""
+    if st.session_state.saran_lokasi:
+        st.session_state.filter_lokasi = st.session_state.saran_lokasi
+    st.session_state.saran_lokasi = None
+
+def filter_market_data(df, komoditas, hari, lokasi=None, include_archive=False):
+    """(base frame, FilterResult) for the dashboard filter: rows from the snapshot
+    if it covers the window, otherwise from an indexed backend query (plus the
+    archive if asked)"""
+    cutoff_date = (datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+                   - datetime.timedelta(days=hari))
+    if not snapshot_covers(df, cutoff_date, SNAPSHOT_LIMIT):
+        try:
+            df = fetch_filtered_data(komoditas, hari)
+        except Exception as e:
+            st.error(f"Error fetching filtered data: {e}")
+    
+    if include_archive:
+        try:
+            df_arsip = fetch_archive_data(komoditas, hari)
+            if not df_arsip.empty:
+                # Arsip selalu lebih lama dari data aktif, jadi cukup ditempel di belakang
+                df = concat_frames([df, df_arsip]).drop_duplicates("Doc_ID").reset_index(drop=True)
+        except Exception as e:
+            st.error(f"Error reading archive: {e}")
+    
+    # Tetap difilter lokal: snapshot belum terfilter, hasil query bisa sedikit basi (TTL).
+    # Hasil filter + statistik di-cache per (versi frame, komoditas, lokasi, hari).
+    with span("app.filter"):
+        return df, init_filter_cache().get(df, hari, cutoff_date, komoditas=komoditas, lokasi=lokasi)
+
+def build_csv(df, sort_by):
+    """CSV for the download button (encoded only when it's clicked)"""
+    with span("app.csv_export"):
+        return export_csv(df, sort_by)
+
+@st.cache_resource
+def init_search_index():
+    """Search index for the table, rebuilt once per data snapshot"""
+    return SearchIndex()
+
+@st.cache_resource
+def init_timeseries():
+    """Per-komoditas series (jam/hari/minggu) resampled once per data snapshot"""
+    return TimeSeriesEngine()
+
+@st.cache_resource
+def init_purge_manager():
+    """Background purge jobs (one at a time per process)"""
+    # Objek di-resolve di thread script: on_change dipanggil dari thread job
+    store = init_snapshot_store()
+    sync = None if repo.supports_watch else init_market_sync()
+
+    def on_change():
+        # Snapshot disk & delta sync tidak melihat hapus; listener menerima "removed"
+        store.invalidate()
+        if sync is not None:
+            sync.request_resync()
+
+    # Ramp-up 500/50/5 hanya perlu untuk Firestore
+    return PurgeManager(repo, ramp_up=repo.name == "firestore", on_change=on_change)
+
+def show_seed_progress(job):
+    """Progress of the current seed job; triggers a full rerun once it ends"""
+    progress = job.progress()
+    st.progress(min(1.0, progress['written'] / progress['total']),
+                text=f"Generate data: {progress['written']:,} / {progress['total']:,} dokumen")
+    st.caption(f"⏱️ {progress['elapsed']:.1f} detik • ⚡ {progress['rate']:,.0f} dokumen/detik")
+    
+    if job.running:
+        st.button("⏹️ Hentikan Generate", on_click=job.cancel)
+    elif not job.reported:
+        job.reported = True
+        # Data dummy bisa lebih lama dari high-water mark, jadi full reload
+        invalidate_market_data(full_reload=True)
+        st.rerun()
+    elif progress['state'] == "done":
+        st.success(f"✅ Berhasil menambahkan {progress['written']:,} data dummy ke database!")
+        st.info("💡 Pindah ke Tab Dashboard untuk melihat data baru.")
+    elif progress['state'] == "cancelled":
+        st.warning(f"⏹️ Generate dihentikan setelah {progress['written']:,} data")
+    elif progress['state'] == "failed":
+        st.error(f"❌ Gagal generate data: {progress['error']}")
+
+def show_purge_progress(job):
+    """Progress of the current purge job; triggers a full rerun once it ends"""
+    progress = job.progress()
+    label = {
+        "old": "Bersihkan data lama",
+        "archive": "Arsipkan data lama",
+        "all": "Hapus semua data",
+    }[progress['mode']]
+    total = progress['total']
+    if total:
+        st.progress(min(1.0, progress['deleted'] / total),
+                    text=f"{label}: {progress['deleted']:,} / {total:,} dokumen")
+    st.caption(f"⏱️ {progress['elapsed']:.1f} detik • ⚡ {progress['rate']:,.0f} dokumen/detik")
+    
+    if job.running:
+        st.button("⏹️ Hentikan Purge", on_click=job.cancel)
+    elif not job.reported:
+        job.reported = True
+        invalidate_market_data(full_reload=True, archive=progress['mode'] == "archive")
+        st.rerun()
+    elif progress['state'] == "done":
+        st.success(f"✅ {label}: {progress['deleted']:,} data terhapus")
+    elif progress['state'] == "cancelled":
+        st.warning(f"⏹️ {label} dihentikan setelah {progress['deleted']:,} data, bisa dilanjutkan")
+    else:
+        st.error(f"❌ {label} gagal: {progress['error']}")
+
+def invalidate_market_data(full_reload=False, archive=False):
+    """Make the next fetch see bulk changes (seed, purge): drop every live query"""
+    init_query_cache().invalidate(lambda key: archive or key[0] != "archive")
+    if repo.supports_watch:
+        return
+    if full_reload:
+        init_market_sync().get(full_reload=True)
+    else:
+        init_market_sync().invalidate()
+
+def invalidate_for_records(records, query_cache, sync=None):
+    """Targeted invalidation after a few writes (called by the ingest flusher thread,
+    so it only touches the objects it's given, never st.cache_resource accessors)"""
+    komoditas = {r.get("komoditas") for r in records}
+    hari = {hari_wib(r["waktu_ambil"]) for r in records if r.get("waktu_ambil")}
+
+    def affected(key):
+        kind = key[0]
+        if kind in ("page", "count"):
+            return True
+        if kind == "filtered":
+            return key[1] is None or key[1] in komoditas
+        if kind == "rollups":
+            start, end = key[1], key[2]
+            return any((start is None or h >= start) and (end is None or h <= end) for h in hari)
+        return False
+
+    query_cache.invalidate(affected)
+    # Listener menerima record lewat push; delta sync cukup ditempel tanpa query
+    if sync is not None:
+        sync.apply_records(records)
+
 # ============================================================================
 # 7. MAIN APPLICATION
 # ============================================================================
 
 # Fetch Data
 df, ticker_items = fetch_market_data()
+rollup_all = fetch_rollups()
+hari_ini = hari_wib(datetime.datetime.now(datetime.timezone.utc))
 
 # ============================================================================
 # HEADER SECTION
@@ -371,17 +611,55 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+def catching_up():
+    """True while the dashboard still shows the on-disk snapshot"""
+    current = init_snapshots().current
+    if current is None or not init_snapshot_store().is_loaded(current.frame):
+        return False
+    if repo.supports_watch:
+        return not init_live_cache().ready
+    return init_market_sync().last_sync is None
+
+@st.fragment(run_every=2)
+def wait_for_catch_up():
+    """Rerun the whole app once the background catch-up has new data"""
+    if not catching_up():
+        st.rerun(scope="app")
+    saved_at = init_snapshot_store().loaded.saved_at
+    st.caption(f"💾 Menampilkan snapshot lokal ({format_wib(to_utc_naive(saved_at))} WIB), "
+               "data terbaru sedang disinkronkan...")
+
+if catching_up():
+    wait_for_catch_up()
+elif repo.supports_watch and init_live_cache().down_since is not None:
+    st.warning(f"📡 Koneksi live terputus sejak {init_live_cache().stale_seconds():,.0f} detik lalu, "
+               "data mungkin tertinggal. Menyambung ulang otomatis...")
+
+laporan_antri = init_ingest_queue().pending_count()
+if laporan_antri:
+    st.caption(f"⏳ {laporan_antri} laporan baru sudah tampil, menunggu sinkron ke database")
+
 # ============================================================================
 # QUICK STATS (Top Row)
 # ============================================================================
 if not df.empty:
     col_stat1, col_stat2, col_stat3, col_stat4, col_stat5 = st.columns(5)
     
+    # Total = record yang masih tersimpan (+ laporan di journal); jenis komoditas
+    # dari rollup (seluruh histori), fallback ke data mentah
     with col_stat1:
-        st.metric("📦 Total Data", f"{len(df):,}")
+        total_data = fetch_record_count()
+        if total_data is None:
+            total_data = len(df)
+        else:
+            total_data += init_ingest_queue().pending_count()
+        st.metric("📦 Total Data", f"{total_data:,}")
     
     with col_stat2:
-        unique_komoditas = df['Komoditas'].nunique()
+        if not rollup_all.empty:
+            unique_komoditas = rollup_all['komoditas'].nunique()
+        else:
+            unique_komoditas = df['Komoditas'].nunique()
         st.metric("🌾 Jenis Komoditas", f"{unique_komoditas}")
     
     with col_stat3:
@@ -393,8 +671,11 @@ if not df.empty:
         st.metric("✅ Data Terverifikasi", f"{verified}")
     
     with col_stat5:
-        today_data = df[df['Raw_Time'] >= datetime.datetime.now() - datetime.timedelta(days=1)]
-        st.metric("📅 Update Hari Ini", f"{len(today_data)}")
+        if not rollup_all.empty:
+            today_count = int(rollup_all.loc[rollup_all['hari'] == hari_ini, 'count'].sum())
+        else:
+            today_count = len(df[df['Raw_Time'] >= datetime.datetime.now() - datetime.timedelta(days=1)])
+        st.metric("📅 Update Hari Ini", f"{today_count}")
 
 st.markdown("---")
 
@@ -417,47 +698,56 @@ with tab_dash:
         col_f1, col_f2, col_f3, col_f4 = st.columns([2, 2, 2, 1])
         
         with col_f1:
+            # Daftar dari rollup (seluruh histori) + snapshot, bukan hanya 1000 baris terbaru
+            pilihan_komoditas = set(df['Komoditas'].dropna()) | set(rollup_all['komoditas'].dropna())
             filter_komoditas = st.selectbox(
                 "📦 Komoditas:", 
-                ["Semua"] + sorted(df['Komoditas'].unique().tolist()) if not df.empty else ["Semua"]
+                ["Semua"] + sorted(pilihan_komoditas) if not df.empty else ["Semua"]
             )
         
         with col_f2:
             filter_lokasi = st.text_input(
                 "📍 Cari Lokasi:", 
-                placeholder="Contoh: Sikakap, Taileleu..."
+                placeholder="Awal nama desa/kecamatan, contoh: Sikakap, Taileleu...",
+                key="filter_lokasi"
             )
         
         with col_f3:
+            include_archive = st.toggle("📦 Sertakan data arsip", value=False)
             filter_hari = st.slider(
                 "📅 Data Berapa Hari Terakhir:",
                 min_value=1,
-                max_value=30,
+                # Arsip Parquet memungkinkan histori bertahun-tahun
+                max_value=3650 if include_archive else 30,
                 value=7
             )
         
         with col_f4:
             st.write("")  # Spacer
             if st.button("🔄 Refresh", use_container_width=True):
-                st.cache_data.clear()
+                fetch_market_data(full_reload=True)
                 st.rerun()
     
     st.markdown("---")
     
     # Apply Filters
-    df_view = df.copy()
+    df_base, df_view, hasil_filter = df, df, None
     if not df.empty:
-        # Filter by date
-        cutoff_date = datetime.datetime.now() - datetime.timedelta(days=filter_hari)
-        df_view = df_view[df_view['Raw_Time'] >= cutoff_date]
-        
-        # Filter by komoditas
-        if filter_komoditas != "Semua":
-            df_view = df_view[df_view['Komoditas'] == filter_komoditas]
-        
-        # Filter by lokasi
-        if filter_lokasi:
-            df_view = df_view[df_view['Lokasi'].str.contains(filter_lokasi, case=False, na=False)]
+        # Filter komoditas & tanggal (push down ke database kalau snapshot terpotong) + lokasi
+        df_base, hasil_filter = filter_market_data(
+            df, None if filter_komoditas == "Semua" else filter_komoditas, filter_hari,
+            lokasi=filter_lokasi, include_archive=include_archive
+        )
+        df_view = hasil_filter.view(df_base)
+    
+    # Autocomplete lokasi dari gazetteer (sudah memuat lokasi di data setelah filter di atas)
+    if filter_lokasi:
+        saran = [nama for nama in init_location_index().gazetteer.complete(filter_lokasi)
+                 if normalisasi(nama) != normalisasi(filter_lokasi)]
+        if saran:
+            with col_f2:
+                st.pills("Saran lokasi:", saran, key="saran_lokasi",
+                         on_change=pilih_saran_lokasi, label_visibility="collapsed")
     
     # Statistics Cards
     if not df_view.empty:
@@ -465,16 +755,62 @@ with tab_dash:
         
         m1, m2, m3, m4 = st.columns(4)
         
-        rata_rata = df_view['Harga_Angka'].mean()
-        tertinggi = df_view['Harga_Angka'].max()
-        terendah = df_view['Harga_Angka'].min()
-        median = df_view['Harga_Angka'].median()
+        # Rata-rata/max/min/median dari rollup harian (seluruh rentang, tidak terpotong
+        # 1000 baris; median & p10/p90 dari sketch kuantil, galat relatif <= 1%).
+        # Rollup per kecamatan, jadi pencarian lokasi bebas tetap pakai data mentah.
+        summary = None
+        if not filter_lokasi:
+            rollup_view = fetch_rollups(
+                start=hari_wib(datetime.datetime.now(datetime.timezone.utc)
+                               - datetime.timedelta(days=filter_hari))
+            )
+            if filter_komoditas != "Semua":
+                rollup_view = rollup_view[rollup_view['komoditas'] == filter_komoditas]
+            summary = summarize_rollups(rollup_view)
+        
+        if summary:
+            rata_rata = summary['mean']
+            tertinggi = summary['max']
+            terendah = summary['min']
+        else:
+            rata_rata = hasil_filter.mean
+            tertinggi = hasil_filter.max
+            terendah = hasil_filter.min
+        # Rollup lama (sebelum ada sketch) tidak punya kuantil: median dari data mentah
+        sketch_ready = bool(summary) and summary['median'] is not None
+        median = summary['median'] if sketch_ready else hasil_filter.median
         
         m1.metric("💰 Rata-Rata Harga", format_rupiah(rata_rata))
         m2.metric("📈 Harga Tertinggi", format_rupiah(tertinggi))
         m3.metric("📉 Harga Terendah", format_rupiah(terendah))
         m4.metric("📊 Median Harga", format_rupiah(median))
         
+        if sketch_ready:
+            st.caption(f"📏 Pita harga p10–p90: **{format_rupiah(summary['p10'])} – "
+                       f"{format_rupiah(summary['p90'])}** dari {summary['count']:,} laporan")
+            with st.expander("📏 Pita Harga Harian (p10 – median – p90)"):
+                with span("app.chart.pita"):
+                    bands = rollup_bands(rollup_view)
+                    band_base = alt.Chart(bands).encode(
+                        x=alt.X('hari:T', title='Hari (WIB)'),
+                        color=alt.Color('komoditas:N', legend=alt.Legend(title="Komoditas"))
+                    )
+                    band_chart = band_base.mark_area(opacity=0.25).encode(
+                        y=alt.Y('p10:Q', title='Harga (Rp)', scale=alt.Scale(zero=False)),
+                        y2='p90:Q'
+                    ) + band_base.mark_line().encode(
+                        y='median:Q',
+                        tooltip=[
+                            alt.Tooltip('komoditas:N', title='Komoditas'),
+                            alt.Tooltip('hari:N', title='Hari'),
+                            alt.Tooltip('p10:Q', title='p10', format=',.0f'),
+                            alt.Tooltip('median:Q', title='Median', format=',.0f'),
+                            alt.Tooltip('p90:Q', title='p90', format=',.0f'),
+                            alt.Tooltip('count:Q', title='Jumlah Laporan')
+                        ]
+                    )
+                    st.altair_chart(band_chart.properties(height=300), use_container_width=True)
+        
         st.markdown("---")
         
         # Charts Section
@@ -483,84 +819,134 @@ with tab_dash:
         with col_chart1:
             st.markdown("#### 📈 Tren Pergerakan Harga")
             
-            # Line chart with Altair
-            chart_data = df_view.sort_values('Raw_Time').tail(100)  # Last 100 records
+            with span("app.chart.tren"):
+                # Seri per komoditas (resolusi dari rentang filter), dipangkas LTTB.
+                # Tanpa cari lokasi, seri diambil dari cache per snapshot (df_base).
+                cutoff_date = (datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+                               - datetime.timedelta(days=filter_hari))
+                resolusi, jumlah_bucket, chart_data = init_timeseries().chart_series(
+                    df_view if filter_lokasi else df_base, filter_hari, since=cutoff_date,
+                    komoditas=None if filter_komoditas == "Semua" else filter_komoditas,
+                    cache=not filter_lokasi
+                )
+                label_resolusi = RESOLUTIONS[resolusi][0]
+                chart_data = chart_data.assign(Periode=chart_data['Waktu'].dt.strftime(
+                    "%d-%m-%Y %H:%M" if resolusi == "jam" else "%d-%m-%Y"
+                ))
             
-            line_chart = alt.Chart(chart_data).mark_line(point=True).encode(
-                x=alt.X('Waktu:T', title='Waktu', axis=alt.Axis(labelAngle=-45)),
-                y=alt.Y('Harga_Angka:Q', title='Harga (Rp)', scale=alt.Scale(zero=False)),
-                color=alt.Color('Komoditas:N', legend=alt.Legend(title="Komoditas")),
-                tooltip=[
-                    alt.Tooltip('Komoditas:N', title='Komoditas'),
-                    alt.Tooltip('Harga:N', title='Harga'),
-                    alt.Tooltip('Lokasi:N', title='Lokasi'),
-                    alt.Tooltip('Waktu:N', title='Waktu'),
-                    alt.Tooltip('Sumber:N', title='Sumber')
-                ]
-            ).properties(
-                height=400
-            ).interactive()
+                # Waktu = awal bucket dalam WIB (naive); skala utc supaya tidak digeser zona browser
+                line_chart = alt.Chart(chart_data).mark_line(point=len(chart_data) <= 200).encode(
+                    x=alt.X('Waktu:T', title=f'Waktu (WIB, {label_resolusi})',
+                            scale=alt.Scale(type='utc'), axis=alt.Axis(labelAngle=-45)),
+                    y=alt.Y('mean:Q', title='Harga Rata-Rata (Rp)', scale=alt.Scale(zero=False)),
+                    color=alt.Color('Komoditas:N', legend=alt.Legend(title="Komoditas")),
+                    tooltip=[
+                        alt.Tooltip('Komoditas:N', title='Komoditas'),
+                        alt.Tooltip('Periode:N', title='Periode'),
+                        alt.Tooltip('mean:Q', title='Rata-Rata', format=',.0f'),
+                        alt.Tooltip('open:Q', title='Buka', format=',.0f'),
+                        alt.Tooltip('high:Q', title='Tertinggi', format=',.0f'),
+                        alt.Tooltip('low:Q', title='Terendah', format=',.0f'),
+                        alt.Tooltip('close:Q', title='Tutup', format=',.0f'),
+                        alt.Tooltip('count:Q', title='Jumlah Laporan')
+                    ]
+                ).properties(
+                    height=400
+                ).interactive()
             
-            st.altair_chart(line_chart, use_container_width=True)
+                st.altair_chart(line_chart, use_container_width=True)
+                st.caption(f"Resolusi {label_resolusi}: {len(chart_data)} dari {jumlah_bucket} titik ditampilkan")
         
         with col_chart2:
             st.markdown("#### 🥧 Distribusi per Komoditas")
             
-            # Pie/Bar chart
-            komoditas_count = df_view['Komoditas'].value_counts().reset_index()
-            komoditas_count.columns = ['Komoditas', 'Jumlah']
+            with span("app.chart.distribusi"):
+                # Pie/Bar chart (jumlah per komoditas sudah dihitung bersama hasil filter)
+                komoditas_count = hasil_filter.komoditas_counts
             
-            bar_chart = alt.Chart(komoditas_count.head(10)).mark_bar().encode(
-                x=alt.X('Jumlah:Q', title='Jumlah Data'),
-                y=alt.Y('Komoditas:N', sort='-x', title=''),
-                color=alt.Color('Komoditas:N', legend=None),
-                tooltip=['Komoditas', 'Jumlah']
-            ).properties(
-                height=400
-            )
+                bar_chart = alt.Chart(komoditas_count.head(10)).mark_bar().encode(
+                    x=alt.X('Jumlah:Q', title='Jumlah Data'),
+                    y=alt.Y('Komoditas:N', sort='-x', title=''),
+                    color=alt.Color('Komoditas:N', legend=None),
+                    tooltip=['Komoditas', 'Jumlah']
+                ).properties(
+                    height=400
+                )
             
-            st.altair_chart(bar_chart, use_container_width=True)
+                st.altair_chart(bar_chart, use_container_width=True)
         
         st.markdown("---")
         
         # Data Table
         st.markdown("#### 📋 Tabel Data Lengkap")
         
-        # Add search and sort options
-        col_search, col_sort = st.columns([3, 1])
+        # Add search, sort and paging options
+        col_search, col_sort, col_mode = st.columns([3, 1, 1])
         with col_search:
             search_term = st.text_input("🔍 Cari dalam tabel:", placeholder="Ketik untuk mencari...")
         with col_sort:
-            sort_by = st.selectbox("Urutkan:", ["Waktu (Terbaru)", "Harga (Tertinggi)", "Harga (Terendah)"])
+            sort_by = st.selectbox("Urutkan:", list(SORT_OPTIONS))
+        with col_mode:
+            table_mode = st.selectbox("Sumber Tabel:", ["Data Terfilter", "Semua Data (Database)"])
         
-        # Apply search
+        # Apply search (index atas df_base; df_view mewarisi RangeIndex-nya)
         if search_term:
-            mask = df_view.apply(lambda row: row.astype(str).str.contains(search_term, case=False).any(), axis=1)
-            df_display = df_view[mask]
+            with span("app.search"):
+                search_mask = init_search_index().mask(df_base, search_term)
+                df_display = df_view[search_mask[df_view.index.to_numpy()]]
         else:
             df_display = df_view
         
-        # Apply sorting
-        if sort_by == "Waktu (Terbaru)":
-            df_display = df_display.sort_values('Raw_Time', ascending=False)
-        elif sort_by == "Harga (Tertinggi)":
-            df_display = df_display.sort_values('Harga_Angka', ascending=False)
+        col_size, col_page, col_info = st.columns([1, 1, 3])
+        with col_size:
+            page_size = st.selectbox("Baris per halaman:", PAGE_SIZES, index=1)
+        
+        if table_mode == "Data Terfilter":
+            # Partial selection (nlargest/nsmallest), tidak sort seluruh frame
+            total_pages = max(1, -(-len(df_display) // page_size))
+            with col_page:
+                page = st.number_input("Halaman:", min_value=1, max_value=total_pages, value=1, step=1)
+            with span("app.table.page"):
+                df_page = page_rows(df_display, sort_by, page - 1, page_size)
+            with col_info:
+                st.caption(f"Halaman {page} dari {total_pages} • {len(df_display):,} baris sesuai filter")
         else:
-            df_display = df_display.sort_values('Harga_Angka', ascending=True)
+            # Cursor-based (start_after): filter & pencarian tidak berlaku di mode ini
+            cursor_key = (sort_by, page_size)
+            if st.session_state.get("table_cursor_key") != cursor_key:
+                st.session_state.table_cursor_key = cursor_key
+                st.session_state.table_cursors = [None]
+            cursors = st.session_state.table_cursors
+            
+            try:
+                df_page, next_cursor = fetch_table_page(sort_by, page_size, cursors[-1])
+            except Exception as e:
+                st.error(f"Error fetching table page: {e}")
+                df_page, next_cursor = records_to_frame([]), None
+            
+            # Callback jalan sebelum rerun, jadi halaman baru langsung terbaca
+            with col_page:
+                col_prev, col_next = st.columns(2)
+                col_prev.button("⬅️", use_container_width=True, disabled=len(cursors) == 1,
+                                on_click=cursors.pop)
+                col_next.button("➡️", use_container_width=True, disabled=next_cursor is None,
+                                on_click=cursors.append, args=(next_cursor,))
+            with col_info:
+                st.caption(f"Halaman {len(cursors)} • langsung dari database, filter & pencarian tidak berlaku")
         
-        # Display table
-        st.dataframe(
-            df_display[['Komoditas', 'Harga', 'Lokasi', 'Sumber', 'Status', 'Waktu']],
-            use_container_width=True,
-            hide_index=True,
-            height=400
-        )
+        # String Harga/Waktu hanya dibuat untuk baris di halaman ini
+        with span("app.table.render"):
+            st.dataframe(
+                with_display_columns(df_page)[DISPLAY_COLUMNS],
+                use_container_width=True,
+                hide_index=True,
+                height=400
+            )
         
-        # Download button
-        csv = df_display.to_csv(index=False).encode('utf-8')
+        # Download button (CSV dibuat saat tombol diklik, bukan setiap rerun)
         st.download_button(
             label="📥 Download Data (CSV)",
-            data=csv,
+            data=lambda: build_csv(df_display, sort_by),
             file_name=f"mentawai_market_data_{datetime.datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv",
         )
@@ -587,11 +973,7 @@ with tab_input:
             st.markdown("**📦 Informasi Komoditas**")
             in_komoditas = st.selectbox(
                 "Jenis Komoditas *", 
-                [
-                    "Kopra Kering", "Cengkeh", "Pinang", "Gurita", "Kakao", 
-                    "Lobster", "Nilam", "Rotan", "Sagu", "Kelapa Utuh",
-                    "Ikan Tuna", "Vanili", "Pala", "Kayu Manis", "Lainnya"
-                ]
+                KOMODITAS_LIST + ["Lainnya"]
             )
             
             in_harga = st.number_input(
@@ -610,12 +992,7 @@ with tab_input:
             st.markdown("**📍 Informasi Lokasi**")
             in_kecamatan = st.selectbox(
                 "Kecamatan *", 
-                [
-                    "Sikakap", "Pagai Utara", "Pagai Selatan", 
-                    "Sipora Utara", "Sipora Selatan", 
-                    "Siberut Selatan", "Siberut Barat", 
-                    "Siberut Utara", "Siberut Tengah"
-                ]
+                KECAMATAN_LIST
             )
             
             in_dusun = st.text_input(
@@ -660,7 +1037,8 @@ with tab_input:
                         "catatan": in_catatan if in_catatan else "-"
                     }
                     
-                    db.collection("harga_realtime").add(doc_data)
+                    # Masuk journal lokal dulu, dikirim ke database oleh flusher di background
+                    init_ingest_queue().submit(doc_data)
                     
                     st.markdown(f"""
                     <div class="success-box">
@@ -671,9 +1049,7 @@ with tab_input:
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    st.cache_data.clear()  # Clear cache to show new data
-                    
-                    st.info("💡 Silakan refresh halaman atau pindah ke Tab Dashboard untuk melihat data terbaru.")
+                    st.info("💡 Data langsung tampil di Tab Dashboard, sinkron ke database di background.")
                     
                 except Exception as e:
                     st.error(f"❌ Gagal menyimpan data: {e}")
@@ -700,21 +1076,26 @@ with tab_admin:
         jumlah_data = st.number_input(
             "Jumlah Data yang akan digenerate:", 
             min_value=10, 
-            max_value=500, 
+            max_value=100000, 
             value=50,
-            step=10
+            step=10,
+            help="Untuk jutaan baris pakai CLI: python loadgen.py --rows 1000000"
         )
         
-        if st.button("🎲 GENERATE SAMPLE DATA", type="primary", use_container_width=True):
-            with st.spinner("Sedang mengisi database dengan data dummy..."):
-                try:
-                    count = seed_dummy_data(jumlah_data)
-                    st.success(f"✅ Berhasil menambahkan {count} data dummy ke database!")
-                    st.cache_data.clear()
-                    st.balloons()
-                    st.info("💡 Refresh halaman atau pindah ke Tab Dashboard untuk melihat data baru.")
-                except Exception as e:
-                    st.error(f"❌ Gagal generate data: {e}")
+        # Generate jalan di background thread, rerun script tidak ikut menunggu
+        seeder = init_seed_manager()
+        seed_running = seeder.job is not None and seeder.job.running
+        if st.button("🎲 GENERATE SAMPLE DATA", type="primary", use_container_width=True,
+                     disabled=seed_running):
+            try:
+                seeder.start(jumlah_data)
+                st.rerun()
+            except Exception as e:
+                st.error(f"❌ Gagal generate data: {e}")
+        
+        if seeder.job is not None:
+            # Fragment refresh sendiri tiap detik selama job berjalan
+            st.fragment(run_every=1 if seed_running else None)(show_seed_progress)(seeder.job)
     
     with col_admin2:
         st.markdown("#### 🗑️ Database Management")
@@ -727,9 +1108,38 @@ with tab_admin:
             st.write(f"- Total Records: **{len(df)}**")
             st.write(f"- Komoditas Unik: **{df['Komoditas'].nunique()}**")
             st.write(f"- Lokasi Unik: **{df['Lokasi'].nunique()}**")
-            st.write(f"- Rentang Waktu: **{df['Waktu'].min()} - {df['Waktu'].max()}**")
+            st.write(f"- Rentang Waktu: **{format_wib(df['Raw_Time'].min())} - {format_wib(df['Raw_Time'].max())}**")
         else:
             st.write("Database kosong")
+        st.write(f"- Rollup Harian: **{len(rollup_all)}** (komoditas × kecamatan × hari)")
+        snapshot_versions = init_snapshots().versions()
+        if snapshot_versions:
+            st.write(f"- Snapshot Aktif: **v{snapshot_versions[-1]['version']}** • "
+                     f"{len(snapshot_versions)} versi di memori, total "
+                     f"**{format_bytes(sum(v['bytes'] for v in snapshot_versions))}**")
+            st.caption(" • ".join(
+                f"v{v['version']}: {v['rows']:,} baris, {format_bytes(v['bytes'])}"
+                for v in snapshot_versions
+            ))
+        filter_stats = init_filter_cache().stats()
+        hit_rate = filter_stats['hit_rate']
+        st.write(f"- Cache Filter: **{filter_stats['hits']:,}** hit / **{filter_stats['misses']:,}** miss"
+                 + (f" ({hit_rate:.0%})" if hit_rate is not None else "")
+                 + f" • {filter_stats['entries']} entri, {filter_stats['evicted']:,} dibuang")
+        ingest_stats = init_ingest_queue().stats()
+        st.write(f"- Laporan Antri: **{ingest_stats['pending']}** "
+                 f"({ingest_stats['flushed']:,} terkirim dalam {ingest_stats['batches']:,} batch)")
+        if ingest_stats['last_error']:
+            st.caption(f"⚠️ Kirim terakhir gagal, dicoba ulang: {ingest_stats['last_error']}")
+        
+        if st.button("🔁 REBUILD ROLLUP HARIAN", use_container_width=True):
+            with st.spinner("Menghitung ulang rollup dari data mentah..."):
+                try:
+                    jumlah_rollup = repo.rebuild_rollups()
+                    st.success(f"✅ Berhasil membangun ulang {jumlah_rollup} rollup")
+                    init_query_cache().invalidate(lambda key: key[0] == "rollups")
+                except Exception as e:
+                    st.error(f"❌ Gagal rebuild rollup: {e}")
         
         st.markdown("---")
         
@@ -741,33 +1151,42 @@ with tab_admin:
             value=90
         )
         
-        if st.button("🧹 BERSIHKAN DATA LAMA", use_container_width=True):
-            cutoff = datetime.datetime.now() - datetime.timedelta(days=days_to_keep)
-            
-            with st.spinner("Menghapus data lama..."):
-                try:
-                    # Query old documents
-                    old_docs = db.collection('harga_realtime').where(
-                        'waktu_ambil', '<', cutoff
-                    ).stream()
-                    
-                    deleted = 0
-                    batch = db.batch()
-                    
-                    for doc in old_docs:
-                        batch.delete(doc.reference)
-                        deleted += 1
-                        
-                        if deleted % 500 == 0:
-                            batch.commit()
-                            batch = db.batch()
-                    
-                    batch.commit()
-                    
-                    st.success(f"✅ Berhasil menghapus {deleted} data lama")
-                    st.cache_data.clear()
-                except Exception as e:
-                    st.error(f"❌ Gagal menghapus data: {e}")
+        # Purge jalan di background thread (keys-only, batch paralel)
+        purge = init_purge_manager()
+        purge_running = purge.job is not None and purge.job.running
+        
+        col_purge, col_archive = st.columns(2)
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days_to_keep)
+        if col_purge.button("🧹 BERSIHKAN DATA LAMA", use_container_width=True, disabled=purge_running):
+            try:
+                purge.start("old", cutoff)
+                st.rerun()
+            except Exception as e:
+                st.error(f"❌ Gagal menghapus data: {e}")
+        
+        # Arsip: tulis ke Parquet per bulan dulu, baru hapus dari koleksi aktif
+        if col_archive.button("📦 ARSIPKAN DATA LAMA", use_container_width=True, disabled=purge_running):
+            try:
+                purge.start("archive", cutoff)
+                st.rerun()
+            except Exception as e:
+                st.error(f"❌ Gagal mengarsipkan data: {e}")
+        
+        arsip = archive_stats()
+        if arsip['files']:
+            st.caption(f"📦 Arsip: {arsip['bulan']} bulan • {arsip['files']} file • "
+                       f"{arsip['bytes'] / 1e6:,.1f} MB")
+        
+        checkpoint = purge.pending_checkpoint()
+        if checkpoint:
+            st.info(f"⏸️ Purge sebelumnya belum selesai ({checkpoint['deleted']:,} data sudah terhapus)")
+            if st.button("▶️ LANJUTKAN PURGE", use_container_width=True):
+                purge.resume()
+                st.rerun()
+        
+        if purge.job is not None:
+            # Fragment refresh sendiri tiap detik selama job berjalan
+            st.fragment(run_every=1 if purge_running else None)(show_purge_progress)(purge.job)
         
         st.markdown("---")
         
@@ -780,31 +1199,78 @@ with tab_admin:
                 type="password"
             )
             
-            if st.button("💀 HAPUS SEMUA DATA SEKARANG", use_container_width=True):
+            if st.button("💀 HAPUS SEMUA DATA SEKARANG", use_container_width=True, disabled=purge_running):
                 if confirm_text == "DELETE ALL":
-                    with st.spinner("Menghapus seluruh database..."):
-                        try:
-                            all_docs = db.collection('harga_realtime').stream()
-                            deleted = 0
-                            batch = db.batch()
-                            
-                            for doc in all_docs:
-                                batch.delete(doc.reference)
-                                deleted += 1
-                                
-                                if deleted % 500 == 0:
-                                    batch.commit()
-                                    batch = db.batch()
-                            
-                            batch.commit()
-                            
-                            st.success(f"✅ Berhasil menghapus {deleted} data")
-                            st.cache_data.clear()
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"❌ Gagal menghapus data: {e}")
+                    try:
+                        purge.start("all")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Gagal menghapus data: {e}")
                 else:
                     st.error("❌ Konfirmasi salah! Ketik 'DELETE ALL' dengan benar.")
+    
+    st.markdown("---")
+    st.markdown("#### ⏱️ Performa Dashboard")
+    
+    # Rincian rerun sebelumnya di session ini (rerun sekarang belum selesai).
+    # Span bersarang (mis. firestore.* di dalam app.filter) ikut terhitung di induknya.
+    rerun_terakhir = st.session_state.get("perf_rerun")
+    if rerun_terakhir:
+        tahapan = sorted(
+            ((nama, detik) for nama, detik in rerun_terakhir.items() if nama != RERUN_SPAN),
+            key=lambda item: -item[1]
+        )
+        st.write(f"- Rerun Sebelumnya: **{rerun_terakhir[RERUN_SPAN] * 1000:,.0f} ms**")
+        if tahapan:
+            st.caption(" • ".join(f"{nama}: {detik * 1000:,.1f} ms" for nama, detik in tahapan))
+    
+    doc_reads = [c for c in REGISTRY.counters() if c['name'] == "firestore.doc_reads"]
+    if doc_reads:
+        st.write(f"- Dokumen Firestore Dibaca: **{sum(c['value'] for c in doc_reads):,}**")
+        st.caption(" • ".join(f"{c['labels'].get('op', '-')}: {c['value']:,}" for c in doc_reads))
+    query_stats = init_query_cache().stats()
+    st.write(f"- Cache Query: **{query_stats['hits']:,}** hit / **{query_stats['misses']:,}** miss"
+             f" • {query_stats['entries']} entri")
+    
+    # p50/p95 dari sampel terbaru per span, seluruh session di proses ini
+    span_rows = REGISTRY.timings()
+    if span_rows:
+        st.dataframe(
+            pd.DataFrame([{
+                "Span": row['name'] + "".join(f" [{v}]" for v in row['labels'].values()),
+                "Jumlah": row['count'],
+                "p50 (ms)": row['p50'] * 1000,
+                "p95 (ms)": row['p95'] * 1000,
+                "Maks (ms)": row['max'] * 1000,
+                "Terakhir (ms)": row['last'] * 1000,
+                "Total (detik)": row['total'],
+            } for row in span_rows]),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                col: st.column_config.NumberColumn(format="%.1f")
+                for col in ("p50 (ms)", "p95 (ms)", "Maks (ms)", "Terakhir (ms)")
+            },
+        )
+    
+    col_json, col_prom, col_reset = st.columns(3)
+    col_json.download_button(
+        "📥 Export Metrics (JSON)",
+        data=lambda: REGISTRY.to_json(),
+        file_name="mentawai_metrics.json",
+        mime="application/json",
+        use_container_width=True,
+    )
+    col_prom.download_button(
+        "📥 Export Metrics (Prometheus)",
+        data=lambda: REGISTRY.to_prometheus(),
+        file_name="mentawai_metrics.prom",
+        mime="text/plain",
+        use_container_width=True,
+    )
+    if col_reset.button("♻️ Reset Metrics", use_container_width=True):
+        REGISTRY.reset()
+        st.rerun()
 
 # ============================================================================
 # FOOTER
@@ -821,3 +1287,6 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+# Rerun selesai: simpan rinciannya untuk panel performa di rerun berikutnya
+st.session_state.perf_rerun = REGISTRY.end_trace()
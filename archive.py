@@ -0,0 +1,260 @@
+"""
+Cold-tier arsip: record lama dari harga_realtime dipindah ke Parquet.
+
+Layout (hive partitioning per bulan UTC, kompresi zstd):
+    arsip/tahun=2025/bulan=11/part-<uuid>-0.parquet
+
+Penulisan: record dibaca berurutan (fetch_since) dalam chunk, ditulis ke
+partisinya, dan baru setelah file tertulis doc id-nya dikembalikan untuk
+dihapus (lihat PurgeJob mode "archive"). Kalau job terputus di antara tulis
+& hapus, record bisa tertulis dua kali; read_archive() men-dedup per Doc_ID.
+
+Record ditulis utuh: field inti punya kolom sendiri, field lainnya (catatan,
+judul_berita, desa/kecamatan, ...) masuk kolom "extra" sebagai JSON, sama
+seperti backend SQLite. read_archive_records() mengembalikan record aslinya.
+
+Pembacaan: pyarrow.dataset lazy dengan partition pruning (tahun/bulan),
+column projection, filter waktu/komoditas, dan file di-memory-map.
+"""
+import datetime
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from market_data import COLUMNS, format_rupiah, frame_from_columns, records_to_frame
+from storage import BATCH_LIMIT, to_utc_naive
+
+ARCHIVE_DIR = os.environ.get("MARKET_ARCHIVE_DIR", "arsip")
+
+# Jumlah record per chunk tulis (satu file per bulan per chunk)
+ARCHIVE_CHUNK = 50000
+
+ARCHIVE_FIELDS = [
+    "id", "komoditas", "harga_angka", "range_harga", "waktu_ambil",
+    "sumber", "lokasi", "status", "extra",
+]
+
+# Kolom frame -> field arsip, untuk column projection
+FRAME_FIELDS = {
+    "Doc_ID": "id",
+    "Komoditas": "komoditas",
+    "Harga_Angka": "harga_angka",
+    "Range_Harga": "range_harga",
+    "Lokasi": "lokasi",
+    "Sumber": "sumber",
+    "Status": "status",
+    "Raw_Time": "waktu_ambil",
+}
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("komoditas", pa.string()),
+        ("harga_angka", pa.int64()),
+        ("range_harga", pa.string()),
+        ("waktu_ambil", pa.timestamp("us")),
+        ("sumber", pa.string()),
+        ("lokasi", pa.string()),
+        ("status", pa.string()),
+        # Field di luar kolom inti, JSON (None kalau tidak ada)
+        ("extra", pa.string()),
+        ("tahun", pa.int16()),
+        ("bulan", pa.int8()),
+    ])
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([("tahun", pa.int16()), ("bulan", pa.int8())]), flavor="hive")
+
+
+def _extra_json(record):
+    extra = {k: v for k, v in record.items() if k not in ARCHIVE_FIELDS}
+    return json.dumps(extra, default=str) if extra else None
+
+
+def write_archive(records, root=ARCHIVE_DIR):
+    """Write records into month partitions under root, return jumlah record"""
+    columns = {field: [] for field in ARCHIVE_FIELDS}
+    for record in records:
+        for field in ARCHIVE_FIELDS[:-1]:
+            columns[field].append(record.get(field))
+        columns["extra"].append(_extra_json(record))
+    if not columns["id"]:
+        return 0
+
+    columns["waktu_ambil"] = [to_utc_naive(w) for w in columns["waktu_ambil"]]
+    columns["harga_angka"] = [
+        int(h) if isinstance(h, (int, float)) and not isinstance(h, bool) else None
+        for h in columns["harga_angka"]
+    ]
+    return write_columns(columns, root)
+
+
+def write_columns(columns, root=ARCHIVE_DIR):
+    """Write column arrays (ARCHIVE_FIELDS, waktu naive UTC) into month partitions;
+    "extra" may be omitted"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    waktu = np.asarray(columns["waktu_ambil"], dtype="datetime64[us]")
+    if not len(waktu):
+        return 0
+    if "extra" not in columns:
+        columns = dict(columns, extra=[None] * len(waktu))
+    table = pa.Table.from_pydict(
+        dict(
+            columns,
+            waktu_ambil=waktu,
+            tahun=waktu.astype("datetime64[Y]").astype(np.int64) + 1970,
+            bulan=waktu.astype("datetime64[M]").astype(np.int64) % 12 + 1,
+        ),
+        schema=_schema(),
+    )
+    pq.write_to_dataset(
+        table, root,
+        partition_cols=["tahun", "bulan"],
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        compression="zstd",
+    )
+    return table.num_rows
+
+
+def archive_batches(repo, cutoff, root=ARCHIVE_DIR, batch_size=BATCH_LIMIT, chunk_size=ARCHIVE_CHUNK):
+    """Yield doc id batches to delete, each only after its records are on disk"""
+    cutoff = to_utc_naive(cutoff)
+    waktu, doc_id = EPOCH, ""
+    chunk = []
+    while True:
+        docs = repo.fetch_since(waktu, doc_id, limit=batch_size)
+        old = [d for d in docs if to_utc_naive(d["waktu_ambil"]) < cutoff]
+        chunk.extend(old)
+        done = len(old) < len(docs) or len(docs) < batch_size
+        if len(chunk) >= chunk_size or (done and chunk):
+            write_archive(chunk, root)
+            ids = [d["id"] for d in chunk]
+            chunk = []
+            for i in range(0, len(ids), batch_size):
+                yield ids[i:i + batch_size]
+        if done:
+            return
+        waktu, doc_id = to_utc_naive(docs[-1]["waktu_ambil"]), docs[-1]["id"]
+
+
+def _month_filter(ds, start, end):
+    # Perbandingan sederhana di kolom partisi -> fragment yang tidak cocok dilewati
+    tahun, bulan = ds.field("tahun"), ds.field("bulan")
+    expr = None
+    if start is not None:
+        expr = (tahun > start.year) | ((tahun == start.year) & (bulan >= start.month))
+    if end is not None:
+        upper = (tahun < end.year) | ((tahun == end.year) & (bulan <= end.month))
+        expr = upper if expr is None else expr & upper
+    return expr
+
+
+def open_archive(root=ARCHIVE_DIR):
+    """Lazy pyarrow dataset over the archive (None kalau belum ada arsip)"""
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    if not os.path.isdir(root):
+        return None
+    # Schema eksplisit: file arsip lama (tanpa kolom extra) terbaca dengan extra = null
+    return ds.dataset(
+        root, schema=_schema(), format="parquet", partitioning=_partitioning(),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def _archive_filter(start, end, komoditas):
+    import pyarrow.dataset as ds
+
+    start, end = to_utc_naive(start), to_utc_naive(end)
+    expr = _month_filter(ds, start, end)
+    waktu = ds.field("waktu_ambil")
+    for cond in (
+        waktu >= pd.Timestamp(start) if start is not None else None,
+        waktu < pd.Timestamp(end) if end is not None else None,
+        ds.field("komoditas") == komoditas if komoditas else None,
+    ):
+        if cond is not None:
+            expr = cond if expr is None else expr & cond
+    return expr
+
+
+def read_archive(start=None, end=None, komoditas=None, columns=None, root=ARCHIVE_DIR):
+    """Archived rows with start <= waktu_ambil < end as a dashboard frame"""
+    dataset = open_archive(root)
+    if dataset is None:
+        return records_to_frame([])
+    expr = _archive_filter(start, end, komoditas)
+    wanted = COLUMNS if columns is None else columns
+    fields = sorted({FRAME_FIELDS[col] for col in wanted} | {"id", "waktu_ambil"})
+    table = dataset.to_table(columns=fields, filter=expr)
+    return table_to_frame(table)
+
+
+def read_archive_records(start=None, end=None, komoditas=None, root=ARCHIVE_DIR):
+    """Archived records as written (core fields + extra), one per id"""
+    dataset = open_archive(root)
+    if dataset is None:
+        return []
+    rows = dataset.to_table(columns=ARCHIVE_FIELDS, filter=_archive_filter(start, end, komoditas)).to_pylist()
+    records = {}
+    for row in rows:
+        extra = row.pop("extra")
+        record = {k: v for k, v in row.items() if v is not None}
+        if extra:
+            record.update(json.loads(extra))
+        records[record["id"]] = record
+    return list(records.values())
+
+
+def table_to_frame(table):
+    """Arrow table of archive fields -> typed dashboard frame (newest first)"""
+    n = table.num_rows
+
+    def column(field, default=None):
+        if field in table.column_names:
+            return table.column(field).to_pandas()
+        return pd.Series([default] * n, dtype=object)
+
+    harga = column("harga_angka").fillna(0).astype(np.int64)
+    teks = column("range_harga").astype(object)
+    # Sama seperti records_to_frame: None kalau bisa diturunkan dari Harga_Angka
+    range_harga = teks.where(teks != harga.map(format_rupiah), None)
+    range_harga[teks.isna()] = "-"
+
+    df = frame_from_columns(
+        column("id"), column("komoditas"), harga.to_numpy(), range_harga,
+        column("lokasi", "-"), column("sumber"), column("status", "Verified"),
+        column("waktu_ambil"),
+    )
+    df = df.drop_duplicates("Doc_ID")
+    df = df.sort_values(["Raw_Time", "Doc_ID"], ascending=False, na_position="last")
+    return df.reset_index(drop=True)
+
+
+def archive_stats(root=ARCHIVE_DIR):
+    """Jumlah partisi bulan, file, dan ukuran arsip di disk"""
+    months, files, size = set(), 0, 0
+    if os.path.isdir(root):
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.endswith(".parquet"):
+                    files += 1
+                    size += os.path.getsize(os.path.join(dirpath, name))
+                    months.add(os.path.relpath(dirpath, root))
+    return {"bulan": len(months), "files": files, "bytes": size}
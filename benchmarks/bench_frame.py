@@ -0,0 +1,70 @@
+"""
+Benchmark representasi frame: list of dict + kolom object (cara lama) vs
+frame kolumnar bertipe dari records_to_frame().
+
+Jalankan dari root repo:
+    python benchmarks/bench_frame.py --rows 1000 100000
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data import format_wib, records_to_frame  # noqa: E402
+from synthetic import make_records  # noqa: E402
+
+
+def legacy_records_to_frame(docs):
+    """Cara lama di fetch_market_data (sebelum kolom bertipe)"""
+    all_data = []
+    for d in docs:
+        all_data.append({
+            "Komoditas": d.get('komoditas'),
+            "Harga": d.get('range_harga'),
+            "Harga_Angka": d.get('harga_angka', 0),
+            "Lokasi": d.get('lokasi', '-'),
+            "Sumber": d.get('sumber'),
+            "Status": d.get('status', 'Verified'),
+            "Waktu": format_wib(d.get('waktu_ambil')),
+            "Raw_Time": d.get('waktu_ambil')
+        })
+    return pd.DataFrame(all_data)
+
+
+def measure(name, build, docs):
+    start = time.perf_counter()
+    df = build(docs)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    blob = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle.loads(blob)
+    pickle_s = time.perf_counter() - start
+
+    memory = df.memory_usage(deep=True).sum()
+    print(f"{len(docs):>9} {name:>8} {build_s * 1000:10.1f} {memory / 1e6:11.2f} "
+          f"{len(blob) / 1e6:11.2f} {pickle_s * 1000:13.1f}")
+    return memory, len(blob)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'frame':>8} {'build (ms)':>10} {'memory (MB)':>11} "
+          f"{'pickle (MB)':>11} {'dump+load (ms)':>13}")
+    for rows in args.rows:
+        docs = make_records(rows)
+        old_mem, old_blob = measure("legacy", legacy_records_to_frame, docs)
+        new_mem, new_blob = measure("typed", records_to_frame, docs)
+        print(f"{'':>9} {'ratio':>8} {'':>10} {old_mem / new_mem:10.1f}x {old_blob / new_blob:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark form "KIRIM DATA": repo.add langsung vs IngestQueue (write-behind).
+
+Backend disimulasikan dengan MemoryRepository + sleep per commit (round trip
+jaringan dari kepulauan). Diukur:
+  latency     waktu tunggu pengirim per laporan (p50 / p95)
+  burst       N laporan masuk bersamaan dari beberapa thread, sampai semuanya
+              ada di backend (throughput end-to-end)
+
+Jalankan dari root repo:
+    python benchmarks/bench_ingest.py --rtt 0.15 --burst 500 --threads 8
+"""
+import argparse
+import concurrent.futures
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import IngestQueue  # noqa: E402
+from storage import MemoryRepository  # noqa: E402
+
+
+class SlowRepository(MemoryRepository):
+    """MemoryRepository with a fixed round trip per commit"""
+
+    def __init__(self, rtt):
+        super().__init__()
+        self.rtt = rtt
+        self.commits = 0
+
+    def add(self, record):
+        time.sleep(self.rtt)
+        self.commits += 1
+        return super().add(record)
+
+    def add_many(self, records):
+        time.sleep(self.rtt)
+        self.commits += 1
+        for record in records:
+            super().add(record)
+        return len(records)
+
+
+def laporan(i):
+    return {
+        "komoditas": "Kopra Kering",
+        "harga_angka": 15000 + i,
+        "waktu_ambil": datetime.datetime.now(datetime.timezone.utc),
+        "sumber": "Petani",
+        "lokasi": "Taileleu, Siberut Selatan",
+        "status": "Verified",
+    }
+
+
+def percentiles(times):
+    times = sorted(times)
+    return statistics.median(times) * 1000, times[int(len(times) * 0.95) - 1] * 1000
+
+
+def burst(submit, n, threads):
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+        list(pool.map(submit, (laporan(i) for i in range(n))))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rtt", type=float, default=0.15, help="Round trip per commit (detik)")
+    parser.add_argument("--submissions", type=int, default=40, help="Laporan untuk uji latency")
+    parser.add_argument("--burst", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Latency per laporan
+        direct = SlowRepository(args.rtt)
+        direct_times = []
+        for i in range(args.submissions):
+            start = time.perf_counter()
+            direct.add(laporan(i))
+            direct_times.append(time.perf_counter() - start)
+
+        queued = SlowRepository(args.rtt)
+        queue = IngestQueue(queued, path=os.path.join(tmp, "latency.db"))
+        queue_times = []
+        for i in range(args.submissions):
+            start = time.perf_counter()
+            queue.submit(laporan(i))
+            queue_times.append(time.perf_counter() - start)
+        queue.flush()
+        queue.close()
+
+        print(f"rtt {args.rtt * 1000:.0f} ms, {args.submissions} laporan berurutan")
+        print(f"{'mode':<10} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+        print(f"{'direct':<10} {percentiles(direct_times)[0]:>9.2f} {percentiles(direct_times)[1]:>9.2f}")
+        print(f"{'queue':<10} {percentiles(queue_times)[0]:>9.2f} {percentiles(queue_times)[1]:>9.2f}")
+
+        # Burst dari banyak pengirim sekaligus
+        direct = SlowRepository(args.rtt)
+        direct_s = burst(direct.add, args.burst, args.threads)
+
+        queued = SlowRepository(args.rtt)
+        queue = IngestQueue(queued, path=os.path.join(tmp, "burst.db"))
+        start = time.perf_counter()
+        accept_s = burst(queue.submit, args.burst, args.threads)
+        queue.flush(timeout=600)
+        total_s = time.perf_counter() - start
+        queue.close()
+
+    print(f"\nburst {args.burst} laporan, {args.threads} thread pengirim")
+    print(f"direct  {direct_s:.2f} s ({args.burst / direct_s:,.0f}/s, {direct.commits} commit)")
+    print(f"queue   diterima {accept_s:.2f} s, di backend {total_s:.2f} s "
+          f"({args.burst / total_s:,.0f}/s, {queued.commits} commit)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark parsing halaman berita di atas fixture HTML tersimpan.
+
+Fixture ada di benchmarks/fixtures/*.html (halaman daftar berita ala
+WordPress: script, style, menu, sidebar, 30 artikel + ringkasan). Halaman
+hasil simpan dari situs asli bisa ditaruh di folder yang sama. Dibandingkan:
+  bs4-full      BeautifulSoup(html.parser) seluruh halaman + find_all (cara lama)
+  bs4-strainer  BeautifulSoup + SoupStrainer, hanya elemen target yang disimpan
+  strain        parsing.extract (StrainParser, tanpa tree, berhenti di limit)
+Lalu parse_pages untuk banyak halaman: serial vs process pool.
+
+Jalankan dari root repo:
+    python benchmarks/bench_parse.py --pages 64
+    python benchmarks/bench_parse.py --regenerate   # tulis ulang fixture sintetis
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from parsing import (  # noqa: E402
+    BS4_FEATURES, extract, extract_strained, parse_pages
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SOURCE = {
+    "selector": "h3.entry-title",
+    "snippet": "div.entry-summary",
+    "limit": 5,
+}
+SELECTORS = {"judul": SOURCE["selector"], "snippet": SOURCE["snippet"]}
+
+KOMODITAS = ["Kopra", "Sawit", "Cengkeh", "Pinang", "Karet", "Kakao", "Nilam"]
+
+
+def make_fixture(seed, articles=30):
+    """Synthetic news listing page, deterministic per seed"""
+    rng = random.Random(seed)
+    script = "<script>" + "var x=function(a){return a*2;};" * 200 + "</script>"
+    style = "<style>" + ".c{margin:0;padding:0;color:#333;}" * 200 + "</style>"
+    menu = "".join(f'<li class="menu-item"><a href="/kategori/{i}">Kategori {i}</a></li>' for i in range(60))
+    items = []
+    for i in range(articles):
+        komoditas = rng.choice(KOMODITAS)
+        harga = rng.randrange(2_000, 40_000, 25)
+        judul = rng.choice([
+            f"Harga {komoditas} Hari Ini Naik Jadi Rp {harga:,}/kg",
+            f"Tender {komoditas}: Rp {harga:,} - Rp {harga + 500:,}",
+            f"Petani {komoditas} Mentawai Panen Raya",
+            f"Kabar {komoditas} Pekan Ini",
+        ]).replace(",", ".")
+        snippet = " ".join(
+            f"Lorem ipsum dolor sit amet, harga di tingkat petani Rp {harga + j * 10:,}.".replace(",", ".")
+            if j == 3 else "Consectetur adipiscing elit, sed do eiusmod tempor incididunt."
+            for j in range(12)
+        )
+        items.append(
+            f'<article id="post-{seed}-{i}" class="post type-post status-publish">'
+            f'<div class="post-thumbnail"><img src="/img/{i}.jpg" alt="" loading="lazy"></div>'
+            f'<header class="entry-header"><h3 class="entry-title">'
+            f'<a href="/berita/{seed}/{i}" rel="bookmark">{judul}</a></h3>'
+            f'<div class="entry-meta"><span class="posted-on">{i + 1} jam lalu</span></div></header>'
+            f'<div class="entry-summary"><p>{snippet}</p></div>'
+            f'<footer class="entry-footer"><a href="/tag/{komoditas.lower()}">{komoditas}</a></footer>'
+            f'</article>'
+        )
+    sidebar = "".join(f'<section class="widget"><h3 class="widget-title">Widget {i}</h3>'
+                      f'<p>{"Teks sidebar. " * 30}</p></section>' for i in range(8))
+    return (
+        f"<!DOCTYPE html><html lang=\"id\"><head><meta charset=\"utf-8\">"
+        f"<title>Berita Komoditas {seed}</title>{style}{script}</head><body>"
+        f"<header><nav><ul>{menu}</ul></nav></header>"
+        f"<main id=\"main\">{''.join(items)}</main>"
+        f"<aside id=\"secondary\">{sidebar}</aside>{script}</body></html>"
+    ).encode("utf-8")
+
+
+def load_fixtures(regenerate=False):
+    paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+    if regenerate or not paths:
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+        for seed in range(3):
+            with open(os.path.join(FIXTURE_DIR, f"berita_{seed}.html"), "wb") as f:
+                f.write(make_fixture(seed))
+        paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def bs4_full(body, selectors, limit):
+    # Jalur lama di scraper.py: tree lengkap lalu find_all
+    soup = BeautifulSoup(body, "html.parser")
+    found = {}
+    for name, selector in selectors.items():
+        tag, cls = selector.split(".", 1)
+        found[name] = [" ".join(el.text.split()) for el in soup.find_all(tag, class_=cls, limit=limit)]
+    return found
+
+
+MODES = {
+    "bs4-full": bs4_full,
+    "bs4-strainer": extract_strained,
+    "strain": extract,
+}
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=64, help="Jumlah halaman untuk uji parse_pages")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--regenerate", action="store_true")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.regenerate)
+    limit = SOURCE["limit"]
+    print(f"bs4 features: {BS4_FEATURES}, cpu: {os.cpu_count()}")
+    print(f"{'fixture':<16} {'KB':>6} " + " ".join(f"{m + ' (ms)':>18}" for m in MODES))
+    for name, body in fixtures:
+        expected = bs4_full(body, SELECTORS, limit)
+        row = []
+        for mode, fn in MODES.items():
+            if fn(body, SELECTORS, limit) != expected:
+                raise SystemExit(f"{mode} berbeda dengan bs4-full di {name}")
+            row.append(best_of(lambda: fn(body, SELECTORS, limit), args.repeat) * 1000)
+        print(f"{name:<16} {len(body) / 1024:>6.0f} " + " ".join(f"{t:>18.2f}" for t in row))
+
+    jobs = [(SOURCE, fixtures[i % len(fixtures)][1]) for i in range(args.pages)]
+    serial = best_of(lambda: parse_pages(jobs, workers=1), max(1, args.repeat // 2))
+    parse_pages(jobs, workers=args.workers)  # pemanasan: spawn worker
+    pooled = best_of(lambda: parse_pages(jobs, workers=args.workers), max(1, args.repeat // 2))
+    old = best_of(lambda: [bs4_full(body, SELECTORS, limit) for _, body in jobs], 1)
+    print(f"\n{args.pages} halaman: bs4-full serial {old:.3f} s, strain serial {serial:.3f} s, "
+          f"strain pool({args.workers}) {pooled:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
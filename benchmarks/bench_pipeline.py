@@ -0,0 +1,238 @@
+"""
+Benchmark pipeline data dashboard, offline di atas fake Firestore.
+
+Tahap yang diukur (sama dengan kode yang dipakai app.py):
+  fetch        FirestoreRepository.fetch_latest (fake client, tanpa network)
+  to_frame     records_to_frame (dokumen -> DataFrame)
+  filter       filter_frame: tanggal + komoditas + lokasi
+  filter_stats compute_filter: filter + semua statistik sekali jalan (miss FilterCache)
+  search       SearchIndex: bind ke frame baru + satu query
+  sort:<mode>  page_rows untuk tiap SORT_OPTIONS (halaman pertama)
+  stats        rata-rata/max/min/median Analisis Harga
+  rollup_stats summarize_rollups dari rollup harian
+  value_counts distribusi per komoditas
+  csv_export   export_csv seluruh hasil filter
+
+Per tahap dicatat waktu terbaik & median (tanpa tracemalloc) dan peak memory
+(run terpisah dengan tracemalloc). Hasil ditulis sebagai JSON; --compare
+membandingkan dengan run sebelumnya dan exit 1 kalau ada regresi.
+
+Jalankan dari root repo:
+    python benchmarks/bench_pipeline.py --rows 1000 100000 1000000 --output hasil.json
+    python benchmarks/bench_pipeline.py --rows 1000 100000 --compare hasil.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from fake_firestore import FakeFirestoreClient  # noqa: E402
+from filter_cache import compute_filter  # noqa: E402
+from loadgen import columns_to_records, generate_columns  # noqa: E402
+from market_data import (  # noqa: E402
+    SORT_OPTIONS, export_csv, filter_frame, page_rows, records_to_frame
+)
+from rollups import (  # noqa: E402
+    ROLLUP_COLLECTION, aggregate_rollups, rollups_to_frame, summarize_rollups
+)
+from search import SearchIndex  # noqa: E402
+from storage import COLLECTION, FirestoreRepository  # noqa: E402
+
+NOW = datetime.datetime(2026, 1, 1)
+
+# Filter khas dashboard: 7 hari, satu komoditas, potongan nama lokasi
+FILTER = {"hari": 7, "komoditas": "Cengkeh", "lokasi": "sikakap"}
+SEARCH_TERM = "pagai"
+PAGE_SIZE = 50
+
+
+def make_repo(rows, seed=42):
+    """FirestoreRepository on a fake client, pre-loaded with `rows` records"""
+    client = FakeFirestoreClient()
+    columns = generate_columns(np.random.default_rng(seed), rows, NOW, days=30,
+                               id_prefix=f"bench{seed}")
+    records = columns_to_records(columns)
+    client.load(COLLECTION, records)
+    repo = FirestoreRepository(client)
+    # Rollup dimuat langsung, sama dengan hasil tulis lewat add_many
+    rollup_docs = [
+        dict(stats, komoditas=key[0], kecamatan=key[1], hari=key[2], id="|".join(key))
+        for key, stats in aggregate_rollups(records).items()
+    ]
+    client.load(ROLLUP_COLLECTION, rollup_docs)
+    return repo
+
+
+def stages(repo, rows):
+    """(name, fn) pairs; each fn gets the previous stage outputs via `state`"""
+    since = NOW - datetime.timedelta(days=FILTER["hari"])
+
+    def fetch(state):
+        state["docs"] = repo.fetch_latest(rows)
+
+    def to_frame(state):
+        state["df"] = records_to_frame(state["docs"])
+
+    def filter_chain(state):
+        state["view"] = filter_frame(
+            state["df"], since=since, komoditas=FILTER["komoditas"], lokasi=FILTER["lokasi"]
+        )
+        # Tabel & chart di bawah memakai filter tanggal saja (lebih banyak baris)
+        state["wide"] = filter_frame(state["df"], since=since)
+
+    def filter_stats(state):
+        compute_filter(state["df"], since=since, lokasi=FILTER["lokasi"])
+
+    # Index dipakai ulang antar repeat seperti init_search_index() di app.py:
+    # run pertama membangun vocabulary (cold), berikutnya hanya memetakan baris
+    index = SearchIndex()
+
+    def search(state):
+        state["hits"] = index.search(state["df"], SEARCH_TERM)
+
+    def make_sort(sort_by):
+        def sort(state):
+            page_rows(state["wide"], sort_by, 0, PAGE_SIZE)
+        return sort
+
+    def stats(state):
+        harga = state["wide"]["Harga_Angka"]
+        return harga.mean(), harga.max(), harga.min(), harga.median()
+
+    def rollup_stats(state):
+        summarize_rollups(rollups_to_frame(repo.fetch_rollups(start=since.date().isoformat())))
+
+    def value_counts(state):
+        counts = state["wide"]["Komoditas"].value_counts()
+        return counts[counts > 0]
+
+    def csv_export(state):
+        export_csv(state["wide"], "Waktu (Terbaru)")
+
+    return (
+        [("fetch", fetch), ("to_frame", to_frame), ("filter", filter_chain),
+           ("filter_stats", filter_stats), ("search", search)]
+        + [(f"sort:{sort_by}", make_sort(sort_by)) for sort_by in SORT_OPTIONS]
+        + [("stats", stats), ("rollup_stats", rollup_stats),
+           ("value_counts", value_counts), ("csv_export", csv_export)]
+    )
+
+
+def run_rows(rows, repeat):
+    repo = make_repo(rows)
+    plan = stages(repo, rows)
+
+    timings = {name: [] for name, _ in plan}
+    for _ in range(repeat):
+        state = {}
+        for name, fn in plan:
+            start = time.perf_counter()
+            fn(state)
+            timings[name].append(time.perf_counter() - start)
+
+    # Peak memory per tahap, run terpisah karena tracemalloc memperlambat
+    peaks = {}
+    state = {}
+    tracemalloc.start()
+    for name, fn in plan:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(state)
+        peaks[name] = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return [
+        {
+            "rows": rows,
+            "stage": name,
+            "best_ms": round(min(times) * 1000, 3),
+            "median_ms": round(statistics.median(times) * 1000, 3),
+            "peak_mb": round(peaks[name] / 1e6, 3),
+        }
+        for name, times in timings.items()
+    ]
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Print ratios vs a previous run; return list of regressed (rows, stage)"""
+    with open(baseline_path) as f:
+        baseline = {(r["rows"], r["stage"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\n{'rows':>9} {'stage':<26} {'base (ms)':>10} {'now (ms)':>10} {'ratio':>7}")
+    for r in results:
+        old = baseline.get((r["rows"], r["stage"]))
+        if old is None or not old["best_ms"]:
+            continue
+        ratio = r["best_ms"] / old["best_ms"]
+        flag = ""
+        # Abaikan tahap sub-milidetik, terlalu berisik untuk dibandingkan
+        if ratio > threshold and r["best_ms"] >= 1.0:
+            flag = "  REGRESI"
+            regressions.append((r["rows"], r["stage"]))
+        print(f"{r['rows']:>9} {r['stage']:<26} {old['best_ms']:>10.2f} {r['best_ms']:>10.2f} "
+              f"{ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Tulis hasil JSON ke file ini")
+    parser.add_argument("--compare", help="JSON hasil run sebelumnya untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Rasio waktu (now/base) yang dianggap regresi")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rows':>9} {'stage':<26} {'best (ms)':>10} {'median (ms)':>12} {'peak (MB)':>10}")
+    for rows in args.rows:
+        for r in run_rows(rows, args.repeat):
+            results.append(r)
+            print(f"{r['rows']:>9} {r['stage']:<26} {r['best_ms']:>10.2f} "
+                  f"{r['median_ms']:>12.2f} {r['peak_mb']:>10.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+        print(f"\nHasil ditulis ke {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} tahap melambat lebih dari {args.threshold}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
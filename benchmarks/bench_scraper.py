@@ -0,0 +1,150 @@
+"""
+Benchmark scraper terhadap stub HTTP server lokal (tanpa internet).
+
+Stub melayani N halaman berita dengan delay berbeda-beda dan ETag; request
+dengan If-None-Match yang cocok dijawab 304. Dibandingkan:
+  sequential  satu GET blocking per sumber tanpa session (cara lama)
+  engine      ScrapeEngine, semua sumber bersamaan (cache kosong)
+  engine-304  run kedua, validator sudah di-cache -> 304
+
+Jalankan dari root repo:
+    python benchmarks/bench_scraper.py --sources 8 --delay 0.05 0.4
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from scrape_engine import HttpCache, ScrapeEngine  # noqa: E402
+
+
+def make_page(index, items=40):
+    """HTML mirip halaman berita: banyak artikel, beberapa judul berisi harga"""
+    articles = "".join(
+        f'<article><h3 class="entry-title"><a href="/berita/{index}/{i}">'
+        f'{"Harga" if i % 3 == 0 else "Kabar"} Kopra Mentawai hari ke-{i}: Rp {15000 + i * 25:,}'
+        f'</a></h3><div class="entry-summary"><p>{"Lorem ipsum dolor sit amet. " * 20}</p>'
+        f'</div></article>'.replace(",", ".")
+        for i in range(items)
+    )
+    return (f"<html><head><title>Sumber {index}</title></head><body>"
+            f"<nav>{'<a href=#>menu</a>' * 50}</nav><main>{articles}</main></body></html>").encode()
+
+
+class StubServer:
+    """Threaded local HTTP server: /sumber/<i> with a per-page delay & ETag"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.pages = [make_page(i) for i in range(len(delays))]
+        self.etags = [f'"{hashlib.sha1(page).hexdigest()}"' for page in self.pages]
+        self.hits = {200: 0, 304: 0}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                index = int(self.path.rsplit("/", 1)[-1])
+                time.sleep(stub.delays[index])
+                if self.headers.get("If-None-Match") == stub.etags[index]:
+                    stub.hits[304] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", stub.etags[index])
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                stub.hits[200] += 1
+                body = stub.pages[index]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", stub.etags[index])
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def sources(self):
+        host, port = self.server.server_address
+        return [
+            {"name": f"Stub {i}", "url": f"http://{host}:{port}/sumber/{i}"}
+            for i in range(len(self.delays))
+        ]
+
+
+def run_sequential(sources):
+    total = 0
+    for source in sources:
+        total += len(httpx.get(source["url"], timeout=10).content)
+    return total
+
+
+def run_engine(sources, cache):
+    async def run():
+        async with ScrapeEngine(cache, per_host_limit=len(sources)) as engine:
+            results = await engine.fetch_all(sources)
+        for result in results:
+            engine.commit(result)
+        return results
+
+    results = asyncio.run(run())
+    return sum(r.bytes for r in results), sum(r.not_modified for r in results)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sources", type=int, default=8)
+    parser.add_argument("--delay", type=float, nargs=2, default=[0.05, 0.4],
+                        metavar=("MIN", "MAX"), help="Delay server per sumber (detik)")
+    args = parser.parse_args()
+
+    lo, hi = args.delay
+    step = (hi - lo) / max(1, args.sources - 1)
+    delays = [lo + i * step for i in range(args.sources)]
+
+    with StubServer(delays) as stub:
+        sources = stub.sources()
+        cache = HttpCache(":memory:")
+
+        seq_s, seq_bytes = timed(run_sequential, sources)
+        cold_s, (cold_bytes, _) = timed(run_engine, sources, cache)
+        warm_s, (warm_bytes, not_modified) = timed(run_engine, sources, cache)
+
+    print(f"{args.sources} sumber, delay {lo:.2f}-{hi:.2f} detik "
+          f"(jumlah {sum(delays):.2f}, paling lambat {max(delays):.2f})")
+    print(f"{'mode':<12} {'wall (s)':>9} {'bytes':>10} {'304':>5}")
+    print(f"{'sequential':<12} {seq_s:>9.3f} {seq_bytes:>10,} {0:>5}")
+    print(f"{'engine':<12} {cold_s:>9.3f} {cold_bytes:>10,} {0:>5}")
+    print(f"{'engine-304':<12} {warm_s:>9.3f} {warm_bytes:>10,} {not_modified:>5}")
+    print(f"server hits: {stub.hits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark pencarian tabel: DataFrame.apply per baris (cara lama) vs SearchIndex.
+
+Jalankan dari root repo:
+    python benchmarks/bench_search.py --rows 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data import records_to_frame, with_display_columns  # noqa: E402
+from search import SearchIndex  # noqa: E402
+from synthetic import make_records  # noqa: E402
+
+QUERIES = ["sikakap", "Cengkeh", "rp 12", "pending", "tidak-ada"]
+
+
+def make_frame(rows, seed=42):
+    return with_display_columns(records_to_frame(make_records(rows, seed)))
+
+
+# Kolom yang setara dengan SearchIndex di frame lama (Harga = string tampilan)
+OLD_COLUMNS = ["Komoditas", "Lokasi", "Sumber", "Status", "Harga"]
+
+
+def apply_search(df, term):
+    """Cara lama di app.py"""
+    return df.apply(lambda row: row.astype(str).str.contains(term, case=False).any(), axis=1)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def uncached_lookup(index, df, term, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        index.build(df)
+        start = time.perf_counter()
+        index.search(df, term)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-apply-rows", type=int, default=100000,
+                        help="Lewati cara lama di atas jumlah baris ini (terlalu lambat)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'query':>10} {'apply (ms)':>12} {'build (ms)':>11} "
+          f"{'lookup (ms)':>12} {'cached (ms)':>12} {'hits':>8}")
+    for rows in args.rows:
+        df = make_frame(rows)
+        index = SearchIndex()
+        build = timed(lambda: index.build(df), args.repeat)
+
+        for term in QUERIES:
+            lookup = uncached_lookup(index, df, term, args.repeat)
+            cached = timed(lambda: index.search(df, term), args.repeat)
+            hits = len(index.search(df, term))
+
+            if rows <= args.max_apply_rows:
+                old = timed(lambda: apply_search(df, term), 1)
+                old_hits = int(apply_search(df[OLD_COLUMNS], term).sum())
+                assert old_hits == hits, (term, old_hits, hits)
+                old_ms = f"{old * 1000:12.2f}"
+            else:
+                old_ms = f"{'-':>12}"
+
+            print(f"{rows:>9} {term:>10} {old_ms} {build * 1000:11.2f} "
+                  f"{lookup * 1000:12.3f} {cached * 1000:12.4f} {hits:>8}")
+
+
+if __name__ == "__main__":
+    main()
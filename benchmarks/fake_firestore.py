@@ -0,0 +1,267 @@
+"""
+Fake Firestore client in-memory untuk benchmark offline.
+
+Hanya subset API yang dipakai FirestoreRepository: collection/document,
+batch (set/create/delete + transform Increment/Minimum/Maximum, juga di dalam
+map; map kosong menimpa map yang tersimpan, seperti merge asli), get_all, query where/order_by/limit/start_at/start_after/select,
+stream() dan count().
+Waktu disimpan sebagai datetime UTC aware, seperti yang dikembalikan
+Firestore asli. Setiap dokumen yang di-stream dihitung sebagai satu read.
+"""
+import datetime
+import threading
+import uuid
+
+DOCUMENT_ID = "__name__"
+DESCENDING = "DESCENDING"
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _normalize(value):
+    if isinstance(value, datetime.datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+class _Snapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return None if self._data is None else dict(self._data)
+
+
+class _AggregationResult:
+    def __init__(self, value):
+        self.value = value
+
+
+class _CountQuery:
+    def __init__(self, query):
+        self._query = query
+
+    def get(self):
+        self._query._client.reads += 1
+        return [[_AggregationResult(sum(1 for _ in self._query._matches()))]]
+
+
+class _DocumentReference:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self):
+        client = self._collection._client
+        client.reads += 1
+        with client._lock:
+            data = self._collection._docs.get(self.id)
+        return _Snapshot(self, data)
+
+    def set(self, data, merge=False):
+        batch = self._collection._client.batch()
+        batch.set(self, data, merge=merge)
+        batch.commit()
+
+
+class _Query:
+    def __init__(self, collection, filters=(), orders=(), limit=None, start=None, fields=None):
+        self._collection = collection
+        self._client = collection._client
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._start = start
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, limit=self._limit,
+                     start=self._start, fields=self._fields)
+        state.update(changes)
+        return _Query(self._collection, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self._filters + ((field, op, _normalize(value)),))
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_at(self, values):
+        return self._copy(start=(values, True))
+
+    def start_after(self, values):
+        return self._copy(start=(values, False))
+
+    def select(self, fields):
+        return self._copy(fields=list(fields))
+
+    def count(self, alias=None):
+        return _CountQuery(self)
+
+    def _effective_orders(self):
+        orders = list(self._orders)
+        # Seperti Firestore: field inequality & __name__ ikut jadi urutan implisit
+        for field, op, _ in self._filters:
+            if op != "==" and all(f != field for f, _ in orders):
+                orders.insert(0, (field, "ASCENDING"))
+        if all(f != DOCUMENT_ID for f, _ in orders):
+            orders.append((DOCUMENT_ID, orders[-1][1] if orders else "ASCENDING"))
+        return orders
+
+    def _matches(self):
+        with self._client._lock:
+            items = list(self._collection._docs.items())
+        orders = self._effective_orders()
+
+        def value(doc_id, data, field):
+            return doc_id if field == DOCUMENT_ID else data.get(field)
+
+        rows = [
+            (doc_id, data) for doc_id, data in items
+            if all(f == DOCUMENT_ID or data.get(f) is not None for f, _ in orders)
+            and all(value(doc_id, data, f) is not None and _OPS[op](value(doc_id, data, f), v)
+                    for f, op, v in self._filters)
+        ]
+        # Sort stabil dari kunci terakhir ke pertama, tiap kunci dengan arahnya sendiri
+        for field, direction in reversed(orders):
+            rows.sort(key=lambda row: value(row[0], row[1], field), reverse=direction == DESCENDING)
+
+        if self._start is not None:
+            cursor, inclusive = self._start
+            keys = [(f, d) for f, d in orders if f in cursor]
+            mark = tuple(_normalize(cursor[f]) for f, _ in keys)
+
+            def after(row):
+                for (field, direction), target in zip(keys, mark):
+                    current = value(row[0], row[1], field)
+                    if current != target:
+                        return current > target if direction != DESCENDING else current < target
+                return inclusive
+
+            rows = [row for row in rows if after(row)]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return rows
+
+    def stream(self):
+        for doc_id, data in self._matches():
+            self._client.reads += 1
+            if self._fields is not None:
+                data = {f: data[f] for f in self._fields if f in data}
+            yield _Snapshot(_DocumentReference(self._collection, doc_id), data)
+
+    def get(self):
+        return list(self.stream())
+
+
+class _Collection(_Query):
+    def __init__(self, client, name):
+        self._docs = {}
+        self.name = name
+        self._client = client
+        super().__init__(self)
+
+    def document(self, doc_id=None):
+        return _DocumentReference(self, doc_id or uuid.uuid4().hex[:20])
+
+
+class _WriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append(("set", ref, data, merge))
+
+    def create(self, ref, data):
+        self._ops.append(("create", ref, data, False))
+
+    def delete(self, ref):
+        self._ops.append(("delete", ref, None, False))
+
+    def commit(self):
+        client = self._client
+        with client._lock:
+            for op, ref, _, _ in self._ops:
+                if op == "create" and ref.id in ref._collection._docs:
+                    raise client.Conflict(f"Document already exists: {ref.id}")
+            for op, ref, data, merge in self._ops:
+                docs = ref._collection._docs
+                if op == "delete":
+                    docs.pop(ref.id, None)
+                    continue
+                current = dict(docs.get(ref.id) or {}) if merge else {}
+                for field, value in data.items():
+                    current[field] = self._apply(current.get(field), _normalize(value))
+                docs[ref.id] = current
+            client.writes += len(self._ops)
+        self._ops = []
+
+    @classmethod
+    def _apply(cls, current, value):
+        if isinstance(value, dict) and not value:
+            # Seperti client asli: map kosong jadi field path sendiri, menimpa map lama
+            return {}
+        if isinstance(value, dict):
+            # set(merge=True) menggabungkan map per field, bukan menimpa seluruh map
+            merged = dict(current) if isinstance(current, dict) else {}
+            for field, item in value.items():
+                merged[field] = cls._apply(merged.get(field), item)
+            return merged
+        kind = type(value).__name__
+        if kind == "Increment":
+            return (current or 0) + value.value
+        if kind == "Minimum":
+            return value.value if current is None else min(current, value.value)
+        if kind == "Maximum":
+            return value.value if current is None else max(current, value.value)
+        return value
+
+
+class FakeFirestoreClient:
+    """Drop-in for firestore.client() in FirestoreRepository, counting reads/writes"""
+
+    class Conflict(Exception):
+        pass
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._collections = {}
+        self.reads = 0
+        self.writes = 0
+
+    def collection(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = _Collection(self, name)
+            return self._collections[name]
+
+    def batch(self):
+        return _WriteBatch(self)
+
+    def get_all(self, references):
+        for ref in references:
+            yield ref.get()
+
+    def load(self, name, records):
+        """Bulk-load records (dengan 'id') tanpa lewat batch, untuk setup benchmark"""
+        docs = self.collection(name)._docs
+        with self._lock:
+            for record in records:
+                data = {k: _normalize(v) for k, v in record.items() if k != "id"}
+                docs[record.get("id") or uuid.uuid4().hex[:20]] = data
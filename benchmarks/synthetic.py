@@ -0,0 +1,31 @@
+"""
+Data sintetis untuk benchmark (tanpa Firestore).
+
+Kosakata komoditas/lokasi/sumber diambil dari constants.py, sama dengan
+form input dan loadgen.py.
+"""
+import datetime
+import random
+
+from constants import DESA_MENTAWAI, KECAMATAN_LIST, KOMODITAS_LIST, SUMBER_LIST, VERIFIED_RATIO
+from market_data import format_rupiah
+
+
+def make_records(rows, seed=42):
+    """Records seperti yang dikembalikan storage backend, terbaru lebih dulu"""
+    rng = random.Random(seed)
+    now = datetime.datetime(2026, 1, 1)
+    records = []
+    for i in range(rows):
+        harga = rng.randint(3000, 400000)
+        records.append({
+            "id": f"doc{i:08d}",
+            "komoditas": rng.choice(KOMODITAS_LIST),
+            "harga_angka": harga,
+            "range_harga": format_rupiah(harga),
+            "waktu_ambil": now - datetime.timedelta(minutes=i),
+            "sumber": rng.choice(SUMBER_LIST),
+            "lokasi": f"{rng.choice(DESA_MENTAWAI)}, {rng.choice(KECAMATAN_LIST)}",
+            "status": "Verified" if rng.random() < VERIFIED_RATIO else "Pending",
+        })
+    return records
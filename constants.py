@@ -0,0 +1,50 @@
+"""
+Kosakata bersama Mentawai Market: komoditas, wilayah, sumber & rentang harga.
+
+Dipakai form input (app.py), data dummy (admin panel, seeding.py) dan
+load generator (loadgen.py), supaya distribusinya sama di semua tempat.
+"""
+
+KOMODITAS_LIST = [
+    "Kopra Kering", "Cengkeh", "Pinang", "Gurita", "Kakao",
+    "Lobster", "Nilam", "Rotan", "Sagu", "Kelapa Utuh",
+    "Ikan Tuna", "Vanili", "Pala", "Kayu Manis"
+]
+
+DESA_MENTAWAI = [
+    "Taileleu", "Matotonan", "Silabu", "Sirilogui", "Rokdok",
+    "Madobag", "Saumanganyak", "Saibi Samukop", "Bulasat", "Sigapokna",
+    "Bojakan", "Pokai", "Simalegi", "Sitioitoi", "Ugai"
+]
+
+KECAMATAN_LIST = [
+    "Sikakap", "Pagai Utara", "Pagai Selatan", "Sipora Utara",
+    "Sipora Selatan", "Siberut Selatan", "Siberut Barat",
+    "Siberut Utara", "Siberut Tengah"
+]
+
+SUMBER_LIST = ["Petani", "Pengepul", "Dinas Pasar", "Masyarakat"]
+
+# Harga range per komoditas (untuk realistis)
+HARGA_RANGES = {
+    "Kopra Kering": (8000, 15000),
+    "Cengkeh": (80000, 150000),
+    "Pinang": (15000, 25000),
+    "Gurita": (45000, 80000),
+    "Kakao": (25000, 40000),
+    "Lobster": (200000, 400000),
+    "Nilam": (150000, 250000),
+    "Rotan": (5000, 12000),
+    "Sagu": (8000, 15000),
+    "Kelapa Utuh": (3000, 6000),
+    "Ikan Tuna": (35000, 60000),
+    "Vanili": (500000, 800000),
+    "Pala": (80000, 120000),
+    "Kayu Manis": (40000, 70000)
+}
+
+# Rentang default untuk komoditas di luar HARGA_RANGES
+DEFAULT_HARGA_RANGE = (10000, 50000)
+
+# Peluang record dummy berstatus Verified
+VERIFIED_RATIO = 0.9
@@ -0,0 +1,149 @@
+"""
+Cache hasil filter dashboard (per proses) untuk rerun Streamlit.
+
+Setiap interaksi widget menjalankan ulang script; tanpa cache, mask tanggal,
+komoditas, pencarian lokasi, statistik Analisis Harga dan distribusi per
+komoditas dihitung ulang walaupun filternya tidak berubah (mis. hanya
+selectbox urutan yang digeser).
+
+FilterCache menyimpan FilterResult (posisi baris hasil filter + semua
+statistik turunannya, dihitung dalam satu lintasan) dalam LRU dengan key
+(versi frame, komoditas, lokasi, hari). Versi diberikan per objek frame:
+snapshot yang dipublish ulang atau hasil query yang di-refresh selalu dapat
+versi baru, jadi posisi baris lama tidak pernah dipakai untuk frame lain.
+Versi per frame disimpan di FrameCache; hasil filter untuk frame yang sudah
+di-GC (atau keluar dari FrameCache) dibuang pada get() berikutnya. Entry juga kedaluwarsa setelah `ttl` karena batas "hari terakhir" bergeser
+mengikuti jam.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FrameCache
+from market_data import filter_positions
+
+FILTER_CACHE_SIZE = 128
+FILTER_TTL = 60.0
+
+
+class FilterResult:
+    """Filtered row positions plus the Analisis Harga statistics for them"""
+
+    __slots__ = ("rows", "count", "mean", "min", "max", "median", "komoditas_counts")
+
+    def __init__(self, rows, count, mean, min, max, median, komoditas_counts):
+        self.rows = rows
+        self.count = count
+        self.mean = mean
+        self.min = min
+        self.max = max
+        self.median = median
+        self.komoditas_counts = komoditas_counts
+
+    def view(self, df):
+        """Filtered rows of df (the frame this result was computed on)"""
+        if isinstance(self.rows, slice) and self.rows.stop == len(df):
+            return df
+        return df.iloc[self.rows]
+
+
+def _komoditas_counts(col, rows):
+    """Komoditas -> jumlah baris (hanya yang > 0), terbanyak dulu"""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        codes = col.cat.codes.to_numpy()[rows]
+        counts = np.bincount(codes[codes >= 0], minlength=len(col.cat.categories))
+        names = col.cat.categories
+    else:
+        counted = col.iloc[rows].value_counts()
+        counts, names = counted.to_numpy(), counted.index
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    return pd.DataFrame({"Komoditas": np.asarray(names)[order], "Jumlah": counts[order]})
+
+
+def compute_filter(df, since=None, komoditas=None, lokasi=None, lokasi_index=None):
+    """Apply the dashboard filter chain and derive every statistic in one pass"""
+    rows = filter_positions(df, since, komoditas, lokasi, lokasi_index)
+    harga = df['Harga_Angka'].to_numpy()[rows]
+    counts = _komoditas_counts(df['Komoditas'], rows)
+    if not len(harga):
+        return FilterResult(rows, 0, None, None, None, None, counts)
+    return FilterResult(
+        rows, len(harga), float(harga.mean()), harga.min(), harga.max(),
+        float(np.median(harga)), counts
+    )
+
+
+class FilterCache:
+    """Bounded LRU of FilterResult keyed by (frame version, komoditas, lokasi, hari)"""
+
+    def __init__(self, max_entries=FILTER_CACHE_SIZE, ttl=FILTER_TTL, lokasi_index=None,
+                 clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # lokasi.LocationIndex: pencarian lokasi per awal kata lewat index
+        self.lokasi_index = lokasi_index
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Frame -> versi; versi yang dibuang FrameCache diantrikan (tanpa lock,
+        # bisa dari callback GC) lalu entry-nya dihapus di get()
+        self._dropped = deque()
+        self._frames = FrameCache(on_evict=self._dropped.append)
+        self._versions = itertools.count(1)
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    def version(self, df):
+        """Stable version number for a frame object (new object -> new version)"""
+        return self._frames.get(df, lambda _: next(self._versions))
+
+    def _forget_dropped(self):
+        # Frame sudah di-GC: hasil filternya tidak akan pernah dipakai lagi
+        versions = set()
+        while self._dropped:
+            versions.add(self._dropped.popleft())
+        if versions:
+            for key in [key for key in self._entries if key[0] in versions]:
+                del self._entries[key]
+
+    def get(self, df, hari, since, komoditas=None, lokasi=None):
+        """FilterResult for the filter on df, computed at most once per ttl"""
+        lokasi = lokasi.strip() if lokasi else None
+        key = (self.version(df), komoditas, lokasi.lower() if lokasi else None, hari)
+        now = self.clock()
+        with self._lock:
+            self._forget_dropped()
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                self.counters["expired"] += 1
+            self.counters["misses"] += 1
+
+        result = compute_filter(df, since, komoditas, lokasi, self.lokasi_index)
+        with self._lock:
+            self._entries[key] = (now, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evicted"] += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            self._forget_dropped()
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return dict(
+                self.counters, entries=len(self._entries),
+                hit_rate=self.counters["hits"] / lookups if lookups else None,
+            )
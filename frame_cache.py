@@ -0,0 +1,78 @@
+"""
+Cache objek turunan per frame (per proses), untuk index yang terikat posisi baris.
+
+Index seperti SearchIndex (search.py) dan LocationIndex (lokasi.py) memetakan
+posisi baris satu objek frame, jadi hanya valid untuk frame itu. Session
+bergantian memakai snapshot bersama dan frame hasil query push-down (filter
+komoditas/tanggal), sehingga index yang hanya mengingat satu frame dibangun
+ulang di setiap rerun.
+
+FrameCache menyimpan hasil build untuk beberapa frame terakhir dalam LRU.
+Key = id(frame) plus weakref untuk memastikan objeknya masih sama, dan entry
+dibuang begitu frame-nya di-GC (id bisa dipakai ulang oleh objek baru).
+on_evict(value) dipanggil untuk entry yang dibuang (GC atau LRU), mis. supaya
+FilterCache ikut membuang hasil filter frame itu. Callback bisa jalan dari
+callback GC di thread mana pun, jadi jangan mengambil lock lain di dalamnya.
+"""
+import threading
+import weakref
+from collections import OrderedDict
+
+# Frame yang index-nya disimpan
+FRAME_CACHE_SIZE = 8
+
+
+class FrameCache:
+    """Small LRU of values built per live frame object"""
+
+    def __init__(self, max_frames=FRAME_CACHE_SIZE, on_evict=None):
+        self.max_frames = max_frames
+        self.on_evict = on_evict
+        # RLock: callback weakref bisa jalan saat lock sedang dipegang (GC)
+        self._lock = threading.RLock()
+        # id(frame) -> (weakref frame, value)
+        self._entries = OrderedDict()
+        self.builds = 0
+
+    def get(self, df, build=None):
+        """Value for df; built with build(df) (under the lock) if missing"""
+        with self._lock:
+            entry = self._entries.get(id(df))
+            if entry is not None and entry[0]() is df:
+                self._entries.move_to_end(id(df))
+                return entry[1]
+            if build is None:
+                return None
+            return self.put(df, build(df))
+
+    def put(self, df, value):
+        """Store value for df (replacing any previous one), return value"""
+        key = id(df)
+        with self._lock:
+            ref = weakref.ref(df, lambda r, key=key: self._forget(key, r))
+            self._entries[key] = (ref, value)
+            self._entries.move_to_end(key)
+            self.builds += 1
+            while len(self._entries) > self.max_frames:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._evicted(evicted)
+        return value
+
+    def _forget(self, key, ref):
+        # Frame sudah di-GC; entry dengan id yang sama tapi frame baru dibiarkan
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is ref:
+                del self._entries[key]
+                self._evicted(entry[1])
+
+    def _evicted(self, value):
+        if self.on_evict is not None:
+            self.on_evict(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,217 @@
+"""
+Antrian ingest (write-behind) untuk laporan harga dari form "KIRIM DATA".
+
+submit() hanya menulis laporan ke journal SQLite lokal (WAL) lalu langsung
+kembali; doc id sudah ditentukan saat itu juga. Flusher di background thread
+mengambil laporan yang menumpuk, menggabungkannya jadi satu add_many per
+batch, dan baru menghapusnya dari journal setelah commit ke backend sukses.
+Kalau gagal, batch yang sama dicoba lagi dengan exponential backoff.
+
+Karena doc id tetap, retry setelah commit yang sebenarnya sudah masuk tidak
+membuat data dobel (backend menimpa id yang sama). Laporan yang masih di
+journal bisa dibaca lewat pending() supaya dashboard langsung menampilkannya.
+
+on_flush(records) dipanggil dari thread flusher setelah batch ter-commit.
+Callback hanya boleh memakai objek yang sudah diberikan saat queue dibuat
+(bukan fungsi st.cache_resource, yang butuh ScriptRunContext). Exception dari
+callback dicatat (log + last_error) dan tidak menghentikan flusher: batch-nya
+sudah ter-commit, jadi tidak dicoba ulang.
+"""
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from storage import BATCH_LIMIT
+
+logger = logging.getLogger(__name__)
+
+INGEST_JOURNAL_PATH = os.environ.get("MARKET_INGEST_JOURNAL", "ingest_journal.db")
+
+# Setengah batch Firestore: sisanya untuk update rollup di batch yang sama
+FLUSH_BATCH = BATCH_LIMIT // 2
+
+# Tunggu sebentar setelah submit pertama supaya burst tergabung jadi satu commit
+FLUSH_LINGER = 0.2
+
+RETRY_BASE = 0.5
+RETRY_MAX = 60.0
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return {"$dt": value.isoformat()}
+    raise TypeError(f"Tidak bisa disimpan di journal: {type(value).__name__}")
+
+
+def _decode(obj):
+    if set(obj) == {"$dt"}:
+        return datetime.datetime.fromisoformat(obj["$dt"])
+    return obj
+
+
+class IngestQueue:
+    """Durable write-behind queue in front of repo.add_many"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS journal (
+        seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+        doc_id     TEXT NOT NULL UNIQUE,
+        payload    TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, repo, path=INGEST_JOURNAL_PATH, batch_size=FLUSH_BATCH,
+                 linger=FLUSH_LINGER, on_flush=None, autostart=True):
+        self.repo = repo
+        self.path = path
+        self.batch_size = batch_size
+        self.linger = linger
+        self.on_flush = on_flush
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # Laporan lapangan tidak boleh hilang: fsync tiap commit (masih hitungan ms)
+            self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(self.SCHEMA)
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._thread = None
+
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_flush = None
+        self._retry_at = 0.0
+        self._consecutive_failures = 0
+        if autostart:
+            self.start()
+
+    # ------------------------------------------------------------------
+    # Sisi submit (thread Streamlit)
+    # ------------------------------------------------------------------
+    def submit(self, record):
+        """Journal one report and return its doc id (no network round trip)"""
+        doc_id = record.get("id") or uuid.uuid4().hex
+        payload = json.dumps({k: v for k, v in record.items() if k != "id"}, default=_encode)
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO journal (doc_id, payload, created_at) VALUES (?,?,?)",
+                (doc_id, payload, now)
+            )
+        self._wake.set()
+        return doc_id
+
+    def _rows(self, limit=None):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT seq, doc_id, payload FROM journal ORDER BY seq LIMIT ?", (limit or -1,)
+            ).fetchall()
+
+    @staticmethod
+    def _record(doc_id, payload):
+        return dict(json.loads(payload, object_hook=_decode), id=doc_id)
+
+    def pending(self):
+        """Reports not yet committed to the backend, oldest first"""
+        return [self._record(doc_id, payload) for _, doc_id, payload in self._rows()]
+
+    def pending_count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+    def stats(self):
+        return {
+            "pending": self.pending_count(),
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_flush": self.last_flush,
+        }
+
+    # ------------------------------------------------------------------
+    # Flusher (background thread)
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ingest-flusher", daemon=True)
+            self._thread.start()
+            # Sisa journal dari proses sebelumnya ikut dikirim
+            self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=max(0.05, self._retry_at - time.monotonic()) if self._retry_at else 5.0)
+            if self._stop.is_set():
+                break
+            if time.monotonic() < self._retry_at:
+                continue
+            self._wake.clear()
+            if self.linger:
+                time.sleep(self.linger)
+            while self.flush_once() == self.batch_size:
+                pass
+
+    def flush_once(self):
+        """Commit up to batch_size journaled reports, return jumlah yang terkirim"""
+        rows = self._rows(self.batch_size)
+        if not rows:
+            with self._idle:
+                self._idle.notify_all()
+            return 0
+        records = [self._record(doc_id, payload) for _, doc_id, payload in rows]
+        try:
+            self.repo.add_many(records)
+        except Exception as e:
+            self.failures += 1
+            self._consecutive_failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            delay = min(RETRY_MAX, RETRY_BASE * 2 ** (self._consecutive_failures - 1))
+            self._retry_at = time.monotonic() + delay
+            return -1
+
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM journal WHERE seq <= ?", (rows[-1][0],))
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self.last_error = None
+        self.flushed += len(rows)
+        self.batches += 1
+        self.last_flush = datetime.datetime.now(datetime.timezone.utc)
+        if self.on_flush:
+            try:
+                self.on_flush(records)
+            except Exception as e:
+                # Flusher satu-satunya tidak boleh mati karena invalidasi cache
+                logger.exception("on_flush gagal untuk %d laporan", len(records))
+                self.last_error = f"on_flush {type(e).__name__}: {e}"
+        return len(rows)
+
+    def flush(self, timeout=30):
+        """Block until the journal is empty (or timeout), return sisa pending"""
+        deadline = time.monotonic() + timeout
+        self._wake.set()
+        while self.pending_count() and time.monotonic() < deadline:
+            with self._idle:
+                self._idle.wait(timeout=0.05)
+        return self.pending_count()
+
+    def close(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.conn.close()
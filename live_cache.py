@@ -0,0 +1,148 @@
+"""
+Live cache untuk dashboard Mentawai Market.
+
+Satu listener per proses (Firestore on_snapshot, atau fake di
+MemoryRepository) menerapkan perubahan added/modified/removed ke dataset
+in-memory bersama. Dashboard & ticker membaca dari sini tanpa round trip
+ke network.
+
+Dengan initial_frame (snapshot dari disk), frame() langsung mengembalikan
+snapshot itu sampai snapshot awal listener masuk, jadi render pertama tidak
+menunggu network.
+
+Stream listener bisa putus (Firestore menutup Watch tanpa memanggil
+callback). Watchdog thread memeriksa handle.is_active tiap WATCH_CHECK_INTERVAL
+detik dan subscribe ulang dengan exponential backoff; selama itu frame lama
+tetap dipakai dan down_since mencatat sejak kapan data bisa tertinggal.
+"""
+import datetime
+import logging
+import threading
+import time
+
+from market_data import records_to_frame
+from storage import to_utc_naive
+
+logger = logging.getLogger(__name__)
+
+WATCH_CHECK_INTERVAL = 5.0
+RESUBSCRIBE_BASE = 1.0
+RESUBSCRIBE_MAX = 60.0
+
+
+class LiveMarketCache:
+    """Process-wide dataset kept current by backend change events"""
+
+    def __init__(self, repo, limit=1000, initial_frame=None, check_interval=WATCH_CHECK_INTERVAL):
+        self.repo = repo
+        self.limit = limit
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._closed = threading.Event()
+        self._docs = {}
+        self.version = 0
+        self._frame = initial_frame if initial_frame is not None else records_to_frame([])
+        self._frame_version = 0
+        self._watch = None
+        # Waktu (epoch) stream terdeteksi putus; None selama listener sehat
+        self.down_since = None
+        self.reconnects = 0
+        self.last_error = None
+        self.start()
+        self._watchdog = threading.Thread(target=self._supervise, name="live-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def start(self):
+        """Subscribe to the backend (initial snapshot arrives as 'added')"""
+        self._watch = self.repo.watch(self._on_changes, self.limit)
+
+    def restart(self):
+        """Drop the dataset and resubscribe, e.g. after a listener error"""
+        self._unsubscribe()
+        with self._lock:
+            self._docs = {}
+            self.version += 1
+        self._ready.clear()
+        self.start()
+
+    def close(self):
+        """Unsubscribe for good (the watchdog stops too)"""
+        self._closed.set()
+        self._unsubscribe()
+
+    def _unsubscribe(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    @property
+    def connected(self):
+        watch = self._watch
+        return watch is not None and getattr(watch, "is_active", True)
+
+    def stale_seconds(self):
+        """Seconds the dataset may have been missing changes (0 while connected)"""
+        down_since = self.down_since
+        return 0.0 if down_since is None else max(0.0, time.time() - down_since)
+
+    def _supervise(self):
+        failures = 0
+        delay = self.check_interval
+        while not self._closed.wait(delay):
+            if self.connected:
+                if self._ready.is_set():
+                    failures = 0
+                delay = self.check_interval
+                continue
+            if self.down_since is None:
+                self.down_since = time.time()
+                logger.warning("Listener %s terputus, subscribe ulang", self.repo.name)
+            failures += 1
+            delay = min(RESUBSCRIBE_MAX, RESUBSCRIBE_BASE * 2 ** (failures - 1))
+            try:
+                self.restart()
+                self.reconnects += 1
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("Subscribe ulang gagal (coba lagi %.0f detik): %s",
+                               delay, self.last_error)
+
+    def _on_changes(self, changes):
+        # Dipanggil dari thread listener backend
+        with self._lock:
+            for jenis, doc in changes:
+                if jenis == "removed":
+                    self._docs.pop(doc["id"], None)
+                else:
+                    self._docs[doc["id"]] = doc
+            self.version += 1
+        self.down_since = None
+        self._ready.set()
+
+    def wait_ready(self, timeout=30):
+        """Block until the initial snapshot has been applied"""
+        return self._ready.wait(timeout)
+
+    @staticmethod
+    def _sort_key(doc):
+        waktu = to_utc_naive(doc.get("waktu_ambil"))
+        return (waktu is not None, waktu or datetime.datetime.min, doc["id"])
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def frame(self):
+        """Current dataset as the dashboard DataFrame (rebuilt only on change)"""
+        with self._lock:
+            if self._frame_version == self.version or not self._ready.is_set():
+                return self._frame
+            version = self.version
+            docs = sorted(self._docs.values(), key=self._sort_key, reverse=True)
+        frame = records_to_frame(docs[:self.limit])
+        with self._lock:
+            if version >= self._frame_version:
+                self._frame = frame
+                self._frame_version = version
+        return frame
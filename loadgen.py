@@ -0,0 +1,305 @@
+"""
+Load generator Mentawai Market (pengganti loop di seeding.py & seed_dummy_data).
+
+Record dibuat per batch dengan NumPy memakai distribusi di constants.py.
+RNG ber-seed: seed + ukuran batch yang sama selalu menghasilkan data (dan doc
+id) yang sama. Batch ditulis lewat commit paralel ke storage backend, atau
+langsung ke arsip Parquet (archive.py) tanpa lewat database.
+
+SeedJob menjalankan run() di background thread untuk tombol "GENERATE SAMPLE
+DATA" di admin panel, supaya 100k baris tidak memblokir rerun script
+Streamlit; admin panel cukup membaca progress() (pola yang sama dengan
+purge.PurgeJob).
+
+Contoh:
+    MARKET_BACKEND=sqlite python loadgen.py --rows 1000000
+    python loadgen.py --rows 5000000 --target parquet --archive-dir arsip
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from constants import (
+    DEFAULT_HARGA_RANGE, DESA_MENTAWAI, HARGA_RANGES, KECAMATAN_LIST,
+    KOMODITAS_LIST, SUMBER_LIST, VERIFIED_RATIO
+)
+from market_data import format_rupiah
+from storage import BATCH_LIMIT
+
+GEN_BATCH = 50000
+
+# Commit lokal (SQLite/memory) tidak terikat limit 500 operasi Firestore
+LOCAL_COMMIT = 10000
+
+REPORT_INTERVAL = 5.0
+
+_KOMODITAS = np.array(KOMODITAS_LIST, dtype=object)
+_HARGA_LOW = np.array([HARGA_RANGES.get(k, DEFAULT_HARGA_RANGE)[0] for k in KOMODITAS_LIST])
+_HARGA_HIGH = np.array([HARGA_RANGES.get(k, DEFAULT_HARGA_RANGE)[1] for k in KOMODITAS_LIST])
+# Semua kombinasi "Desa, Kecamatan", diindeks desa * len(KECAMATAN_LIST) + kecamatan
+_LOKASI = np.array([f"{d}, {k}" for d in DESA_MENTAWAI for k in KECAMATAN_LIST], dtype=object)
+_SUMBER = np.array(SUMBER_LIST, dtype=object)
+
+
+def generate_columns(rng, n, now, days=30, id_prefix=None, start=0):
+    """One batch of n records as column arrays (waktu naive UTC)"""
+    komoditas = rng.integers(len(_KOMODITAS), size=n)
+    harga = rng.integers(_HARGA_LOW[komoditas], _HARGA_HIGH[komoditas] + 1)
+    # Sebar dalam `days` hari terakhir, resolusi detik
+    detik = rng.integers(0, (days + 1) * 86400, size=n)
+    waktu = np.datetime64(now, "us") - detik.astype("timedelta64[s]")
+    lokasi = (rng.integers(len(DESA_MENTAWAI), size=n) * len(KECAMATAN_LIST)
+              + rng.integers(len(KECAMATAN_LIST), size=n))
+    sumber = rng.integers(len(_SUMBER), size=n)
+    verified = rng.random(n) < VERIFIED_RATIO
+
+    columns = {
+        "komoditas": _KOMODITAS[komoditas],
+        "harga_angka": harga.astype(np.int64),
+        "range_harga": np.array([format_rupiah(h) for h in harga.tolist()], dtype=object),
+        "waktu_ambil": waktu,
+        "sumber": _SUMBER[sumber],
+        "lokasi": _LOKASI[lokasi],
+        "status": np.where(verified, "Verified", "Pending").astype(object),
+    }
+    if id_prefix is not None:
+        columns["id"] = np.array([f"{id_prefix}-{start + i:010d}" for i in range(n)], dtype=object)
+    return columns
+
+
+def columns_to_records(columns):
+    """Column arrays -> list of record dicts for repo.add_many"""
+    fields = list(columns)
+    values = []
+    for field in fields:
+        column = columns[field]
+        if field == "waktu_ambil":
+            values.append(column.astype("datetime64[us]").astype(object))
+        else:
+            values.append(column.tolist())
+    return [dict(zip(fields, row)) for row in zip(*values)]
+
+
+def generate_records(jumlah, seed=None, days=30, now=None):
+    """Small helper for the admin panel / seeding.py: jumlah record dummy"""
+    rng = np.random.default_rng(seed)
+    now = now or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    id_prefix = f"lg{seed}" if seed is not None else None
+    return columns_to_records(generate_columns(rng, jumlah, now, days, id_prefix))
+
+
+def _slice(columns, start, stop):
+    return {field: column[start:stop] for field, column in columns.items()}
+
+
+def run(rows, target="backend", repo=None, archive_root=None, seed=42, days=30,
+        batch_size=GEN_BATCH, commit_size=None, workers=8, now=None, report=print,
+        progress=None, cancel=None):
+    """Generate `rows` records and write them; return throughput stats
+
+    progress(written) is called after every finished commit; a set cancel
+    (threading.Event) stops before the next batch. seed=None: random data,
+    auto doc ids."""
+    from archive import ARCHIVE_DIR, write_columns
+
+    rng = np.random.default_rng(seed)
+    now = now or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    archive_root = archive_root or ARCHIVE_DIR
+    id_prefix = f"lg{seed}" if seed is not None else None
+    if commit_size is None:
+        if target == "parquet":
+            commit_size = batch_size
+        elif getattr(repo, "name", None) == "firestore":
+            commit_size = BATCH_LIMIT
+        else:
+            commit_size = LOCAL_COMMIT
+
+    written = 0
+    gen_seconds = 0.0
+    started = last_report = time.perf_counter()
+    in_flight = set()
+
+    def collect(done):
+        nonlocal written, last_report
+        for future in done:
+            written += future.result()
+        if progress:
+            progress(written)
+        now_t = time.perf_counter()
+        if report and now_t - last_report >= REPORT_INTERVAL:
+            last_report = now_t
+            report(f"  {written:>12,} rows  {written / (now_t - started):>12,.0f} rows/s")
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        for start in range(0, rows, batch_size):
+            if cancel is not None and cancel.is_set():
+                break
+            t0 = time.perf_counter()
+            n = min(batch_size, rows - start)
+            columns = generate_columns(rng, n, now, days, id_prefix, start)
+            if target == "backend":
+                records = columns_to_records(columns)
+                chunks = [
+                    (repo.add_many, records[i:i + commit_size])
+                    for i in range(0, n, commit_size)
+                ]
+            else:
+                chunks = [
+                    (write_columns, _slice(columns, i, i + commit_size), archive_root)
+                    for i in range(0, n, commit_size)
+                ]
+            gen_seconds += time.perf_counter() - t0
+
+            for fn, *args in chunks:
+                in_flight.add(pool.submit(fn, *args))
+                # Batasi commit in-flight supaya batch tidak menumpuk di memori
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = concurrent.futures.wait(
+                        in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    collect(done)
+        done, _ = concurrent.futures.wait(in_flight)
+        collect(done)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": written,
+        "target": target if target != "backend" else getattr(repo, "name", "backend"),
+        "seed": seed,
+        "elapsed_s": round(elapsed, 3),
+        "generate_s": round(gen_seconds, 3),
+        "writes_per_s": round(written / elapsed, 1) if elapsed else None,
+    }
+
+
+class SeedJob:
+    """One background run() into a storage backend, for the admin panel"""
+
+    def __init__(self, repo, rows, **run_options):
+        self.repo = repo
+        self.rows = rows
+        self.run_options = run_options
+
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+        self.state = "pending"
+        self.error = None
+        self.written = 0
+        self._started = None
+        self._finished = None
+        self.reported = False
+
+    @property
+    def running(self):
+        return self.state in ("pending", "running")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="market-seed", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Stop before the next batch (commits already submitted still land)"""
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def progress(self):
+        """Snapshot of state, counts and rows/sec for the admin panel"""
+        with self._lock:
+            end = self._finished or time.monotonic()
+            elapsed = end - self._started if self._started else 0.0
+            return {
+                "state": self.state,
+                "written": self.written,
+                "total": self.rows,
+                "elapsed": elapsed,
+                "rate": self.written / elapsed if elapsed > 0 else 0.0,
+                "error": self.error,
+            }
+
+    def _run(self):
+        with self._lock:
+            self.state = "running"
+            self._started = time.monotonic()
+        try:
+            run(self.rows, repo=self.repo, report=None, progress=self._progress,
+                cancel=self._cancel, **self.run_options)
+            state = "cancelled" if self._cancel.is_set() else "done"
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+            state = "failed"
+        with self._lock:
+            self.state = state
+            self._finished = time.monotonic()
+
+    def _progress(self, written):
+        with self._lock:
+            self.written = written
+
+
+class SeedManager:
+    """At most one seed job per process"""
+
+    def __init__(self, repo, **run_options):
+        self.repo = repo
+        self.run_options = run_options
+        self.job = None
+
+    def start(self, rows):
+        if self.job is not None and self.job.running:
+            raise RuntimeError("Generate data lain masih berjalan")
+        self.job = SeedJob(self.repo, rows, **self.run_options).start()
+        return self.job
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=30, help="Sebar waktu_ambil dalam N hari terakhir")
+    parser.add_argument("--target", choices=["backend", "parquet"], default="backend")
+    parser.add_argument("--backend", default=None,
+                        help="firestore | sqlite | memory (default: MARKET_BACKEND)")
+    parser.add_argument("--sqlite-path", default=None)
+    parser.add_argument("--archive-dir", default=None, help="Root arsip Parquet (target parquet)")
+    parser.add_argument("--batch", type=int, default=GEN_BATCH, help="Record per batch NumPy")
+    parser.add_argument("--commit-size", type=int, default=None,
+                        help="Record per commit (default: 500 Firestore, 10000 lokal, satu batch Parquet)")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    repo = None
+    if args.target == "backend":
+        from storage import get_repository
+
+        backend = args.backend or os.environ.get("MARKET_BACKEND", "firestore")
+        if backend == "firestore":
+            import firebase_admin
+            from firebase_admin import credentials
+
+            if not firebase_admin._apps:
+                firebase_admin.initialize_app(credentials.Certificate("kunci.json"))
+        repo = get_repository(backend, sqlite_path=args.sqlite_path)
+
+    print(f"Generating {args.rows:,} rows (seed={args.seed}) -> {args.target}")
+    stats = run(
+        args.rows, args.target, repo=repo, archive_root=args.archive_dir,
+        seed=args.seed, days=args.days, batch_size=args.batch,
+        commit_size=args.commit_size, workers=args.workers,
+    )
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
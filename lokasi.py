@@ -0,0 +1,224 @@
+"""
+Lokasi terstruktur: parsing "Desa, Kecamatan", gazetteer dan prefix index.
+
+Field `lokasi` tetap teks bebas ("Taileleu, Siberut Selatan"), tapi setiap
+record yang ditulis lewat storage backend juga mendapat field `desa` dan
+`kecamatan` yang sudah dinormalisasi (parse_lokasi / lengkapi_lokasi): spasi
+dirapikan dan ejaan dicocokkan ke kosakata DESA_MENTAWAI / KECAMATAN_LIST
+tanpa peduli huruf besar-kecil.
+
+Gazetteer = kosakata resmi + nama yang pernah muncul di data, dipakai untuk
+autocomplete "Cari Lokasi". LocationIndex memetakan prefix nama ke posisi
+baris per frame (disimpan di FrameCache untuk beberapa frame terakhir, jadi
+snapshot dan frame hasil query push-down tidak saling menggusur): kunci-kuncinya (setiap awal kata dari "desa, kecamatan"
+yang dinormalisasi) disimpan terurut, jadi satu pencarian = bisect rentang
+prefix lalu gabungkan posting list baris lokasi yang cocok, O(hasil) dan
+bukan scan substring per baris.
+"""
+import bisect
+import threading
+
+import numpy as np
+import pandas as pd
+
+from constants import DESA_MENTAWAI, KECAMATAN_LIST
+from frame_cache import FrameCache
+
+KOSONG = "-"
+
+# Saran autocomplete yang ditampilkan
+COMPLETE_LIMIT = 8
+
+
+def normalisasi(teks):
+    """Lowercase, rapikan spasi & koma: ' Taileleu ,siberut  Selatan' -> 'taileleu, siberut selatan'"""
+    bagian = [" ".join(b.split()) for b in str(teks).lower().split(",")]
+    return ", ".join(b for b in bagian if b)
+
+
+def _rapikan(nama):
+    """Nama di luar kosakata: spasi dirapikan, huruf awal tiap kata kapital"""
+    return " ".join(w[:1].upper() + w[1:] for w in nama.split())
+
+
+_KANON_DESA = {normalisasi(d): d for d in DESA_MENTAWAI}
+_KANON_KECAMATAN = {normalisasi(k): k for k in KECAMATAN_LIST}
+
+
+def parse_lokasi(lokasi):
+    """'Dusun, Kecamatan' teks bebas -> (desa, kecamatan) ternormalisasi ('-' kalau tidak ada)"""
+    if not lokasi or not isinstance(lokasi, str) or not normalisasi(lokasi):
+        return KOSONG, KOSONG
+    asli = [b.strip() for b in lokasi.split(",") if b.strip()]
+    if len(asli) == 1:
+        # Tanpa koma: bisa nama kecamatan saja, selain itu dianggap desa
+        kunci = normalisasi(asli[0])
+        if kunci in _KANON_KECAMATAN:
+            return KOSONG, _KANON_KECAMATAN[kunci]
+        return _KANON_DESA.get(kunci, _rapikan(asli[0])), KOSONG
+    desa, kecamatan = ", ".join(asli[:-1]), asli[-1]
+    return (
+        _KANON_DESA.get(normalisasi(desa), _rapikan(desa)),
+        _KANON_KECAMATAN.get(normalisasi(kecamatan), _rapikan(kecamatan)),
+    )
+
+
+def lengkapi_lokasi(record):
+    """Record dengan field desa & kecamatan hasil parse lokasi (record asli tidak diubah)"""
+    if "lokasi" not in record or ("desa" in record and "kecamatan" in record):
+        return record
+    desa, kecamatan = parse_lokasi(record["lokasi"])
+    return dict(record, desa=desa, kecamatan=kecamatan)
+
+
+def _kunci_prefix(nama):
+    """Normalized name plus every suffix starting at a word: 'pagai utara' -> +'utara'"""
+    nama = normalisasi(nama)
+    kunci = [nama]
+    for i, huruf in enumerate(nama):
+        if i and nama[i - 1] in " ," and huruf not in " ,":
+            kunci.append(nama[i:])
+    return kunci
+
+
+class _SortedPrefix:
+    """Sorted (key, value) pairs; lookup all values whose key starts with a prefix"""
+
+    def __init__(self, pairs):
+        pairs = sorted(pairs)
+        self.keys = [k for k, _ in pairs]
+        self.values = [v for _, v in pairs]
+
+    def lookup(self, prefix):
+        start = bisect.bisect_left(self.keys, prefix)
+        # "\uffff" > semua karakter nama: batas atas rentang prefix
+        end = bisect.bisect_right(self.keys, prefix + "\uffff", lo=start)
+        return self.values[start:end]
+
+
+class Gazetteer:
+    """Known desa/kecamatan names: official vocabularies plus observed locations"""
+
+    def __init__(self, desa=DESA_MENTAWAI, kecamatan=KECAMATAN_LIST):
+        self._lock = threading.Lock()
+        self.desa = set(desa)
+        self.kecamatan = set(kecamatan)
+        self.lokasi = set()
+        self._index = None
+
+    def add(self, desa, kecamatan):
+        """Record an observed (desa, kecamatan) pair"""
+        with self._lock:
+            baru = False
+            if desa != KOSONG and desa not in self.desa:
+                self.desa.add(desa)
+                baru = True
+            if kecamatan != KOSONG and kecamatan not in self.kecamatan:
+                self.kecamatan.add(kecamatan)
+                baru = True
+            if desa != KOSONG and kecamatan != KOSONG and (desa, kecamatan) not in self.lokasi:
+                self.lokasi.add((desa, kecamatan))
+                baru = True
+            if baru:
+                self._index = None
+
+    def names(self):
+        """Kecamatan, desa and "Desa, Kecamatan" suggestions, sorted"""
+        with self._lock:
+            return (sorted(self.kecamatan) + sorted(self.desa)
+                    + sorted(f"{d}, {k}" for d, k in self.lokasi))
+
+    def complete(self, prefix, limit=COMPLETE_LIMIT):
+        """Names matching prefix at the start of any word, shortest first"""
+        with self._lock:
+            index = self._index
+        if index is None:
+            names = self.names()
+            index = _SortedPrefix(
+                (kunci, nama) for nama in names for kunci in _kunci_prefix(nama)
+            )
+            with self._lock:
+                self._index = index
+        needle = normalisasi(prefix)
+        if not needle:
+            return []
+        hasil = sorted(set(index.lookup(needle)), key=lambda nama: (len(nama), nama))
+        return hasil[:limit]
+
+
+class _FrameLokasi:
+    """Prefix keys and per-location posting lists of one frame"""
+
+    __slots__ = ("prefix", "order", "offsets", "waktu", "newest_first")
+
+    def __init__(self, prefix, order, offsets, waktu, newest_first):
+        self.prefix = prefix
+        self.order = order
+        self.offsets = offsets
+        self.waktu = waktu
+        self.newest_first = newest_first
+
+
+class LocationIndex:
+    """Prefix index from location names to row positions, per frame"""
+
+    def __init__(self, gazetteer=None, frames=None):
+        self.gazetteer = gazetteer or Gazetteer()
+        self._lock = threading.Lock()
+        self._frames = frames if frames is not None else FrameCache()
+
+    def build(self, df):
+        """(Re)bind df: parse each distinct Lokasi once, group rows by it"""
+        return self._frames.put(df, self._index_rows(df))
+
+    def _index_rows(self, df):
+        col = df['Lokasi']
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            codes, uniques = col.cat.codes.to_numpy(), col.cat.categories
+        else:
+            codes, uniques = pd.factorize(col, use_na_sentinel=True)
+        pairs = []
+        for code, lokasi in enumerate(uniques):
+            desa, kecamatan = parse_lokasi(lokasi)
+            self.gazetteer.add(desa, kecamatan)
+            nama = ", ".join(n for n in (desa, kecamatan) if n != KOSONG)
+            for kunci in set(_kunci_prefix(nama)) | set(_kunci_prefix(lokasi)):
+                pairs.append((kunci, code))
+        # Posting list per lokasi: posisi baris diurutkan per kode (CSR)
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+        # Kode -1 (kosong) ada di depan hasil argsort; lewati
+        skip = int((codes < 0).sum())
+        waktu = df['Raw_Time'].to_numpy()
+        # Snapshot urut terbaru dulu: filter tanggal = potong tiap posting list
+        newest_first = not len(waktu) or not (
+            np.isnat(waktu[-1]) or (waktu[1:] > waktu[:-1]).any()
+        )
+        return _FrameLokasi(_SortedPrefix(pairs), order[skip:], offsets, waktu, newest_first)
+
+    def positions(self, df, query, since=None):
+        """Sorted row positions in df whose location has a word starting with
+        query (and Raw_Time >= since, if given)"""
+        needle = normalisasi(query)
+        with self._lock:
+            rows = self._frames.get(df, self._index_rows)
+        order, offsets, waktu = rows.order, rows.offsets, rows.waktu
+        codes = sorted(set(rows.prefix.lookup(needle))) if needle else None
+        newest_first = rows.newest_first
+
+        if codes is None:
+            positions = np.arange(len(df))
+        else:
+            parts = [order[offsets[c]:offsets[c + 1]] for c in codes]
+            if since is not None and newest_first:
+                # Baris < prefix = dalam rentang; posting list naik, jadi cukup searchsorted
+                prefix = len(waktu) - int(np.searchsorted(
+                    waktu[::-1], np.datetime64(since, "us"), side="left"))
+                parts = [part[:np.searchsorted(part, prefix)] for part in parts]
+                since = None
+            positions = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+        if since is not None:
+            positions = positions[waktu[positions] >= np.datetime64(since, "us")]
+        return positions
@@ -0,0 +1,386 @@
+"""
+Data pipeline untuk dashboard Mentawai Market.
+
+Konversi dokumen dari storage backend menjadi DataFrame, plus sinkronisasi
+incremental (delta sync): setelah load pertama, hanya dokumen yang lebih baru
+dari high-water mark (waktu_ambil, doc id) yang diambil lalu di-merge.
+
+Frame disimpan kolumnar & bertipe (categorical, int, datetime64). String
+tampilan (Harga "Rp ...", Waktu WIB) dibuat belakangan lewat
+with_display_columns(), hanya untuk baris yang benar-benar di-render.
+"""
+import datetime
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from storage import to_utc_naive
+
+# ============================================================================
+# 1. FORMATTING
+# ============================================================================
+def format_wib(waktu_utc):
+    """Convert UTC to WIB timezone"""
+    if waktu_utc:
+        wib = waktu_utc + datetime.timedelta(hours=7)
+        return wib.strftime("%d-%m-%Y %H:%M")
+    return "-"
+
+def format_rupiah(angka):
+    """Format number to Indonesian Rupiah format"""
+    return f"Rp {angka:,.0f}".replace(",", ".")
+
+# ============================================================================
+# 2. DOCUMENT -> DATAFRAME
+# ============================================================================
+COLUMNS = [
+    "Doc_ID", "Komoditas", "Harga_Angka", "Range_Harga", "Lokasi",
+    "Sumber", "Status", "Raw_Time"
+]
+
+CATEGORY_COLUMNS = ["Komoditas", "Range_Harga", "Lokasi", "Sumber", "Status"]
+
+# Kolom tampilan, dibuat lazily oleh with_display_columns()
+DISPLAY_COLUMNS = ["Komoditas", "Harga", "Lokasi", "Sumber", "Status", "Waktu"]
+
+WIB_OFFSET = pd.Timedelta(hours=7)
+
+def _harga_dtype(values):
+    if values.size and (values.max() > np.iinfo(np.int32).max or values.min() < np.iinfo(np.int32).min):
+        return np.int64
+    return np.int32
+
+def _category(values):
+    # Selalu kategori string, supaya union_categoricals antar frame tidak bentrok
+    return pd.Series(values, dtype=str).astype("category")
+
+def records_to_frame(docs):
+    """Convert backend records (newest first) straight into typed columns"""
+    ids, komoditas, harga, range_harga = [], [], [], []
+    lokasi, sumber, status, waktu = [], [], [], []
+    for d in docs:
+        angka = d.get('harga_angka') or 0
+        teks = d.get('range_harga')
+        ids.append(d.get('id'))
+        komoditas.append(d.get('komoditas'))
+        harga.append(int(angka))
+        # Range_Harga hanya diisi kalau tidak bisa diturunkan dari Harga_Angka
+        if teks is None:
+            range_harga.append("-")
+        elif teks == format_rupiah(angka):
+            range_harga.append(None)
+        else:
+            range_harga.append(teks)
+        lokasi.append(d.get('lokasi', '-'))
+        sumber.append(d.get('sumber'))
+        status.append(d.get('status', 'Verified'))
+        waktu.append(to_utc_naive(d.get('waktu_ambil')))
+
+    return frame_from_columns(
+        ids, komoditas, harga, range_harga, lokasi, sumber, status,
+        pd.to_datetime(pd.Series(waktu, dtype=object))
+    )
+
+def frame_from_columns(ids, komoditas, harga, range_harga, lokasi, sumber, status, waktu):
+    """Typed frame from column arrays (Range_Harga already reduced, waktu naive UTC)"""
+    harga = np.asarray(harga, dtype=np.int64)
+    return pd.DataFrame({
+        "Doc_ID": pd.Series(ids, dtype=str),
+        "Komoditas": _category(komoditas),
+        "Harga_Angka": harga.astype(_harga_dtype(harga)),
+        "Range_Harga": _category(range_harga),
+        "Lokasi": _category(lokasi),
+        "Sumber": _category(sumber),
+        "Status": _category(status),
+        "Raw_Time": pd.Series(waktu).astype("datetime64[ns]").reset_index(drop=True),
+    }, columns=COLUMNS)
+
+def concat_frames(frames):
+    """pd.concat that keeps categorical columns categorical"""
+    frames = [f for f in frames if not f.empty] or frames[:1]
+    merged = pd.concat(frames, ignore_index=True)
+    for col in CATEGORY_COLUMNS:
+        merged[col] = union_categoricals([f[col] for f in frames], ignore_order=True)
+    return merged
+
+def with_display_columns(df):
+    """Add formatted Harga & Waktu strings (call only on rows being rendered)"""
+    out = df.copy()
+    harga = df['Harga_Angka'].map(format_rupiah)
+    if 'Range_Harga' in df:
+        teks = df['Range_Harga'].astype(object)
+        harga = teks.where(teks.notna(), harga)
+    out['Harga'] = harga
+    out['Waktu'] = (df['Raw_Time'] + WIB_OFFSET).dt.strftime("%d-%m-%Y %H:%M").fillna("-")
+    return out
+
+def ticker_from_frame(df, jumlah=10):
+    """Running text items from the newest rows"""
+    return [
+        f"{row.Komoditas} ({row.Lokasi}): {row.Harga}"
+        for row in with_display_columns(df.head(jumlah)).itertuples(index=False)
+    ]
+
+def _since_prefix(df, since):
+    """Row count with Raw_Time >= since if df is newest-first, else None"""
+    waktu = df['Raw_Time'].to_numpy()
+    if len(waktu) and (np.isnat(waktu[-1]) or (waktu[1:] > waktu[:-1]).any()):
+        return None
+    # Urutan menurun: cari di array yang dibalik (menaik)
+    return len(waktu) - int(np.searchsorted(waktu[::-1], np.datetime64(since, "us"), side="left"))
+
+def _contains_mask(col, teks):
+    """Case-insensitive substring match; categorical dicocokkan per kategori, bukan per baris"""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        matched = np.asarray(col.cat.categories.str.contains(teks, case=False, regex=False), dtype=bool)
+        codes = col.cat.codes.to_numpy()
+        # Kode -1 (kosong) ke slot terakhir yang selalu False
+        return np.append(matched, False)[codes]
+    return col.str.contains(teks, case=False, na=False, regex=False).to_numpy(dtype=bool)
+
+def _komoditas_positions(df, positions, komoditas):
+    """Keep positions whose Komoditas matches, touching only those rows"""
+    if komoditas:
+        col = df['Komoditas']
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            code = col.cat.categories.get_indexer([komoditas])[0]
+            # Kode -1 = komoditas tidak ada di frame (jangan cocokkan baris kosong)
+            match = (col.cat.codes.to_numpy()[positions] == code) & (code >= 0)
+        else:
+            match = col.to_numpy()[positions] == komoditas
+        positions = positions[match]
+    return positions
+
+def filter_positions(df, since=None, komoditas=None, lokasi=None, lokasi_index=None):
+    """Row positions for the filter chain: a slice when only the date prefix
+    applies (view, tanpa copy), otherwise a sorted int array. Dengan
+    lokasi_index (lokasi.LocationIndex) lokasi dicocokkan per awal kata lewat
+    index dan filter lain hanya mengecek baris hasilnya: O(hasil), bukan O(baris)."""
+    if lokasi and lokasi_index is not None:
+        return _komoditas_positions(df, lokasi_index.positions(df, lokasi, since), komoditas)
+    rows = slice(0, len(df))
+    if since is not None:
+        # Snapshot urut terbaru dulu: filter tanggal = slice awal
+        prefix = _since_prefix(df, since)
+        if prefix is not None:
+            rows = slice(0, prefix)
+            since = None
+    if since is None and not komoditas and not lokasi:
+        return rows
+    part = df.iloc[rows]
+    mask = np.ones(len(part), dtype=bool)
+    if since is not None:
+        mask &= (part['Raw_Time'] >= since).to_numpy()
+    if komoditas:
+        mask &= (part['Komoditas'] == komoditas).to_numpy()
+    if lokasi:
+        mask &= _contains_mask(part['Lokasi'], lokasi)
+    return np.flatnonzero(mask)
+
+def filter_frame(df, since=None, komoditas=None, lokasi=None):
+    """Dashboard filter chain: waktu >= since, komoditas sama, lokasi mengandung teks"""
+    rows = filter_positions(df, since, komoditas, lokasi)
+    if isinstance(rows, slice) and rows.stop == len(df):
+        return df
+    return df.iloc[rows]
+
+def snapshot_covers(df, since, limit):
+    """True kalau snapshot newest-N pasti memuat semua baris dengan waktu >= since"""
+    return len(df) < limit or bool(df['Raw_Time'].min() < since)
+
+def high_water_mark(docs, mark=None):
+    """Latest (waktu_ambil, doc id) seen in docs, starting from mark"""
+    for d in docs:
+        waktu = to_utc_naive(d.get('waktu_ambil'))
+        if waktu is None:
+            continue
+        key = (waktu, d.get('id') or "")
+        if mark is None or key > mark:
+            mark = key
+    return mark
+
+# ============================================================================
+# 3. PAGINATION
+# ============================================================================
+# Pilihan urutan tabel -> (kolom frame, field backend, descending)
+SORT_OPTIONS = {
+    "Waktu (Terbaru)": ("Raw_Time", "waktu_ambil", True),
+    "Harga (Tertinggi)": ("Harga_Angka", "harga_angka", True),
+    "Harga (Terendah)": ("Harga_Angka", "harga_angka", False),
+}
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+def page_rows(df, sort_by, page, page_size):
+    """One page of df in sort order, via partial selection instead of a full sort"""
+    column, _, descending = SORT_OPTIONS[sort_by]
+    end = (page + 1) * page_size
+    if descending:
+        top = df.nlargest(end, column)
+    else:
+        top = df.nsmallest(end, column)
+    return top.iloc[page * page_size:end]
+
+def sorted_rows(df, sort_by):
+    """Full sort, only for exports"""
+    column, _, descending = SORT_OPTIONS[sort_by]
+    return df.sort_values(column, ascending=not descending)
+
+def export_csv(df, sort_by):
+    """CSV bytes of df in sort order, with display columns"""
+    return with_display_columns(sorted_rows(df, sort_by)).to_csv(index=False).encode('utf-8')
+
+def page_cursor(record, sort_by):
+    """Cursor (field value, doc id) after the last record of a backend page"""
+    _, field, _ = SORT_OPTIONS[sort_by]
+    return (record.get(field), record["id"])
+
+# ============================================================================
+# 4. INCREMENTAL DELTA SYNC
+# ============================================================================
+# Interval full reload untuk backend tanpa listener (opt-in, lihat MarketDataSync)
+RESYNC_INTERVAL = 3600
+
+class MarketDataSync:
+    """Cached market frame, refreshed with delta queries after the first load
+
+    Setelah TTL habis get() tetap mengembalikan frame lama dan menjalankan
+    satu delta sync di background (stale-while-revalidate); hanya load
+    pertama dan full reload yang ditunggu, dan session lain yang datang
+    bersamaan menunggu load yang sama (lock), bukan query ulang.
+
+    Full reload hanya saat diminta: get(full_reload=True), request_resync()
+    (purge dari proses ini), atau - kalau resync_interval diisi - setiap
+    `resync_interval` detik. Opsi terakhir ada karena high-water mark hanya
+    maju, jadi delta sync tidak pernah melihat record yang dihapus writer
+    lain (purge dari proses lain, hapus langsung di console).
+    """
+
+    def __init__(self, repo, limit=1000, ttl=300, resync_interval=None):
+        self.repo = repo
+        self.limit = limit
+        self.ttl = ttl
+        self.resync_interval = resync_interval
+        self._lock = threading.Lock()
+        # Lock terpisah untuk flag refresh: _lock dipegang selama query
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self.frame = records_to_frame([])
+        # mark tetap None selama koleksi kosong; load pertama ditandai loaded
+        self.loaded = False
+        self.mark = None
+        self.last_sync = None
+        self.last_full_sync = None
+        self.last_error = None
+
+    def invalidate(self):
+        """Force a delta fetch on the next get()"""
+        self.last_sync = None
+
+    def seed(self, frame, mark, saved_at=None):
+        """Start from a saved frame; the first get() serves it and catches up in background
+
+        Umur snapshot dihitung sejak full sync: snapshot yang lebih tua dari
+        resync_interval di-catch-up dengan full reload, bukan delta.
+        """
+        age = 0.0
+        if saved_at is not None:
+            age = max(0.0, (datetime.datetime.now(datetime.timezone.utc) - saved_at).total_seconds())
+        with self._lock:
+            self.frame = frame
+            self.mark = mark
+            self.loaded = True
+            self.last_sync = None
+            self.last_full_sync = time.monotonic() - age
+
+    def request_resync(self):
+        """Make the next background refresh a full reload (e.g. after a purge)"""
+        self.last_full_sync = None
+        self.last_sync = None
+
+    def get(self, full_reload=False):
+        """Return the cached frame; expired frames are served while a delta sync runs"""
+        if full_reload:
+            with self._lock:
+                self._full_reload()
+                return self.frame
+        if not self.loaded:
+            with self._lock:
+                # Session yang menunggu lock memakai hasil load session pertama
+                if not self.loaded:
+                    self._full_reload()
+                return self.frame
+
+        expired = self.last_sync is None or time.monotonic() - self.last_sync >= self.ttl
+        if expired:
+            with self._refresh_lock:
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                threading.Thread(target=self._refresh, name="market-delta-sync", daemon=True).start()
+        return self.frame
+
+    def _resync_due(self):
+        if self.last_full_sync is None:
+            return True
+        return (self.resync_interval is not None
+                and time.monotonic() - self.last_full_sync >= self.resync_interval)
+
+    def _refresh(self):
+        try:
+            with self._lock:
+                if self._resync_due():
+                    self._full_reload()
+                else:
+                    self._apply_delta()
+            self.last_error = None
+        except Exception as e:
+            # Frame lama tetap dipakai, coba lagi di get() berikutnya
+            self.last_error = e
+        finally:
+            with self._refresh_lock:
+                self._refreshing = False
+
+    def apply_records(self, records):
+        """Merge just-written records into the frame without a query
+
+        High-water mark tidak digeser: delta sync berikutnya tetap mengambil
+        record proses lain yang waktunya lebih lama, duplikat dibuang per Doc_ID.
+        """
+        docs = [r for r in records if r.get("id")]
+        if not docs:
+            return
+        with self._lock:
+            self._merge(docs)
+
+    def _full_reload(self):
+        docs = self.repo.fetch_latest(self.limit)
+        self.frame = records_to_frame(docs)
+        self.mark = high_water_mark(docs)
+        self.loaded = True
+        self.last_sync = self.last_full_sync = time.monotonic()
+
+    def _merge(self, docs):
+        new_rows = records_to_frame(docs)
+        merged = concat_frames([new_rows, self.frame])
+        merged = merged.drop_duplicates("Doc_ID", keep="first")
+        merged = merged.sort_values(
+            ["Raw_Time", "Doc_ID"], ascending=False, na_position="last"
+        )
+        self.frame = merged.head(self.limit).reset_index(drop=True)
+
+    def _apply_delta(self):
+        if self.mark is None:
+            # Belum ada record ber-waktu_ambil: belum ada titik awal delta
+            self._full_reload()
+            return
+        waktu, doc_id = self.mark
+        docs = self.repo.fetch_since(waktu, doc_id)
+        if docs:
+            # fetch_since urut terlama dulu, frame urut terbaru dulu
+            self._merge(list(reversed(docs)))
+            self.mark = high_water_mark(docs, self.mark)
+        self.last_sync = time.monotonic()
@@ -0,0 +1,223 @@
+"""
+Instrumentasi ringan (per proses) untuk hot path dashboard & storage.
+
+span("nama") mengukur durasi satu blok kode (perf_counter) ke
+MetricsRegistry. Per nama span disimpan count, total, max, nilai terakhir
+dan sampel terbaru (ring buffer SAMPLE_SIZE) untuk p50/p95. Counter
+mencatat jumlah kejadian, mis. dokumen Firestore yang dibaca per operasi
+(label op=...). Gauge berupa fungsi yang baru dibaca saat export, mis.
+stats() dari QueryCache / FilterCache.
+
+Registry satu per proses (REGISTRY) dan dipakai bersama semua session.
+Selain agregat, begin_trace()/end_trace() mengumpulkan durasi span per rerun
+di thread script Streamlit, supaya ADMIN PANEL bisa menampilkan rincian
+rerun terakhir. Export: to_json() dan to_prometheus() (format teks).
+"""
+import json
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Sampel terbaru per span untuk p50/p95
+SAMPLE_SIZE = 1024
+QUANTILES = (0.5, 0.95)
+
+PROMETHEUS_PREFIX = "mentawai_"
+
+RERUN_SPAN = "app.rerun"
+
+
+def _metric_name(name):
+    """'firestore.doc_reads' -> 'firestore_doc_reads' (Prometheus-safe)"""
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (
+        str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        for _, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+class _Timer:
+    __slots__ = ("count", "total", "max", "last", "samples")
+
+    def __init__(self, size):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+        self.samples.append(seconds)
+
+
+class MetricsRegistry:
+    """Process-wide span timings (p50/p95), counters and gauges"""
+
+    def __init__(self, sample_size=SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        # (nama, labels) -> _Timer / jumlah
+        self._timers = {}
+        self._counters = {}
+        # nama -> fungsi tanpa argumen yang mengembalikan {stat: angka}
+        self._gauges = {}
+        self._local = threading.local()
+        self.started_at = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration (seconds) for span name"""
+        key = self._key(name, labels)
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers[key] = _Timer(self.sample_size)
+            timer.add(seconds)
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace[name] = trace.get(name, 0.0) + seconds
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the with-block (also when it raises, e.g. st.stop)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def inc(self, name, n=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def gauge(self, name, fn):
+        """Register (or replace) a stats callable read at export time"""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def begin_trace(self):
+        """Start collecting this thread's span durations (one Streamlit rerun)"""
+        self._local.trace = {}
+        self._local.trace_start = time.perf_counter()
+
+    def end_trace(self):
+        """Stop collecting; {span: seconds} for this rerun, including RERUN_SPAN"""
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            return {}
+        self._local.trace = None
+        elapsed = time.perf_counter() - self._local.trace_start
+        self.observe(RERUN_SPAN, elapsed)
+        trace[RERUN_SPAN] = elapsed
+        return trace
+
+    def timings(self):
+        """One dict per span: count, total, mean, p50, p95, max, last (seconds)"""
+        with self._lock:
+            items = [(key, timer, list(timer.samples)) for key, timer in self._timers.items()]
+        rows = []
+        for (name, labels), timer, samples in sorted(items, key=lambda item: item[0]):
+            quantiles = np.quantile(samples, QUANTILES) if samples else [None] * len(QUANTILES)
+            rows.append({
+                "name": name,
+                "labels": dict(labels),
+                "count": timer.count,
+                "total": timer.total,
+                "mean": timer.total / timer.count if timer.count else None,
+                "p50": float(quantiles[0]) if samples else None,
+                "p95": float(quantiles[1]) if samples else None,
+                "max": timer.max,
+                "last": timer.last,
+            })
+        return rows
+
+    def counters(self):
+        with self._lock:
+            items = sorted(self._counters.items())
+        return [{"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in items]
+
+    def gauges(self):
+        """Current gauge values; non-numeric stats (None) and failing callables skipped"""
+        with self._lock:
+            items = sorted(self._gauges.items())
+        rows = []
+        for name, fn in items:
+            try:
+                stats = fn()
+            except Exception:
+                continue
+            for stat, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    rows.append({"name": f"{name}.{stat}", "value": value})
+        return rows
+
+    def to_dict(self):
+        return {
+            "started_at": self.started_at,
+            "exported_at": time.time(),
+            "spans": self.timings(),
+            "counters": self.counters(),
+            "gauges": self.gauges(),
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """Prometheus text exposition: spans as one summary, counters, gauges"""
+        lines = []
+        spans = self.timings()
+        if spans:
+            metric = f"{prefix}span_seconds"
+            lines.append(f"# HELP {metric} Durasi span hot path (p50/p95 dari sampel terbaru)")
+            lines.append(f"# TYPE {metric} summary")
+            for row in spans:
+                labels = (("span", row["name"]),) + tuple(sorted(row["labels"].items()))
+                for q in QUANTILES:
+                    value = row[f"p{round(q * 100)}"]
+                    if value is not None:
+                        lines.append(f"{metric}{_label_text(labels + (('quantile', q),))} {value!r}")
+                lines.append(f"{metric}_sum{_label_text(labels)} {row['total']!r}")
+                lines.append(f"{metric}_count{_label_text(labels)} {row['count']}")
+        seen = set()
+        for row in self.counters():
+            metric = f"{prefix}{_metric_name(row['name'])}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_label_text(tuple(sorted(row['labels'].items())))} {row['value']}")
+        for row in self.gauges():
+            metric = f"{prefix}{_metric_name(row['name'])}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {row['value']!r}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop recorded spans and counters (gauges stay registered)"""
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+
+REGISTRY = MetricsRegistry()
+span = REGISTRY.span
+inc = REGISTRY.inc
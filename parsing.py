@@ -0,0 +1,248 @@
+"""
+Parsing halaman berita untuk scraper.py.
+
+Tiap sumber punya selector sendiri: "selector" untuk judul dan (opsional)
+"snippet" untuk ringkasan artikel, dipasangkan berdasarkan urutan. Selector
+sederhana (tag, .class, #id, gabungannya seperti "h3.entry-title") diproses
+oleh StrainParser: HTMLParser stdlib yang tidak membangun tree, hanya
+menyimpan teks elemen target dan berhenti begitu limit tercapai. Selector
+lain (descendant, atribut, ...) jatuh ke BeautifulSoup.select, pakai lxml
+kalau terpasang (html.parser kalau tidak).
+
+Nominal Rupiah di judul/ringkasan diubah jadi harga_angka (parse_rupiah).
+parse_pages() memindahkan parsing ke process pool kalau halamannya banyak.
+"""
+import asyncio
+import concurrent.futures
+import os
+import re
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    BS4_FEATURES = "lxml"
+except ImportError:
+    BS4_FEATURES = "html.parser"
+
+DEFAULT_LIMIT = 5
+
+# Di bawah ini parsing inline lebih murah daripada overhead kirim ke proses lain
+POOL_MIN_PAGES = 4
+POOL_MIN_BYTES = 512 * 1024
+POOL_WORKERS = min(4, os.cpu_count() or 1)
+
+_SIMPLE_SELECTOR = re.compile(r"^([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)$")
+
+# ============================================================================
+# 1. RUPIAH
+# ============================================================================
+_RUPIAH = re.compile(
+    r"\bRp\.?\s*(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d+))?(?:,-)?\s*(ribu|rb|juta|jt)?\b",
+    re.IGNORECASE,
+)
+
+_PENGALI = {"ribu": 1_000, "rb": 1_000, "juta": 1_000_000, "jt": 1_000_000}
+
+
+def parse_rupiah_all(teks):
+    """Semua nominal Rupiah di teks sebagai int ("Rp 15.000", "Rp1,2 juta", ...)"""
+    hasil = []
+    for bulat, desimal, satuan in _RUPIAH.findall(teks or ""):
+        angka = float(f"{bulat.replace('.', '')}.{desimal or 0}")
+        angka *= _PENGALI.get(satuan.lower(), 1)
+        hasil.append(int(round(angka)))
+    return hasil
+
+
+def parse_rupiah(teks):
+    """Nominal pertama di teks; rentang "Rp a - Rp b" jadi nilai tengahnya"""
+    angka = parse_rupiah_all(teks)
+    if not angka:
+        return None
+    if len(angka) >= 2 and re.search(r"Rp[^-–]*[-–]\s*Rp", teks, re.IGNORECASE):
+        return (angka[0] + angka[1]) // 2
+    return angka[0]
+
+# ============================================================================
+# 2. SELECTOR & STRAIN PARSER
+# ============================================================================
+def parse_selector(selector):
+    """Simple selector -> (tag, classes, id), or None if it needs full CSS"""
+    match = _SIMPLE_SELECTOR.match(selector.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    classes = frozenset(re.findall(r"\.([\w-]+)", match.group(2)))
+    ids = re.findall(r"#([\w-]+)", match.group(2))
+    return (match.group(1) or "").lower() or None, classes, ids[0] if ids else None
+
+
+def source_selectors(source):
+    """{"judul": selector, "snippet": selector} dari config sumber"""
+    selectors = {}
+    if source.get("selector"):
+        selectors["judul"] = source["selector"]
+    else:
+        # Format lama: "tag" + "class"
+        tag = source.get("tag", "h3")
+        selectors["judul"] = tag + "".join(f".{c}" for c in (source.get("class") or "").split())
+    if source.get("snippet"):
+        selectors["snippet"] = source["snippet"]
+    return selectors
+
+
+class _Done(Exception):
+    pass
+
+
+class StrainParser(HTMLParser):
+    """Collect text of elements matching simple selectors, no tree kept"""
+
+    def __init__(self, selectors, limit=DEFAULT_LIMIT):
+        super().__init__(convert_charrefs=True)
+        self.selectors = {name: parse_selector(sel) for name, sel in selectors.items()}
+        self.limit = limit
+        self.found = {name: [] for name in selectors}
+        # Elemen yang sedang dibaca: [nama, tag, kedalaman tag yang sama, potongan teks]
+        self._open = []
+
+    def _matches(self, tag, attrs, selector):
+        want_tag, classes, want_id = selector
+        if want_tag and tag != want_tag:
+            return False
+        attrs = dict(attrs)
+        if want_id and attrs.get("id") != want_id:
+            return False
+        return classes <= set((attrs.get("class") or "").split())
+
+    def handle_starttag(self, tag, attrs):
+        for item in self._open:
+            if item[1] == tag:
+                item[2] += 1
+        for name, selector in self.selectors.items():
+            if len(self.found[name]) < self.limit and self._matches(tag, attrs, selector) \
+                    and not any(item[0] == name for item in self._open):
+                self._open.append([name, tag, 1, []])
+
+    def handle_endtag(self, tag):
+        for item in list(self._open):
+            if item[1] != tag:
+                continue
+            item[2] -= 1
+            if item[2] == 0:
+                self._open.remove(item)
+                self.found[item[0]].append(" ".join("".join(item[3]).split()))
+        if not self._open and all(len(v) >= self.limit for v in self.found.values()):
+            raise _Done
+
+    def handle_data(self, data):
+        for item in self._open:
+            item[3].append(data)
+
+    def extract(self, html):
+        try:
+            self.feed(html)
+            self.close()
+        except _Done:
+            pass
+        return self.found
+
+
+def _decode(body):
+    if isinstance(body, bytes):
+        return body.decode("utf-8", errors="replace")
+    return body
+
+
+def _extract_bs4(html, selectors, limit):
+    # Selector kompleks: tetap parse seluruh halaman, tapi lewat parser tercepat
+    soup = BeautifulSoup(html, BS4_FEATURES)
+    return {
+        name: [" ".join(el.get_text().split()) for el in soup.select(selector, limit=limit)]
+        for name, selector in selectors.items()
+    }
+
+
+def extract(body, selectors, limit=DEFAULT_LIMIT):
+    """{nama: [teks elemen]} untuk tiap selector, maks `limit` per selector"""
+    html = _decode(body)
+    if all(parse_selector(sel) for sel in selectors.values()):
+        return StrainParser(selectors, limit).extract(html)
+    return _extract_bs4(html, selectors, limit)
+
+
+def extract_strained(body, selectors, limit=DEFAULT_LIMIT):
+    """Same result via BeautifulSoup + SoupStrainer (hanya elemen target yang disimpan)"""
+    html = _decode(body)
+    found = {}
+    for name, selector in selectors.items():
+        tag, classes, elem_id = parse_selector(selector)
+        attrs = {}
+        if classes:
+            attrs["class"] = lambda c, classes=classes: c is not None and classes <= set(c.split())
+        if elem_id:
+            attrs["id"] = elem_id
+        strainer = SoupStrainer(tag or True, attrs=attrs)
+        soup = BeautifulSoup(html, BS4_FEATURES, parse_only=strainer)
+        found[name] = [" ".join(el.get_text().split()) for el in soup.find_all(True, recursive=False)][:limit]
+    return found
+
+# ============================================================================
+# 3. HALAMAN -> ITEM
+# ============================================================================
+def parse_page(source, body):
+    """List of {"judul", "snippet", "harga_angka"} dari satu halaman sumber"""
+    found = extract(body, source_selectors(source), source.get("limit", DEFAULT_LIMIT))
+    snippets = found.get("snippet", [])
+    items = []
+    for i, judul in enumerate(found["judul"]):
+        snippet = snippets[i] if i < len(snippets) else None
+        harga = parse_rupiah(judul)
+        if harga is None and snippet:
+            harga = parse_rupiah(snippet)
+        items.append({"judul": judul, "snippet": snippet, "harga_angka": harga})
+    return items
+
+
+def _parse_job(job):
+    return parse_page(*job)
+
+
+_pool = None
+_pool_workers = 0
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = concurrent.futures.ProcessPoolExecutor(workers)
+        _pool_workers = workers
+    return _pool
+
+
+def parse_pages(jobs, workers=None):
+    """parse_page untuk list of (source, body); pakai process pool kalau halamannya banyak"""
+    jobs = list(jobs)
+    total = sum(len(body or b"") for _, body in jobs)
+    workers = POOL_WORKERS if workers is None else workers
+    if workers <= 1 or len(jobs) < POOL_MIN_PAGES or total < POOL_MIN_BYTES:
+        return [parse_page(source, body) for source, body in jobs]
+    return list(_get_pool(workers).map(_parse_job, jobs))
+
+
+async def parse_page_async(source, body, workers=None):
+    """parse_page tanpa memblok event loop (process pool untuk halaman besar)"""
+    loop = asyncio.get_running_loop()
+    workers = POOL_WORKERS if workers is None else workers
+    if workers > 1 and len(body or b"") >= POOL_MIN_BYTES // POOL_MIN_PAGES:
+        return await loop.run_in_executor(_get_pool(workers), parse_page, source, body)
+    return await loop.run_in_executor(None, parse_page, source, body)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
@@ -0,0 +1,258 @@
+"""
+Purge engine untuk "Bersihkan Data Lama", "Arsipkan Data Lama" dan "Hapus Semua".
+
+Key record diambil keys-only per batch (purge_key_batches), lalu batch delete
+di-commit paralel lewat thread pool dengan jumlah batch in-flight terbatas.
+Job jalan di background thread; admin panel cukup membaca progress().
+
+Checkpoint (mode, cutoff, jumlah terhapus) disimpan ke file JSON selama job
+berjalan. Query purge idempotent (record yang sudah terhapus tidak muncul
+lagi), jadi melanjutkan job = menjalankan ulang query dengan cutoff yang sama.
+
+Mode "archive" sama dengan "old", tapi key berasal dari archive_batches():
+record ditulis ke Parquet dulu (archive.py), baru dihapus.
+
+on_change dipanggil (dari thread job) sebelum penghapusan pertama dan setelah
+job berhenti, supaya cache di luar backend (snapshot di disk, delta sync)
+tidak menampilkan lagi record yang sudah terhapus.
+"""
+import concurrent.futures
+import datetime
+import json
+import os
+import threading
+import time
+
+from archive import ARCHIVE_DIR, archive_batches
+from storage import BATCH_LIMIT, to_utc_naive
+
+PURGE_STATE_PATH = os.environ.get("MARKET_PURGE_STATE", "purge_state.json")
+
+MAX_WORKERS = 8
+
+# Pass ulang sampai query tidak menemukan apa-apa (record baru saat "Hapus Semua")
+MAX_PASSES = 5
+
+CHECKPOINT_INTERVAL = 2.0
+
+# Aturan 500/50/5 Firestore: mulai 500 op/detik, naik 50% tiap 5 menit
+RAMP_START = 500
+RAMP_FACTOR = 1.5
+RAMP_INTERVAL = 300
+
+
+def load_checkpoint(path=PURGE_STATE_PATH):
+    """Checkpoint job yang belum selesai, atau None"""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("cutoff"):
+        state["cutoff"] = datetime.datetime.fromisoformat(state["cutoff"])
+    return state
+
+
+class PurgeJob:
+    """One background purge: mode 'old' / 'archive' (waktu_ambil < cutoff) or 'all'"""
+
+    def __init__(self, repo, mode, cutoff=None, deleted=0, state_path=PURGE_STATE_PATH,
+                 max_workers=MAX_WORKERS, batch_size=BATCH_LIMIT, ramp_up=False,
+                 archive_root=ARCHIVE_DIR, on_change=None):
+        if mode not in ("old", "archive", "all"):
+            raise ValueError(f"Mode purge tidak dikenal: {mode}")
+        self.repo = repo
+        self.mode = mode
+        self.cutoff = to_utc_naive(cutoff) if mode != "all" else None
+        self.archive_root = archive_root
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.ramp_up = ramp_up
+        self.on_change = on_change
+
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+        self.state = "pending"
+        self.error = None
+        self.total = None
+        # deleted termasuk hasil run sebelumnya kalau job ini melanjutkan checkpoint
+        self.deleted = deleted
+        self._run_deleted = 0
+        self._started = None
+        self._finished = None
+        self._last_checkpoint = 0.0
+        self.reported = False
+
+    @property
+    def running(self):
+        return self.state in ("pending", "running")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="market-purge", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Stop after the in-flight batches (checkpoint is kept for resume)"""
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def progress(self):
+        """Snapshot of state, counts and docs/sec for the admin panel"""
+        with self._lock:
+            end = self._finished or time.monotonic()
+            elapsed = end - self._started if self._started else 0.0
+            return {
+                "mode": self.mode,
+                "state": self.state,
+                "deleted": self.deleted,
+                "total": self.total,
+                "elapsed": elapsed,
+                "rate": self._run_deleted / elapsed if elapsed > 0 else 0.0,
+                "error": self.error,
+            }
+
+    def _run(self):
+        with self._lock:
+            self.state = "running"
+            self._started = time.monotonic()
+        self._save_checkpoint()
+        try:
+            self._notify_change()
+            remaining = self.repo.count_records(self.cutoff)
+            with self._lock:
+                self.total = self.deleted + remaining
+
+            submitted = 0
+            with concurrent.futures.ThreadPoolExecutor(self.max_workers) as pool:
+                for _ in range(MAX_PASSES):
+                    found, submitted = self._run_pass(pool, submitted)
+                    if not found or self._cancel.is_set():
+                        break
+
+            if self._cancel.is_set():
+                state = "cancelled"
+            else:
+                if self.mode == "all":
+                    self.repo.clear_rollups()
+                self._clear_checkpoint()
+                state = "done"
+        except Exception as e:
+            self._save_checkpoint()
+            with self._lock:
+                self.error = str(e)
+            state = "failed"
+
+        self._notify_change()
+        with self._lock:
+            self.state = state
+            self._finished = time.monotonic()
+        if state == "cancelled":
+            self._save_checkpoint()
+
+    def _notify_change(self):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change()
+        except Exception:
+            # Gagal invalidasi cache tidak boleh menggagalkan purge
+            pass
+
+    def _run_pass(self, pool, submitted):
+        found = 0
+        in_flight = set()
+        try:
+            for keys in self._key_batches():
+                if self._cancel.is_set():
+                    break
+                self._throttle(submitted + len(keys))
+                in_flight.add(pool.submit(self.repo.delete_keys, keys))
+                found += len(keys)
+                submitted += len(keys)
+                # Batasi batch in-flight supaya key tidak menumpuk di memori
+                if len(in_flight) >= self.max_workers * 2:
+                    done, in_flight = concurrent.futures.wait(
+                        in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    self._collect(done)
+        finally:
+            done, _ = concurrent.futures.wait(in_flight)
+            self._collect(done)
+        return found, submitted
+
+    def _key_batches(self):
+        if self.mode == "archive":
+            return archive_batches(self.repo, self.cutoff, self.archive_root, self.batch_size)
+        return self.repo.purge_key_batches(self.cutoff, self.batch_size)
+
+    def _collect(self, futures):
+        for future in futures:
+            count = future.result()
+            with self._lock:
+                self.deleted += count
+                self._run_deleted += count
+        if time.monotonic() - self._last_checkpoint >= CHECKPOINT_INTERVAL:
+            self._save_checkpoint()
+
+    def _throttle(self, submitted):
+        if not self.ramp_up:
+            return
+        elapsed = time.monotonic() - self._started
+        rate = RAMP_START * RAMP_FACTOR ** (elapsed // RAMP_INTERVAL)
+        ahead = submitted / rate - elapsed
+        if ahead > 0:
+            self._cancel.wait(ahead)
+
+    def _save_checkpoint(self):
+        self._last_checkpoint = time.monotonic()
+        state = {
+            "mode": self.mode,
+            "cutoff": self.cutoff.isoformat() if self.cutoff else None,
+            "deleted": self.deleted,
+        }
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _clear_checkpoint(self):
+        try:
+            os.remove(self.state_path)
+        except FileNotFoundError:
+            pass
+
+
+class PurgeManager:
+    """At most one purge job per process, resumable from its checkpoint"""
+
+    def __init__(self, repo, state_path=PURGE_STATE_PATH, **job_options):
+        self.repo = repo
+        self.state_path = state_path
+        self.job_options = job_options
+        self.job = None
+
+    def start(self, mode, cutoff=None, deleted=0):
+        if self.job is not None and self.job.running:
+            raise RuntimeError("Purge lain masih berjalan")
+        self.job = PurgeJob(
+            self.repo, mode, cutoff, deleted, state_path=self.state_path, **self.job_options
+        ).start()
+        return self.job
+
+    def pending_checkpoint(self):
+        """Checkpoint of an interrupted job, if no job is running"""
+        if self.job is not None and self.job.running:
+            return None
+        return load_checkpoint(self.state_path)
+
+    def resume(self):
+        state = self.pending_checkpoint()
+        if state is None:
+            return None
+        return self.start(state["mode"], state.get("cutoff"), state.get("deleted", 0))
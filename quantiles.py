@@ -0,0 +1,88 @@
+"""
+Sketch kuantil harga yang bisa digabung (mergeable), untuk median & p10/p90.
+
+Median tidak bisa dihitung dari count/sum/min/max, jadi setiap rollup harian
+juga membawa sketch: histogram bin logaritmik ala DDSketch. Harga v masuk
+bin ceil(log_gamma(v)) dengan gamma = (1 + a) / (1 - a); kuantil yang
+dikembalikan dijamin dalam galat relatif `a` (default 1%) dari nilai
+sebenarnya.
+
+Berbeda dengan t-digest/KLL, dua sketch digabung cukup dengan menjumlahkan
+count per bin. Karena itu update-nya bisa memakai operasi atomic yang sudah
+dipakai rollup: Increment per field di Firestore, upsert "count + excluded"
+di SQLite, dan penjumlahan dict di memory. Ukuran sketch terbatas oleh
+rentang harga (Rp 1 - Rp 10 juta < 820 bin), bukan oleh jumlah data.
+
+Sketch disimpan sebagai dict {bin: count} dengan key string (nama field
+Firestore / key JSON); harga <= 0 masuk bin ZERO_BIN.
+"""
+import math
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+ZERO_BIN = "z"
+
+# Kuantil yang ditampilkan di dashboard
+BAND_QUANTILES = (0.1, 0.5, 0.9)
+
+
+def bin_key(value):
+    """Sketch bin (string key) for one price"""
+    if value <= 0:
+        return ZERO_BIN
+    return str(math.ceil(math.log(value) / _LOG_GAMMA))
+
+
+def bin_value(key):
+    """Representative price of a bin (within RELATIVE_ACCURACY of every value in it)"""
+    if key == ZERO_BIN:
+        return 0.0
+    return 2 * GAMMA ** int(key) / (GAMMA + 1)
+
+
+def _order(key):
+    return -math.inf if key == ZERO_BIN else int(key)
+
+
+def sketch_add(sketch, value, n=1):
+    """Add n occurrences of value to sketch (in-place), return sketch"""
+    key = bin_key(value)
+    sketch[key] = sketch.get(key, 0) + n
+    return sketch
+
+
+def sketch_merge(sketch, other):
+    """Add other's bin counts to sketch (in-place), return sketch"""
+    for key, count in other.items():
+        sketch[key] = sketch.get(key, 0) + count
+    return sketch
+
+
+def merge_sketches(sketches):
+    """One sketch from many (None / empty ones skipped)"""
+    merged = {}
+    for sketch in sketches:
+        if sketch:
+            sketch_merge(merged, sketch)
+    return merged
+
+
+def sketch_quantiles(sketch, qs=BAND_QUANTILES):
+    """Values for quantiles qs (0..1), or None for each if the sketch is empty"""
+    bins = sorted((_order(key), key, count) for key, count in sketch.items() if count > 0)
+    total = sum(count for _, _, count in bins)
+    if not total:
+        return [None] * len(qs)
+    results = []
+    for q in qs:
+        # Rank 0-based seperti DDSketch: bin pertama yang kumulatifnya > q * (n - 1)
+        rank = q * (total - 1)
+        seen = 0
+        for _, key, count in bins:
+            seen += count
+            if seen > rank:
+                results.append(bin_value(key))
+                break
+    return results
@@ -0,0 +1,148 @@
+"""
+Cache query bersama (per proses) untuk app.py, pengganti st.cache_data.
+
+- Single-flight: kalau banyak session minta key yang sama saat belum ada di
+  cache, hanya satu yang menjalankan loader; sisanya menunggu hasil yang sama.
+- Stale-while-revalidate: setelah TTL habis, nilai lama masih dikembalikan
+  selama jendela `stale`, sementara satu thread background memuat ulang.
+- Invalidasi terarah: invalidate(match) hanya membuang key yang cocok
+  (key persis, atau predicate), dan update(match, fn) mengubah nilai yang
+  di-cache di tempat (mis. menempelkan record yang baru ditulis).
+
+Key berupa tuple dengan elemen pertama = jenis query, mis.
+("filtered", komoditas, hari). Loader yang sedang berjalan saat key-nya
+di-invalidate dilepas dari in-flight: hasilnya tidak disimpan (sudah basi
+sejak awal) dan get() berikutnya memulai load baru. Hasil hanya disimpan oleh
+loader yang future-nya masih terdaftar, jadi tidak ada state per key yang
+tertinggal setelah invalidasi.
+"""
+import concurrent.futures
+import threading
+import time
+
+DEFAULT_TTL = 60.0
+DEFAULT_STALE = 300.0
+MAX_ENTRIES = 256
+
+
+class _Entry:
+    __slots__ = ("value", "loaded_at")
+
+    def __init__(self, value, loaded_at):
+        self.value = value
+        self.loaded_at = loaded_at
+
+
+class QueryCache:
+    """Process-wide keyed cache with single-flight loads and SWR refresh"""
+
+    def __init__(self, ttl=DEFAULT_TTL, stale=DEFAULT_STALE, max_entries=MAX_ENTRIES,
+                 clock=time.monotonic):
+        self.ttl = ttl
+        self.stale = stale
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        # key -> Future loader yang sedang berjalan (dilepas saat di-invalidate)
+        self._inflight = {}
+        self.counters = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "joined": 0,
+            "refreshes": 0, "invalidated": 0, "errors": 0,
+        }
+
+    def _matching(self, match, keys):
+        if match is None:
+            return list(keys)
+        if callable(match):
+            return [key for key in keys if match(key)]
+        return [match] if match in keys else []
+
+    def _store(self, key, future, value):
+        with self._lock:
+            if self._inflight.get(key) is not future:
+                # Di-invalidate selama load: hasil basi, jangan disimpan
+                return
+            del self._inflight[key]
+            self._entries[key] = _Entry(value, self.clock())
+            if len(self._entries) > self.max_entries:
+                # Buang entry tertua (loaded_at paling kecil)
+                oldest = min(self._entries, key=lambda k: self._entries[k].loaded_at)
+                del self._entries[oldest]
+
+    def _load(self, key, loader, future):
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self.counters["errors"] += 1
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            return
+        self._store(key, future, value)
+        future.set_result(value)
+
+    def get(self, key, loader, ttl=None, stale=None):
+        """Cached value for key, calling loader() at most once concurrently"""
+        ttl = self.ttl if ttl is None else ttl
+        stale = self.stale if stale is None else stale
+        with self._lock:
+            entry = self._entries.get(key)
+            age = self.clock() - entry.loaded_at if entry is not None else None
+            if entry is not None and age < ttl:
+                self.counters["hits"] += 1
+                return entry.value
+
+            future = self._inflight.get(key)
+            if entry is not None and age < ttl + stale:
+                # Stale: langsung kembalikan nilai lama, refresh di background (sekali saja)
+                self.counters["stale_hits"] += 1
+                if future is None:
+                    self.counters["refreshes"] += 1
+                    future = concurrent.futures.Future()
+                    self._inflight[key] = future
+                    threading.Thread(
+                        target=self._load, args=(key, loader, future),
+                        name=f"query-refresh-{key[0] if isinstance(key, tuple) else key}",
+                        daemon=True,
+                    ).start()
+                return entry.value
+
+            if future is not None:
+                self.counters["joined"] += 1
+                owner = False
+            else:
+                self.counters["misses"] += 1
+                future = concurrent.futures.Future()
+                self._inflight[key] = future
+                owner = True
+
+        if owner:
+            self._load(key, loader, future)
+        return future.result()
+
+    def invalidate(self, match=None):
+        """Drop cached keys (all, one key, or keys where match(key) is true)"""
+        with self._lock:
+            dropped = self._matching(match, self._entries)
+            # Load yang sedang jalan tetap selesai untuk penunggunya, tapi tidak disimpan
+            for key in self._matching(match, list(self._inflight)):
+                del self._inflight[key]
+            for key in dropped:
+                del self._entries[key]
+            self.counters["invalidated"] += len(dropped)
+        return len(dropped)
+
+    def update(self, match, fn):
+        """Replace cached values in place: value = fn(key, value) for matching keys"""
+        with self._lock:
+            keys = self._matching(match, self._entries)
+            entries = [(key, self._entries[key]) for key in keys]
+        for key, entry in entries:
+            entry.value = fn(key, entry.value)
+        return len(entries)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries), inflight=len(self._inflight))
@@ -0,0 +1,146 @@
+"""
+Rollup harian harga per (komoditas, kecamatan, hari WIB).
+
+Setiap rollup menyimpan count, sum, min dan max harga_angka, plus sketch
+kuantil (lihat quantiles.py) untuk median & p10/p90, di-update oleh storage
+backend pada saat menulis (input form, seed, scraper). Statistik dashboard
+untuk rentang tanggal berapa pun cukup dihitung dari rollup: O(hari x seri),
+bukan O(baris).
+
+Menulis ulang id yang sudah ada mengurangi kontribusi record lama (count,
+sum, sketch) sebelum menambah yang baru; min/max hanya bisa melebar. Purge
+data lama sengaja tidak mengurangi rollup (histori harga tetap ada), jadi
+jumlah record yang masih tersimpan diambil dari count_records() backend.
+"""
+import datetime
+import math
+import numbers
+
+import pandas as pd
+
+from lokasi import parse_lokasi
+from quantiles import BAND_QUANTILES, merge_sketches, sketch_add, sketch_merge, sketch_quantiles
+
+ROLLUP_COLLECTION = "harga_rollup_harian"
+
+ROLLUP_COLUMNS = ["komoditas", "kecamatan", "hari", "count", "sum", "min", "max", "sketch"]
+
+WIB_OFFSET = datetime.timedelta(hours=7)
+
+
+def kecamatan_dari_lokasi(lokasi):
+    """'Dusun, Kecamatan' -> 'Kecamatan' (ejaan dinormalisasi, '-' kalau tidak ada)"""
+    return parse_lokasi(lokasi)[1]
+
+
+def hari_wib(waktu):
+    """Tanggal WIB (ISO string) dari waktu UTC"""
+    if waktu.tzinfo is not None:
+        waktu = waktu.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (waktu + WIB_OFFSET).date().isoformat()
+
+
+def rollup_key(record):
+    """(komoditas, kecamatan, hari) atau None kalau record tidak punya harga"""
+    harga = record.get("harga_angka")
+    waktu = record.get("waktu_ambil")
+    if waktu is None or isinstance(harga, bool) or not isinstance(harga, numbers.Real):
+        return None
+    return (
+        record.get("komoditas") or "-",
+        record.get("kecamatan") or kecamatan_dari_lokasi(record.get("lokasi")),
+        hari_wib(waktu),
+    )
+
+
+def rollup_doc_id(key):
+    """Document id Firestore yang deterministik untuk satu rollup"""
+    return "|".join(key).replace("/", "-")
+
+
+def aggregate_rollups(records, into=None, sign=1):
+    """Aggregate records menjadi {key: {count, sum, min, max, sketch}};
+    sign=-1 mengurangi record (versi lama dari id yang ditulis ulang)"""
+    deltas = {} if into is None else into
+    for record in records:
+        key = rollup_key(record)
+        if key is None:
+            continue
+        harga = record["harga_angka"]
+        stats = deltas.get(key)
+        if stats is None:
+            # min/max netral untuk delta pengurangan (MIN/MAX tidak berubah)
+            stats = deltas[key] = {"count": 0, "sum": 0, "min": math.inf, "max": -math.inf,
+                                   "sketch": {}}
+        stats["count"] += sign
+        stats["sum"] += sign * harga
+        if sign > 0:
+            stats["min"] = min(stats["min"], harga)
+            stats["max"] = max(stats["max"], harga)
+        sketch_add(stats["sketch"], harga, sign)
+    return deltas
+
+
+def replacement_rollups(records, previous):
+    """Rollup deltas for writing records over previous versions ({id: record})"""
+    deltas = aggregate_rollups(records)
+    aggregate_rollups(
+        (previous[r["id"]] for r in records if r.get("id") in previous), deltas, sign=-1
+    )
+    for stats in deltas.values():
+        # Bin yang saling meniadakan (harga sama) tidak perlu ditulis
+        stats["sketch"] = {k: n for k, n in stats["sketch"].items() if n}
+    return deltas
+
+
+def merge_rollup(stats, delta):
+    """Gabungkan delta ke stats (in-place), return stats"""
+    stats["count"] += delta["count"]
+    stats["sum"] += delta["sum"]
+    stats["min"] = min(stats["min"], delta["min"])
+    stats["max"] = max(stats["max"], delta["max"])
+    stats["sketch"] = sketch_merge(dict(stats.get("sketch") or {}), delta.get("sketch") or {})
+    return stats
+
+
+def rollups_to_frame(rows):
+    """List of rollup dicts -> DataFrame (rollups emptied by rewrites dropped)"""
+    df = pd.DataFrame(rows, columns=ROLLUP_COLUMNS)
+    if df.empty:
+        return df
+    return df[df["count"] > 0].reset_index(drop=True)
+
+
+def summarize_rollups(df):
+    """Count, mean, min, max, p10/median/p90 dari rollup frame (None kalau kosong).
+    Kuantil None kalau rollup belum punya sketch (dibuat sebelum ada sketch)."""
+    if df.empty or df["count"].sum() == 0:
+        return None
+    count = int(df["count"].sum())
+    summary = {
+        "count": count,
+        "mean": df["sum"].sum() / count,
+        "min": df["min"].min(),
+        "max": df["max"].max(),
+    }
+    summary.update(zip(("p10", "median", "p90"), rollup_quantiles(df)))
+    return summary
+
+
+def rollup_quantiles(df, qs=BAND_QUANTILES):
+    """Quantiles over all rollups in df; None if any rollup lacks a sketch"""
+    sketches = df["sketch"].tolist()
+    if not sketches or any(not isinstance(s, dict) or not s for s in sketches):
+        return [None] * len(qs)
+    return sketch_quantiles(merge_sketches(sketches), qs)
+
+
+def rollup_bands(df):
+    """Per (komoditas, hari): p10/median/p90 dari rollup semua kecamatan"""
+    rows = []
+    for (komoditas, hari), group in df.groupby(["komoditas", "hari"], sort=True):
+        p10, median, p90 = rollup_quantiles(group)
+        if median is not None:
+            rows.append({"komoditas": komoditas, "hari": hari, "p10": p10,
+                         "median": median, "p90": p90, "count": int(group["count"].sum())})
+    return pd.DataFrame(rows, columns=["komoditas", "hari", "p10", "median", "p90", "count"])
@@ -0,0 +1,162 @@
+"""
+Scheduler resident untuk scraper (python scraper.py --daemon).
+
+Setiap sumber punya jadwal sendiri: "interval" (detik) dan "jitter" (fraksi
+dari interval, supaya sumber tidak selalu jalan serentak). Sumber yang jatuh
+tempo dijalankan bersamaan (dibatasi `concurrency`); yang gagal dijadwalkan
+ulang dengan exponential backoff sampai MAX_BACKOFF, lalu kembali ke
+interval normal setelah sukses.
+
+Scheduler sendiri tidak tahu cara scraping: ia memanggil coroutine
+run_source(source) yang mengembalikan dict statistik (bytes, items,
+ditulis, ...) atau raise kalau gagal. Koneksi (client HTTP, repo, cache)
+dibuka sekali oleh pemanggil dan dipakai ulang di setiap tick.
+"""
+import asyncio
+import random
+import time
+
+DEFAULT_INTERVAL = 900.0
+DEFAULT_JITTER = 0.1
+BACKOFF_BASE = 30.0
+MAX_BACKOFF = 3600.0
+DEFAULT_CONCURRENCY = 4
+REPORT_INTERVAL = 300.0
+
+
+class SourceState:
+    """Jadwal & statistik satu sumber"""
+
+    def __init__(self, source, default_interval=DEFAULT_INTERVAL, default_jitter=DEFAULT_JITTER):
+        self.source = source
+        self.name = source["name"]
+        self.interval = float(source.get("interval", default_interval))
+        self.jitter = float(source.get("jitter", default_jitter))
+        self.next_run = 0.0
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.last_elapsed = None
+        self.last_stats = {}
+        self.totals = {"bytes": 0, "items": 0, "ditulis": 0, "not_modified": 0}
+
+    def _jittered(self, delay):
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def schedule_success(self, now):
+        self.consecutive_failures = 0
+        self.next_run = now + self._jittered(self.interval)
+
+    def schedule_failure(self, now, backoff_base=BACKOFF_BASE, max_backoff=MAX_BACKOFF):
+        self.consecutive_failures += 1
+        delay = min(max_backoff, backoff_base * 2 ** (self.consecutive_failures - 1))
+        self.next_run = now + self._jittered(delay)
+
+    def snapshot(self, now):
+        return {
+            "name": self.name,
+            "runs": self.runs,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_elapsed_s": round(self.last_elapsed, 3) if self.last_elapsed is not None else None,
+            "next_run_in_s": round(max(0.0, self.next_run - now), 1),
+            "last": dict(self.last_stats),
+            **self.totals,
+        }
+
+
+class ScrapeScheduler:
+    """Run each source on its own interval, concurrently, with backoff on failure"""
+
+    def __init__(self, sources, run_source, concurrency=DEFAULT_CONCURRENCY,
+                 default_interval=DEFAULT_INTERVAL, default_jitter=DEFAULT_JITTER,
+                 backoff_base=BACKOFF_BASE, max_backoff=MAX_BACKOFF,
+                 report_interval=REPORT_INTERVAL, report=print, clock=time.monotonic):
+        self.states = [SourceState(s, default_interval, default_jitter) for s in sources]
+        self.run_source = run_source
+        self.concurrency = concurrency
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.report_interval = report_interval
+        self.report = report
+        self.clock = clock
+        self._stop = None
+        self._tasks = set()
+
+    async def _run_one(self, state, limit):
+        async with limit:
+            start = self.clock()
+            try:
+                stats = await self.run_source(state.source) or {}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                state.failures += 1
+                state.last_error = f"{type(e).__name__}: {e}"
+                state.last_elapsed = self.clock() - start
+                state.schedule_failure(self.clock(), self.backoff_base, self.max_backoff)
+                if self.report:
+                    self.report(f"❌ {state.name}: {state.last_error} "
+                                f"(coba lagi {state.next_run - self.clock():.0f} detik lagi)")
+            else:
+                state.last_error = None
+                state.last_elapsed = self.clock() - start
+                state.last_stats = stats
+                for key in state.totals:
+                    state.totals[key] += int(stats.get(key) or 0)
+                state.schedule_success(self.clock())
+            finally:
+                state.runs += 1
+                state.running = False
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self, max_ticks=None):
+        """Loop sampai stop() (atau max_ticks putaran, untuk testing)"""
+        self._stop = asyncio.Event()
+        limit = asyncio.Semaphore(self.concurrency)
+        last_report = self.clock()
+        ticks = 0
+        try:
+            while not self._stop.is_set():
+                now = self.clock()
+                for state in self.states:
+                    if not state.running and state.next_run <= now:
+                        state.running = True
+                        task = asyncio.create_task(self._run_one(state, limit))
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+
+                if self.report and now - last_report >= self.report_interval:
+                    last_report = now
+                    self.print_stats()
+
+                ticks += 1
+                if max_ticks is not None and ticks >= max_ticks:
+                    break
+                idle = [s.next_run for s in self.states if not s.running]
+                wait = max(0.05, min(idle) - now) if idle else 1.0
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=min(wait, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self):
+        now = self.clock()
+        return [state.snapshot(now) for state in self.states]
+
+    def print_stats(self):
+        self.report(f"{'sumber':<20} {'runs':>5} {'gagal':>5} {'detik':>7} "
+                    f"{'bytes':>10} {'items':>6} {'ditulis':>7} {'next':>6}")
+        for s in self.stats():
+            elapsed = f"{s['last_elapsed_s']:.2f}" if s["last_elapsed_s"] is not None else "-"
+            self.report(f"{s['name'][:20]:<20} {s['runs']:>5} {s['failures']:>5} {elapsed:>7} "
+                        f"{s['bytes']:>10,} {s['items']:>6} {s['ditulis']:>7} {s['next_run_in_s']:>6.0f}")
@@ -0,0 +1,269 @@
+"""
+Engine scraping async untuk scraper.py.
+
+Semua sumber di-fetch bersamaan lewat satu httpx.AsyncClient (connection pool
+keep-alive), dengan batas koneksi per host dan timeout per request. Validator
+ETag/Last-Modified disimpan di SQLite (HttpCache), jadi halaman yang tidak
+berubah cukup dibayar dengan 304 tanpa download & parse ulang.
+
+Validator baru baru di-commit (commit()) setelah hasil fetch selesai diproses,
+supaya kegagalan parse/tulis tidak membuat halaman itu dianggap "sudah dilihat".
+Total waktu scrape ~ sumber paling lambat, bukan jumlah semua sumber.
+
+Item hasil scrape diberi doc id deterministik (item_id: hash sumber + judul
+ternormalisasi + hari WIB) dan dicatat di SeenIndex (file SQLite yang sama),
+jadi item yang sudah pernah ditulis dilewati sebelum ada write ke database.
+"""
+import asyncio
+import datetime
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from urllib.parse import urlsplit
+
+import httpx
+
+from rollups import hari_wib
+
+SCRAPER_STATE_PATH = os.environ.get("SCRAPER_STATE_PATH", "scraper_state.db")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/91.0.4472.124 Safari/537.36"
+
+DEFAULT_TIMEOUT = 10.0
+PER_HOST_LIMIT = 2
+MAX_CONNECTIONS = 20
+
+
+class ScrapeError(Exception):
+    """Fetch satu sumber gagal (network / HTTP error)"""
+
+
+def normalisasi_judul(judul):
+    """Judul untuk hashing: NFKC, huruf kecil, spasi dirapikan"""
+    judul = unicodedata.normalize("NFKC", judul).casefold()
+    return re.sub(r"\s+", " ", judul).strip()
+
+
+def item_id(sumber, judul, waktu=None):
+    """Deterministic doc id for one scraped item (per hari WIB kalau waktu diberikan)"""
+    hari = hari_wib(waktu) if waktu is not None else ""
+    kunci = f"{sumber}|{normalisasi_judul(judul)}|{hari}"
+    return hashlib.sha1(kunci.encode("utf-8")).hexdigest()[:20]
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+class HttpCache:
+    """ETag / Last-Modified per URL, persisted in SQLite"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS http_cache (
+        url           TEXT PRIMARY KEY,
+        etag          TEXT,
+        last_modified TEXT,
+        updated_at    TEXT
+    );
+    """
+
+    def __init__(self, path=SCRAPER_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = _connect(path)
+        self.conn.executescript(self.SCHEMA)
+
+    def validators(self, url):
+        """Conditional request headers for url (kosong kalau belum pernah)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def store(self, url, etag=None, last_modified=None):
+        if not etag and not last_modified:
+            return
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO http_cache (url, etag, last_modified, updated_at) VALUES (?,?,?,?)"
+                " ON CONFLICT (url) DO UPDATE SET etag = excluded.etag,"
+                " last_modified = excluded.last_modified, updated_at = excluded.updated_at",
+                (url, etag, last_modified,
+                 datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"))
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class SeenIndex:
+    """Doc id item yang sudah ditulis ke database, persisted in SQLite"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS seen_items (
+        doc_id  TEXT PRIMARY KEY,
+        sumber  TEXT,
+        seen_at TEXT
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path=SCRAPER_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = _connect(path)
+        self.conn.executescript(self.SCHEMA)
+
+    def unseen(self, doc_ids):
+        """Subset of doc_ids yang belum pernah di-mark, urutan dipertahankan"""
+        doc_ids = list(dict.fromkeys(doc_ids))
+        seen = set()
+        with self._lock:
+            # Batas jumlah parameter SQLite, cek per 500
+            for i in range(0, len(doc_ids), 500):
+                chunk = doc_ids[i:i + 500]
+                seen.update(row[0] for row in self.conn.execute(
+                    f"SELECT doc_id FROM seen_items WHERE doc_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ))
+        return [doc_id for doc_id in doc_ids if doc_id not in seen]
+
+    def mark(self, items):
+        """Catat (doc_id, sumber) yang sudah berhasil ditulis"""
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen_items (doc_id, sumber, seen_at) VALUES (?,?,?)",
+                [(doc_id, sumber, now) for doc_id, sumber in items]
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen_items").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class FetchResult:
+    """Outcome of fetching one source"""
+
+    def __init__(self, source, status=None, body=None, headers=None, elapsed=0.0, error=None):
+        self.source = source
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def url(self):
+        return self.source["url"]
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+    @property
+    def ok(self):
+        return self.error is None and self.status == 200
+
+    @property
+    def bytes(self):
+        return len(self.body) if self.body else 0
+
+    def __repr__(self):
+        return (f"FetchResult({self.source['name']!r}, status={self.status}, "
+                f"bytes={self.bytes}, elapsed={self.elapsed:.3f}, error={self.error!r})")
+
+
+class ScrapeEngine:
+    """Concurrent conditional GETs over a shared keep-alive connection pool"""
+
+    def __init__(self, cache=None, per_host_limit=PER_HOST_LIMIT, timeout=DEFAULT_TIMEOUT,
+                 max_connections=MAX_CONNECTIONS, transport=None):
+        self.cache = cache
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport
+        self._client = None
+        self._host_limits = {}
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": USER_AGENT},
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                follow_redirects=True,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_limits = {}
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def fetch(self, source):
+        """GET one source (conditional if validators are cached)"""
+        client = await self.open()
+        url = source["url"]
+        headers = self.cache.validators(url) if self.cache is not None else {}
+        timeout = source.get("timeout", self.timeout)
+        async with self._host_limit(url):
+            start = time.perf_counter()
+            try:
+                response = await client.get(url, headers=headers, timeout=timeout)
+            except httpx.HTTPError as e:
+                return FetchResult(source, elapsed=time.perf_counter() - start,
+                                   error=f"{type(e).__name__}: {e}")
+            elapsed = time.perf_counter() - start
+
+        if response.status_code not in (200, 304):
+            return FetchResult(source, response.status_code, elapsed=elapsed,
+                               error=f"HTTP {response.status_code}")
+        return FetchResult(source, response.status_code, response.content,
+                           dict(response.headers), elapsed)
+
+    async def fetch_all(self, sources):
+        """Fetch every source concurrently, results in source order"""
+        return await asyncio.gather(*(self.fetch(source) for source in sources))
+
+    def commit(self, result):
+        """Remember the validators of a processed 200 response"""
+        if self.cache is not None and result.ok:
+            self.cache.store(
+                result.url, result.headers.get("etag"), result.headers.get("last-modified")
+            )
+
@@ -1,72 +1,222 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
 import firebase_admin
 from firebase_admin import credentials
-from firebase_admin import firestore
 import datetime
+import json
+import os
+import signal
+import time
+from parsing import parse_page_async, parse_pages
+from scheduler import DEFAULT_CONCURRENCY, ScrapeScheduler
+from scrape_engine import HttpCache, ScrapeEngine, ScrapeError, SeenIndex, item_id
+from storage import get_repository
 
 # --- BAGIAN 1: KONEKSI DATABASE ---
+# Backend dipilih lewat MARKET_BACKEND (default: firestore)
+BACKEND = os.environ.get("MARKET_BACKEND", "firestore")
+
 # Cek dulu apakah sudah connect biar gak error kalau dijalankan berkali-kali
-if not firebase_admin._apps:
+if BACKEND == "firestore" and not firebase_admin._apps:
     cred = credentials.Certificate("kunci.json")
     firebase_admin.initialize_app(cred)
 
-db = firestore.client()
+repo = get_repository(BACKEND)
 
-# --- BAGIAN 2: FUNGSI SCRAPING (PENCARI HARGA) ---
-def sikat_harga_internet():
-    print("🕵️  Sedang memata-matai harga pasar...")
-    
-    # Target URL (Kita pakai InfoSawit sebagai contoh CPO)
-    url = "https://www.infosawit.com/news/"
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/91.0.4472.124 Safari/537.36'}
+# --- BAGIAN 2: DAFTAR SUMBER ---
+# Bisa diganti lewat SCRAPER_SOURCES=sumber.json (list dengan format yang sama)
+SOURCES = [
+    {
+        "name": "InfoSawit",
+        "url": "https://www.infosawit.com/news/",
+        "sumber": "InfoSawit (Berita)",
+        "komoditas": "CPO/Sawit",
+        "selector": "h3.entry-title",
+        "snippet": "div.entry-summary",
+        "limit": 5,
+        "interval": 1800,  # detik, hanya dipakai mode --daemon
+        "jitter": 0.1,
+    },
+]
+
+KATA_KUNCI = ("Harga", "Tender")
+
+def load_sources():
+    path = os.environ.get("SCRAPER_SOURCES")
+    if not path:
+        return SOURCES
+    with open(path) as f:
+        return json.load(f)
+
+# --- BAGIAN 3: PARSE HALAMAN ---
+# Parsing per sumber ada di parsing.py (selector, nominal Rupiah, process pool)
+def cari_judul(items):
+    """Item berita yang judulnya mengandung kata kunci harga"""
+    # Logika: Kalau nemu kata "Harga" atau "Tender", kita simpan!
+    return [item for item in items if any(kata in item["judul"] for kata in KATA_KUNCI)]
+
+# --- BAGIAN 4: FUNGSI SCRAPING (PENCARI HARGA) ---
+# Estimasi manual kalau berita lagi kosong. Id tetap (tanpa tanggal), jadi
+# cukup masuk database sekali, bukan tiap kali scraper jalan
+ESTIMASI_KOPRA = {
+    "sumber": "Estimasi Pasar (Januari 2026)",
+    "judul_berita": "Update Harga Kopra Awal Tahun 2026",
+    "komoditas": "Kopra Kering",
+    "harga_rata_rata": 16500, # Kita ambil tengah-tengah
+    "range_harga": "Rp 15.000 - Rp 17.650",
+    "catatan": "Harga bisa berubah tergantung kadar air",
+}
+
+def simpan_baru(records, seen):
+    """Tulis record yang belum ada di seen-index, return jumlah yang ditulis"""
+    baru = set(seen.unseen([r["id"] for r in records]))
+    records = [r for r in records if r["id"] in baru]
+    if not records:
+        return 0
+    repo.add_many(records)
+    # Baru di-mark setelah write sukses, supaya write yang gagal dicoba lagi
+    seen.mark((r["id"], r["sumber"]) for r in records)
+    return len(records)
+
+def buat_records(source, items, waktu):
+    """Item berita yang cocok -> record harga_realtime dengan id deterministik"""
+    sumber = source.get("sumber", source["name"])
+    records = []
+    for item in cari_judul(items):
+        print(f"✅ MENEMUKAN DATA BERITA: {item['judul']}")
+        record = {
+            "id": item_id(sumber, item["judul"], waktu),
+            "sumber": sumber,
+            "judul_berita": item["judul"],
+            "komoditas": source.get("komoditas"),
+            "waktu_ambil": waktu,
+            "status": "Valid"
+        }
+        if item["harga_angka"] is not None:
+            record["harga_angka"] = item["harga_angka"]
+        records.append(record)
+    return records
+
+async def scrape(sources, cache, seen):
+    """Fetch semua sumber bersamaan, simpan judul baru, return (hasil fetch, jumlah ditulis)"""
+    async with ScrapeEngine(cache) as engine:
+        results = await engine.fetch_all(sources)
+
+    # Parse semua halaman baru sekaligus (process pool kalau banyak)
+    halaman = [r for r in results if r.ok]
+    parsed = dict(zip(map(id, halaman), parse_pages((r.source, r.body) for r in halaman)))
 
     harga_dapat = False
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        artikel_list = soup.find_all('h3', class_='entry-title', limit=5)
-        
-        for artikel in artikel_list:
-            judul = artikel.text.strip()
-            
-            # Logika: Kalau nemu kata "Harga" atau "Tender", kita simpan!
-            if "Harga" in judul or "Tender" in judul:
-                print(f"✅ MENEMUKAN DATA BERITA: {judul}")
-                
-                # Simpan ke database
-                data_baru = {
-                    "sumber": "InfoSawit (Berita)",
-                    "judul_berita": judul,
-                    "komoditas": "CPO/Sawit",
-                    "waktu_ambil": datetime.datetime.now(),
-                    "status": "Valid"
-                }
-                
-                db.collection("harga_realtime").add(data_baru)
-                harga_dapat = True
-        
-        # --- BAGIAN UPDATE (SESUAI REQUEST LU) ---
-        if not harga_dapat:
-            print("⚠️ Berita lagi kosong. Menggunakan DATA UPDATE JANUARI 2026...")
-            
-            # Kita masukkan data range harga yang lu temuin di Google tadi
-            db.collection("harga_realtime").add({
-                "sumber": "Estimasi Pasar (Januari 2026)",
-                "judul_berita": "Update Harga Kopra Awal Tahun 2026",
-                "komoditas": "Kopra Kering",
-                "harga_rata_rata": 16500, # Kita ambil tengah-tengah
-                "range_harga": "Rp 15.000 - Rp 17.650",
-                "catatan": "Harga bisa berubah tergantung kadar air",
-                "waktu_ambil": datetime.datetime.now()
-            })
-            
-        print("\n🚀 SELESAI! Data Kopra (Rp 16.500) sudah dikirim ke Database!")
+    halaman_baru = False
+    ditulis = 0
+    for result in results:
+        nama = result.source["name"]
+        if result.error:
+            print(f"❌ {nama}: {result.error}")
+            continue
+        if result.not_modified:
+            # 304: halaman sama dengan run sebelumnya, tidak perlu download & parse
+            print(f"⏭️  {nama}: tidak berubah (304, {result.elapsed:.2f} detik)")
+            continue
+
+        halaman_baru = True
+        print(f"📄 {nama}: {result.bytes:,} bytes dalam {result.elapsed:.2f} detik")
+        waktu = datetime.datetime.now(datetime.timezone.utc)
+        records = buat_records(result.source, parsed[id(result)], waktu)
 
+        # Simpan ke database (yang sudah pernah ditulis hari ini dilewati)
+        if records:
+            harga_dapat = True
+            baru = simpan_baru(records, seen)
+            ditulis += baru
+            print(f"💾 {nama}: {baru} baru, {len(records) - baru} sudah ada")
+
+        # Validator ETag/Last-Modified baru disimpan setelah halaman selesai diproses
+        engine.commit(result)
+
+    # --- BAGIAN UPDATE (SESUAI REQUEST LU) ---
+    if halaman_baru and not harga_dapat:
+        print("⚠️ Berita lagi kosong. Menggunakan DATA UPDATE JANUARI 2026...")
+        estimasi = dict(
+            ESTIMASI_KOPRA,
+            id=item_id(ESTIMASI_KOPRA["sumber"], ESTIMASI_KOPRA["judul_berita"]),
+            waktu_ambil=datetime.datetime.now(datetime.timezone.utc),
+        )
+        if simpan_baru([estimasi], seen):
+            ditulis += 1
+            print("\n🚀 SELESAI! Data Kopra (Rp 16.500) sudah dikirim ke Database!")
+        else:
+            print("⏭️  Estimasi Kopra sudah ada di database, tidak ditulis ulang")
+
+    return results, ditulis
+
+def sikat_harga_internet(sources=None):
+    print("🕵️  Sedang memata-matai harga pasar...")
+    sources = sources or load_sources()
+    cache = HttpCache()
+    seen = SeenIndex()
+    try:
+        mulai = time.perf_counter()
+        results, ditulis = asyncio.run(scrape(sources, cache, seen))
+        print(f"\n⏱️  {len(results)} sumber selesai dalam {time.perf_counter() - mulai:.2f} detik, "
+              f"{ditulis} record ditulis")
     except Exception as e:
         print(f"Error gawat: {e}")
+    finally:
+        cache.close()
+        seen.close()
+
+# --- BAGIAN 5: MODE DAEMON (SCHEDULER) ---
+async def scrape_source(engine, source, seen):
+    """Satu putaran untuk satu sumber, return statistik untuk scheduler"""
+    result = await engine.fetch(source)
+    if result.error:
+        raise ScrapeError(result.error)
+    stats = {"status": result.status, "bytes": result.bytes, "elapsed_fetch": round(result.elapsed, 3)}
+    if result.not_modified:
+        return dict(stats, not_modified=1, items=0, ditulis=0)
+
+    items = await parse_page_async(source, result.body)
+    waktu = datetime.datetime.now(datetime.timezone.utc)
+    records = buat_records(source, items, waktu)
+    # Write ke database blocking, jalankan di thread supaya sumber lain tetap jalan
+    ditulis = await asyncio.to_thread(simpan_baru, records, seen) if records else 0
+    engine.commit(result)
+    return dict(stats, items=len(records), ditulis=ditulis)
+
+async def jalankan_daemon(sources, concurrency=DEFAULT_CONCURRENCY):
+    """Scheduler resident: repo, client HTTP, cache & seen-index dibuka sekali"""
+    cache = HttpCache()
+    seen = SeenIndex()
+    try:
+        async with ScrapeEngine(cache) as engine:
+            scheduler = ScrapeScheduler(
+                sources, lambda source: scrape_source(engine, source, seen),
+                concurrency=concurrency,
+            )
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, scheduler.stop)
+                except (NotImplementedError, RuntimeError):
+                    pass  # Windows: Ctrl+C tetap lewat KeyboardInterrupt
+            print(f"🔁 Daemon jalan untuk {len(sources)} sumber (Ctrl+C untuk berhenti)")
+            await scheduler.run()
+            scheduler.print_stats()
+            return scheduler
+    finally:
+        cache.close()
+        seen.close()
 
 # JALANKAN PROGRAM
 if __name__ == "__main__":
-    sikat_harga_internet()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scraper harga Mentawai Market")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Jalan terus, tiap sumber sesuai interval/jitter-nya")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    if args.daemon:
+        asyncio.run(jalankan_daemon(load_sources(), args.concurrency))
+    else:
+        sikat_harga_internet()
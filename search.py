@@ -0,0 +1,157 @@
+"""
+Index pencarian untuk box "Cari dalam tabel".
+
+Kolom yang dicari (Komoditas, Lokasi, Sumber, Status, Harga) disimpan sebagai
+vocabulary nilai unik per kolom, dengan trigram index di atas vocabulary itu.
+Lookup: ambil posting list trigram paling jarang dari query, verifikasi
+kandidatnya, lalu petakan ke baris dengan satu operasi numpy. Tidak ada lagi
+DataFrame.apply per baris.
+
+Vocabulary + trigram bertambah incremental (nilai baru saja yang diproses);
+pemetaan baris -> vocabulary dibangun sekali per frame dan disimpan di
+FrameCache, jadi bergantian antara snapshot dan frame hasil query push-down
+tidak membangun ulang pemetaannya.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FrameCache
+from market_data import format_rupiah
+
+# Kolom frame -> cara mengubah nilainya jadi teks yang dicari.
+# Harga dicari dari teks tampilannya ("Rp 12.500"), bukan dari angka mentah.
+SEARCH_COLUMNS = {
+    "Komoditas": str,
+    "Lokasi": str,
+    "Sumber": str,
+    "Status": str,
+    "Harga_Angka": format_rupiah,
+    "Range_Harga": str,
+}
+
+NGRAM = 3
+
+# Hasil query per frame, supaya rerun per ketikan tidak menghitung ulang
+QUERY_CACHE_SIZE = 64
+
+
+def normalize(text):
+    """Lowercase + rapikan spasi untuk pencocokan case-insensitive"""
+    return " ".join(str(text).lower().split())
+
+
+def ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class _Vocabulary:
+    """Nilai unik satu kolom: id stabil, teks ternormalisasi, trigram postings"""
+
+    def __init__(self, to_text=str):
+        self.to_text = to_text
+        self.ids = {}
+        self.texts = []
+        self.postings = {}
+
+    def lookup(self, values):
+        """Vocabulary id untuk tiap value (nilai baru langsung di-index)"""
+        values = pd.Series(values, dtype=object)
+        result = values.map(self.ids).to_numpy(dtype=float, na_value=np.nan, copy=True)
+        for pos in np.flatnonzero(np.isnan(result)):
+            value = values.iat[pos]
+            vocab_id = self.ids[value] = len(self.texts)
+            text = normalize(self.to_text(value))
+            self.texts.append(text)
+            for gram in ngrams(text):
+                self.postings.setdefault(gram, []).append(vocab_id)
+            result[pos] = vocab_id
+        return result.astype(np.int64)
+
+    def match(self, needle):
+        """Boolean array over vocabulary ids whose text contains needle"""
+        matched = np.zeros(len(self.texts) + 1, dtype=bool)
+        if len(needle) < NGRAM:
+            candidates = range(len(self.texts))
+        else:
+            grams = ngrams(needle)
+            if any(gram not in self.postings for gram in grams):
+                return matched
+            candidates = min((self.postings[gram] for gram in grams), key=len)
+        for vocab_id in candidates:
+            if needle in self.texts[vocab_id]:
+                matched[vocab_id] = True
+        return matched
+
+
+class _FrameRows:
+    """Row -> vocabulary id arrays of one frame, plus its query results"""
+
+    __slots__ = ("row_ids", "queries")
+
+    def __init__(self, row_ids):
+        self.row_ids = row_ids
+        self.queries = {}
+
+
+class SearchIndex:
+    """Trigram index over the searchable table columns"""
+
+    def __init__(self, columns=SEARCH_COLUMNS, frames=None):
+        self.columns = columns
+        self._lock = threading.Lock()
+        self._vocab = {col: _Vocabulary(to_text) for col, to_text in columns.items()}
+        # Pemetaan baris per frame (beberapa frame terakhir)
+        self._frames = frames if frames is not None else FrameCache()
+
+    def build(self, df):
+        """(Re)bind df: fresh row mapping, earlier query results for df dropped"""
+        with self._lock:
+            return self._frames.put(df, self._map_rows(df))
+
+    def _map_rows(self, df):
+        """Map df's rows (positional, len(df) rows) to the vocabulary (caller holds
+        self._lock: the vocabulary is shared by every frame)"""
+        row_ids = {}
+        for col in self.columns:
+            if col not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[col], use_na_sentinel=True)
+            vocab = self._vocab[col]
+            # Kode -1 (kosong) dipetakan ke slot sentinel yang tidak pernah cocok
+            unique_ids = np.append(vocab.lookup(uniques), -1)
+            row_ids[col] = unique_ids[codes]
+        return _FrameRows(row_ids)
+
+    def search(self, df, query):
+        """Sorted row positions in df whose searchable columns contain query"""
+        needle = normalize(query)
+        with self._lock:
+            rows = self._frames.get(df, self._map_rows)
+            cached = rows.queries.get(needle)
+            if cached is not None:
+                return cached
+
+            mask = None
+            for col, ids in rows.row_ids.items():
+                matched = self._vocab[col].match(needle)
+                if not matched.any():
+                    continue
+                hit = matched[ids]
+                mask = hit if mask is None else mask | hit
+            if mask is None:
+                positions = np.empty(0, dtype=np.intp)
+            else:
+                positions = np.flatnonzero(mask)
+
+            if len(rows.queries) >= QUERY_CACHE_SIZE:
+                rows.queries.pop(next(iter(rows.queries)))
+            rows.queries[needle] = positions
+            return positions
+
+    def mask(self, df, query):
+        """Boolean mask over df rows (df must have a RangeIndex)"""
+        mask = np.zeros(len(df), dtype=bool)
+        mask[self.search(df, query)] = True
+        return mask
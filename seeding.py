@@ -1,14 +1,17 @@
 import firebase_admin
 from firebase_admin import credentials
-from firebase_admin import firestore
-import random
-import datetime
 import json
+import os
 import streamlit as st
+from loadgen import generate_records
+from storage import get_repository
 
 # --- KONFIGURASI KONEKSI (SAMA KAYAK APP.PY) ---
+# Backend dipilih lewat MARKET_BACKEND (default: firestore)
+BACKEND = os.environ.get("MARKET_BACKEND", "firestore")
+
 # Kita pakai secrets dari Streamlit Cloud nanti, atau file lokal kalau di laptop
-if not firebase_admin._apps:
+if BACKEND == "firestore" and not firebase_admin._apps:
     try:
         # Coba baca dari Streamlit Secrets (kalau dijalankan di Cloud)
         key_dict = json.loads(st.secrets["textkey"])
@@ -19,57 +22,33 @@ if not firebase_admin._apps:
         cred = credentials.Certificate("kunci.json")
         firebase_admin.initialize_app(cred)
 
-db = firestore.client()
+repo = get_repository(BACKEND)
 
 # --- DATA GENERATOR ---
-komoditas_list = ["Kopra Kering", "Cengkeh", "Pinang", "Gurita", "Kakao", "Lobster", "Nilam", "Rotan", "Sagu"]
-lokasi_list = [
-    "Dusun Taileleu, Siberut Barat Daya", "Desa Sikakap, Sikakap", 
-    "Desa Muara Siberut, Siberut Selatan", "Desa Betumonga, Pagai Utara",
-    "Desa Saumanganya, Pagai Utara", "Desa Bosua, Sipora Selatan",
-    "Tuapejat, Sipora Utara", "Desa Maileppet, Siberut Selatan"
-]
-sumber_list = ["Petani", "Pengepul Desa", "Toke Besar", "Dinas Pasar"]
+# Distribusi komoditas/lokasi/harga dari constants.py (sama dengan dashboard).
+# Untuk volume besar pakai CLI: python loadgen.py --rows 1000000
+JUMLAH = 50
+BATCH = 10
 
 st.title("💉 Data Injector (Isi Database Otomatis)")
 
-if st.button("SUNTIK 50 DATA DUMMY SEKARANG 🚀"):
+if st.button(f"SUNTIK {JUMLAH} DATA DUMMY SEKARANG 🚀"):
     progress_text = "Sedang mengisi database..."
     my_bar = st.progress(0, text=progress_text)
 
-    for i in range(50):
-        # Random Data
-        item = random.choice(komoditas_list)
-        loc = random.choice(lokasi_list)
-        src = random.choice(sumber_list)
-        
-        # Harga acak tapi masuk akal (plus minus 20%)
-        base_price = 10000 
-        if item == "Cengkeh": base_price = 120000
-        elif item == "Kopra Kering": base_price = 8000
-        elif item == "Gurita": base_price = 45000
-        elif item == "Lobster": base_price = 300000
-        elif item == "Pinang": base_price = 4000
-        
-        variation = random.randint(-2000, 2000)
-        final_price = base_price + variation
-        
-        # Waktu acak (Mundur 1-7 hari ke belakang biar grafiknya terbentuk)
-        days_back = random.randint(0, 7)
-        waktu_fake = datetime.datetime.now() - datetime.timedelta(days=days_back, hours=random.randint(1, 12))
+    # Waktu acak 7 hari ke belakang biar grafiknya terbentuk
+    records = generate_records(JUMLAH, days=7)
+
+    for i in range(0, JUMLAH, BATCH):
+        # PUSH KE DATABASE (satu commit per batch)
+        batch = records[i:i + BATCH]
+        repo.add_many(batch)
 
-        # PUSH KE DATABASE
-        db.collection("harga_realtime").add({
-            "komoditas": item,
-            "harga_angka": final_price,
-            "range_harga": f"Rp {final_price:,}".replace(",", "."),
-            "waktu_ambil": waktu_fake,
-            "sumber": src,
-            "lokasi": loc,
-            "status": "Dummy Data"
-        })
-        
         # Update progress bar
-        my_bar.progress((i + 1) / 50, text=f"Menginput: {item} di {loc}")
+        terakhir = batch[-1]
+        my_bar.progress(
+            min(i + BATCH, JUMLAH) / JUMLAH,
+            text=f"Menginput: {terakhir['komoditas']} di {terakhir['lokasi']}"
+        )
 
-    st.success("✅ SELESAI! 50 Data berhasil disuntikkan. Silakan cek Dashboard utama.")
+    st.success(f"✅ SELESAI! {JUMLAH} Data berhasil disuntikkan. Silakan cek Dashboard utama.")
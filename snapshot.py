@@ -0,0 +1,252 @@
+"""
+Snapshot data dashboard bersama (per proses), read-only dan berversi.
+
+LiveMarketCache / MarketDataSync menghasilkan satu DataFrame per perubahan
+data; SnapshotRegistry.publish() memberi frame itu nomor versi dan mencatat
+ukurannya. Semua session memakai objek frame yang sama (tanpa pickle/copy
+seperti st.cache_data); filter_frame() mengembalikan slice (view) untuk
+filter tanggal, jadi data dasar tidak diduplikasi per session.
+
+Frame tidak boleh dimutasi. Dengan pandas >= 3 (Copy-on-Write, dipin di
+requirements.txt) array dari to_numpy() sudah read-only dan operasi tulis
+lewat pandas selalu menyalin dulu, jadi versi yang sedang dibaca session
+lain tidak bisa ikut berubah. Di pandas 2.x jaminan ini tidak ada, jadi
+SnapshotRegistry menolak jalan di sana.
+
+Versi lama tetap hidup selama masih dipegang session yang sedang rerun;
+versions() melaporkan memori tiap versi yang masih hidup.
+
+SnapshotStore menyimpan versi terakhir ke file Arrow IPC lokal (tanpa
+kompresi, ditulis atomic) beserta high-water mark-nya. Saat proses baru
+start, file itu di-memory-map dan langsung dirender, sementara data yang
+lebih baru dikejar di background (delta sync / listener).
+
+Catch-up hanya menambah data baru, jadi record yang dihapus setelah file
+ditulis akan muncul lagi. Karena itu purge memanggil invalidate(): file
+dihapus dan hanya versi yang dipublish setelahnya yang boleh disimpan lagi.
+"""
+import datetime
+import os
+import threading
+import time
+import weakref
+
+import pandas as pd
+
+from market_data import CATEGORY_COLUMNS
+from storage import to_utc_naive
+
+SNAPSHOT_PATH = os.environ.get("MARKET_SNAPSHOT_PATH", "market_snapshot.arrow")
+
+# Simpan ke disk paling sering sekali per interval ini
+SNAPSHOT_SAVE_INTERVAL = 60.0
+
+
+def frame_nbytes(df):
+    """Memory of a frame including category dictionaries & string payloads"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def format_bytes(n):
+    """1234567 -> '1.2 MB'"""
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:,.0f} {unit}" if unit == "B" else f"{n:,.1f} {unit}"
+        n /= 1024
+    return f"{n:,.1f} GB"
+
+
+class Snapshot:
+    """One immutable published version of the dashboard frame"""
+
+    __slots__ = ("version", "frame", "rows", "nbytes", "source", "created_at", "__weakref__")
+
+    def __init__(self, version, frame, source=None):
+        self.version = version
+        self.frame = frame
+        self.rows = len(frame)
+        self.nbytes = frame_nbytes(frame)
+        self.source = source
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+
+    def info(self):
+        return {
+            "version": self.version,
+            "rows": self.rows,
+            "bytes": self.nbytes,
+            "source": self.source,
+            "created_at": self.created_at,
+        }
+
+
+class SnapshotRegistry:
+    """Hands out the current Snapshot and tracks live versions' memory"""
+
+    def __init__(self):
+        if int(pd.__version__.split(".")[0]) < 3:
+            raise RuntimeError(
+                f"Snapshot bersama butuh pandas >= 3 (Copy-on-Write), terpasang {pd.__version__}"
+            )
+        # RLock: callback weakref bisa jalan di tengah publish() saat versi lama di-GC
+        self._lock = threading.RLock()
+        self.current = None
+        self.version = 0
+        # version -> (weakref ke frame, info); entry hilang begitu frame di-GC
+        self._live = {}
+
+    def publish(self, frame, source=None):
+        """Snapshot for frame; a new version only if it's a different frame object"""
+        with self._lock:
+            if self.current is not None and self.current.frame is frame:
+                return self.current
+            self.version += 1
+            snap = Snapshot(self.version, frame, source)
+            self.current = snap
+            version = snap.version
+            self._live[version] = (
+                weakref.ref(frame, lambda _, v=version: self._forget(v)), snap.info()
+            )
+            return snap
+
+    def _forget(self, version):
+        with self._lock:
+            self._live.pop(version, None)
+
+    def versions(self):
+        """Info (version, rows, bytes, ...) for every version still referenced"""
+        with self._lock:
+            items = list(self._live.items())
+        current = self.current.version if self.current is not None else None
+        return [
+            dict(info, current=version == current)
+            for version, (ref, info) in sorted(items) if ref() is not None
+        ]
+
+    def total_bytes(self):
+        return sum(v["bytes"] for v in self.versions())
+
+
+class StoredSnapshot:
+    """Frame loaded from disk plus the metadata it was saved with"""
+
+    def __init__(self, frame, mark, saved_at, backend):
+        self.frame = frame
+        self.mark = mark
+        self.saved_at = saved_at
+        self.backend = backend
+
+
+class SnapshotStore:
+    """Last published frame persisted as an Arrow IPC file for cold starts"""
+
+    def __init__(self, path=SNAPSHOT_PATH, backend=None, interval=SNAPSHOT_SAVE_INTERVAL):
+        self.path = path
+        self.backend = backend
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._saving = False
+        self._last_save = None
+        self._saved_version = None
+        # Versi terakhir yang pernah diminta disimpan; invalidate() menolak versi <= ini
+        self._seen_version = 0
+        self._min_version = 0
+        self.loaded = None
+        self.last_error = None
+
+    def load(self):
+        """Memory-map the file; None if missing, unreadable or from another backend"""
+        import pyarrow as pa
+
+        try:
+            with pa.memory_map(self.path, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return None
+        meta = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+        if self.backend and meta.get("backend") not in (None, self.backend):
+            return None
+        mark = None
+        if meta.get("mark_waktu"):
+            mark = (datetime.datetime.fromisoformat(meta["mark_waktu"]), meta.get("mark_id", ""))
+        # pandas metadata dari from_pandas mengembalikan dtype asli (category, int, datetime64)
+        frame = table.to_pandas()
+        for col in CATEGORY_COLUMNS:
+            # Kategori kosong kembali sebagai object; samakan ke str untuk union_categoricals
+            if col in frame and frame[col].cat.categories.dtype != "str":
+                categories = frame[col].cat.categories.astype(str)
+                frame[col] = frame[col].cat.set_categories(categories, rename=True)
+        saved_at = datetime.datetime.fromisoformat(meta["saved_at"]) if meta.get("saved_at") else None
+        self.loaded = StoredSnapshot(frame, mark, saved_at, meta.get("backend"))
+        return self.loaded
+
+    def invalidate(self):
+        """Delete the file; versions published so far are never saved again"""
+        with self._lock:
+            self._min_version = self._seen_version + 1
+            self._remove_file()
+
+    def _remove_file(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def is_loaded(self, frame):
+        return self.loaded is not None and self.loaded.frame is frame
+
+    def save(self, snapshot, mark=None):
+        """Write snapshot.frame atomically (tmp file + rename)"""
+        import pyarrow as pa
+
+        frame = snapshot.frame
+        if mark is None and len(frame):
+            # Frame urut terbaru dulu: baris pertama = high-water mark
+            mark = (to_utc_naive(pd.Timestamp(frame['Raw_Time'].iloc[0]).to_pydatetime()),
+                    frame['Doc_ID'].iloc[0])
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        meta = dict(table.schema.metadata or {})
+        meta.update({
+            b"saved_at": datetime.datetime.now(datetime.timezone.utc).isoformat().encode(),
+            b"version": str(snapshot.version).encode(),
+            b"backend": (self.backend or "").encode(),
+        })
+        if mark is not None:
+            meta[b"mark_waktu"] = mark[0].isoformat().encode()
+            meta[b"mark_id"] = (mark[1] or "").encode()
+        table = table.replace_schema_metadata(meta)
+
+        tmp = f"{self.path}.tmp"
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, self.path)
+        self._saved_version = snapshot.version
+
+    def save_async(self, snapshot, mark=None):
+        """Save in a background thread, at most once per interval and per version"""
+        with self._lock:
+            now = time.monotonic()
+            self._seen_version = max(self._seen_version, snapshot.version)
+            if (self._saving or snapshot.version == self._saved_version
+                    or snapshot.version < self._min_version
+                    or self.is_loaded(snapshot.frame)
+                    or (self._last_save is not None and now - self._last_save < self.interval)):
+                return False
+            self._saving = True
+            self._last_save = now
+
+        def run():
+            try:
+                self.save(snapshot, mark)
+                with self._lock:
+                    if snapshot.version < self._min_version:
+                        # invalidate() jalan selama file ditulis
+                        self._remove_file()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            finally:
+                self._saving = False
+
+        threading.Thread(target=run, name="snapshot-save", daemon=True).start()
+        return True
@@ -0,0 +1,905 @@
+"""
+Storage layer untuk data harga Mentawai Market.
+
+Semua baca/tulis ke koleksi "harga_realtime" lewat satu interface
+(MarketRepository), jadi backend bisa diganti tanpa mengubah app.py,
+seeding.py atau scraper.py:
+
+- FirestoreRepository : produksi (Firebase Firestore)
+- SQLiteRepository    : replika lokal / offline, dengan index waktu & komoditas
+- MemoryRepository    : in-memory, untuk testing & benchmark
+
+Pilih backend lewat env var MARKET_BACKEND = firestore | sqlite | memory.
+
+Setiap record yang ditulis mendapat field desa & kecamatan hasil parse
+lokasi (lihat lokasi.py). Setiap backend juga memelihara rollup harian
+(lihat rollups.py) di transaksi/batch yang sama dengan penulisan data
+mentah; menulis ulang id yang sudah ada mengganti kontribusi versi lamanya.
+Purge data lama tidak menyentuh rollup (histori tetap ada); Hapus Semua ikut
+mengosongkan. Jumlah record yang tersimpan: count_records().
+
+Backend yang mendukung push (supports_watch) mengirim perubahan lewat
+watch(callback, limit): callback menerima list of (jenis, record) dengan
+jenis = "added" | "modified" | "removed".
+
+FirestoreRepository mencatat jumlah dokumen yang dibaca per operasi dan
+durasi stream()/to_dict() ke metrics.REGISTRY (ditampilkan di ADMIN PANEL).
+"""
+import datetime
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+from lokasi import lengkapi_lokasi
+from metrics import inc, span
+from rollups import (
+    ROLLUP_COLLECTION, ROLLUP_COLUMNS, aggregate_rollups, merge_rollup, replacement_rollups,
+    rollup_doc_id
+)
+
+COLLECTION = "harga_realtime"
+
+# Field yang punya kolom sendiri di SQLite, sisanya masuk kolom "extra" (JSON)
+CORE_FIELDS = (
+    "komoditas", "harga_angka", "range_harga", "waktu_ambil",
+    "sumber", "lokasi", "status",
+)
+
+# Firestore membatasi 500 operasi per batch
+BATCH_LIMIT = 500
+
+# Field path document id di Firestore. firebase_admin.firestore tidak mengekspor
+# FieldPath, jadi order_by/start_after memakai nama path-nya langsung.
+DOCUMENT_ID = "__name__"
+
+
+def to_utc_naive(waktu):
+    """Normalize datetime to naive UTC (Firestore convention for naive values)"""
+    if waktu is None:
+        return None
+    if waktu.tzinfo is not None:
+        waktu = waktu.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return waktu
+
+
+# ============================================================================
+# 1. INTERFACE
+# ============================================================================
+class MarketRepository:
+    """Interface umum untuk semua backend penyimpanan harga"""
+
+    name = "base"
+    supports_watch = False
+
+    def add(self, record):
+        """Insert satu record (pakai record["id"] kalau ada), return document id"""
+        raise NotImplementedError
+
+    def add_many(self, records):
+        """Insert banyak record sekaligus (batched), return jumlah record"""
+        count = 0
+        for record in records:
+            self.add(record)
+            count += 1
+        return count
+
+    def fetch_latest(self, limit=1000):
+        """Return list of dict (termasuk 'id'), terbaru lebih dulu"""
+        raise NotImplementedError
+
+    def fetch_since(self, waktu, doc_id="", limit=None):
+        """Return record yang lebih baru dari high-water mark (waktu, doc_id), terlama lebih dulu"""
+        raise NotImplementedError
+
+    def fetch_filtered(self, komoditas=None, since=None, limit=None):
+        """Record dengan komoditas == komoditas & waktu_ambil >= since, terbaru dulu"""
+        raise NotImplementedError
+
+    def fetch_page(self, field, descending=True, limit=50, cursor=None):
+        """Satu halaman urut (field, id); cursor = (nilai field, id) record terakhir"""
+        raise NotImplementedError
+
+    def delete_older_than(self, cutoff):
+        """Hapus record dengan waktu_ambil < cutoff, return jumlah terhapus"""
+        raise NotImplementedError
+
+    def delete_all(self):
+        """Hapus semua record, return jumlah terhapus"""
+        raise NotImplementedError
+
+    def count_records(self, cutoff=None):
+        """Jumlah record (hanya waktu_ambil < cutoff kalau cutoff diberikan)"""
+        raise NotImplementedError
+
+    def purge_key_batches(self, cutoff=None, batch_size=BATCH_LIMIT):
+        """Yield batch doc id yang akan dihapus (keys-only, tanpa isi dokumen)"""
+        raise NotImplementedError
+
+    def delete_keys(self, keys):
+        """Hapus satu batch doc id, return jumlah terhapus"""
+        raise NotImplementedError
+
+    def clear_rollups(self):
+        """Hapus semua rollup harian"""
+        raise NotImplementedError
+
+    def watch(self, callback, limit=1000):
+        """Subscribe ke perubahan `limit` record terbaru; return handle dengan
+        unsubscribe() dan is_active (False setelah stream putus)"""
+        raise NotImplementedError(f"Backend {self.name} tidak mendukung watch")
+
+    def fetch_rollups(self, start=None, end=None):
+        """Return rollup harian (list of dict) untuk hari WIB start..end (inklusif)"""
+        raise NotImplementedError
+
+    def rebuild_rollups(self):
+        """Hitung ulang semua rollup dari data mentah, return jumlah rollup"""
+        raise NotImplementedError
+
+
+# ============================================================================
+# 2. FIRESTORE BACKEND
+# ============================================================================
+class FirestoreRepository(MarketRepository):
+    """Backend Firebase Firestore (produksi)"""
+
+    name = "firestore"
+    supports_watch = True
+
+    def __init__(self, client, collection=COLLECTION):
+        from firebase_admin import firestore
+        self._firestore = firestore
+        self.db = client
+        self.collection = client.collection(collection)
+        self.rollups = client.collection(ROLLUP_COLLECTION)
+
+    def _set_rollups(self, batch, deltas):
+        # Increment/Minimum/Maximum adalah transform server-side, aman untuk write paralel
+        for key, stats in deltas.items():
+            komoditas, kecamatan, hari = key
+            data = {
+                "komoditas": komoditas,
+                "kecamatan": kecamatan,
+                "hari": hari,
+                "count": self._firestore.Increment(stats["count"]),
+                "sum": self._firestore.Increment(stats["sum"]),
+                "min": self._firestore.Minimum(stats["min"]),
+                "max": self._firestore.Maximum(stats["max"]),
+            }
+            if stats["sketch"]:
+                # Sketch kuantil: satu Increment per bin (merge = penjumlahan).
+                # Tanpa bin (rewrite harga sama) field dilewati: map kosong
+                # dengan merge=True menimpa seluruh sketch yang tersimpan
+                data["sketch"] = {
+                    bin_key: self._firestore.Increment(count)
+                    for bin_key, count in stats["sketch"].items()
+                }
+            batch.set(self.rollups.document(rollup_doc_id(key)), data, merge=True)
+
+    def _existing_records(self, refs):
+        # Satu batched read (get_all), hanya untuk record dengan id eksplisit
+        if not refs:
+            return {}
+        inc("firestore.doc_reads", len(refs), op="existing_records")
+        return {snap.id: snap.to_dict() for snap in self.db.get_all(refs) if snap.exists}
+
+    def _read(self, query, op, with_id=True):
+        # stream() dan to_dict() diukur terpisah: network/decode vs konversi ke dict
+        with span("firestore.stream", op=op):
+            docs = list(query.stream())
+        inc("firestore.doc_reads", len(docs), op=op)
+        with span("firestore.to_dict", op=op):
+            if with_id:
+                return [dict(doc.to_dict(), id=doc.id) for doc in docs]
+            return [doc.to_dict() for doc in docs]
+
+    def _commit_records(self, records):
+        records = [lengkapi_lokasi(record) for record in records]
+        batch = self.db.batch()
+        refs = [
+            self.collection.document(record["id"]) if record.get("id")
+            else self.collection.document()
+            for record in records
+        ]
+        previous = self._existing_records([
+            ref for record, ref in zip(records, refs) if record.get("id")
+        ])
+        for record, doc_ref in zip(records, refs):
+            batch.set(doc_ref, {k: v for k, v in record.items() if k != "id"})
+        # Tulis ulang id yang sama: kontribusi versi lama dikurangi dulu
+        self._set_rollups(batch, replacement_rollups(records, previous))
+        batch.commit()
+        return refs
+
+    def add(self, record):
+        # Record + rollup-nya dalam satu batch (atomic)
+        return self._commit_records([record])[0].id
+
+    def add_many(self, records):
+        # Setengah batch untuk record, setengah untuk rollup (maks 500 operasi)
+        count = 0
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) == BATCH_LIMIT // 2:
+                count += len(self._commit_records(chunk))
+                chunk = []
+        if chunk:
+            count += len(self._commit_records(chunk))
+        return count
+
+    def fetch_latest(self, limit=1000):
+        query = self.collection.order_by(
+            'waktu_ambil',
+            direction=self._firestore.Query.DESCENDING
+        ).limit(limit)
+        return self._read(query, "fetch_latest")
+
+    def fetch_since(self, waktu, doc_id="", limit=None):
+        # Urut (waktu_ambil, __name__) supaya record dengan waktu sama tidak hilang
+        query = self.collection.order_by('waktu_ambil').order_by(
+            DOCUMENT_ID
+        )
+        if doc_id:
+            query = query.start_after({'waktu_ambil': waktu, '__name__': doc_id})
+        else:
+            query = query.start_at({'waktu_ambil': waktu})
+        if limit:
+            query = query.limit(limit)
+        return self._read(query, "fetch_since")
+
+    def fetch_filtered(self, komoditas=None, since=None, limit=None):
+        # Butuh composite index (komoditas ASC, waktu_ambil DESC), lihat firestore.indexes.json
+        query = self.collection
+        if komoditas:
+            query = query.where('komoditas', '==', komoditas)
+        if since is not None:
+            query = query.where('waktu_ambil', '>=', since)
+        query = query.order_by('waktu_ambil', direction=self._firestore.Query.DESCENDING)
+        if limit:
+            query = query.limit(limit)
+        return self._read(query, "fetch_filtered")
+
+    def fetch_page(self, field, descending=True, limit=50, cursor=None):
+        direction = (
+            self._firestore.Query.DESCENDING if descending
+            else self._firestore.Query.ASCENDING
+        )
+        query = self.collection.order_by(field, direction=direction).order_by(
+            DOCUMENT_ID, direction=direction
+        )
+        if cursor is not None:
+            query = query.start_after({field: cursor[0], '__name__': cursor[1]})
+        return self._read(query.limit(limit), "fetch_page")
+
+    def _delete_stream(self, docs):
+        deleted = 0
+        batch = self.db.batch()
+        for doc in docs:
+            batch.delete(doc.reference)
+            deleted += 1
+            if deleted % BATCH_LIMIT == 0:
+                batch.commit()
+                batch = self.db.batch()
+        batch.commit()
+        return deleted
+
+    def _purge_query(self, cutoff=None):
+        # select([]) = keys-only: hanya reference, tanpa field dokumen
+        query = self.collection
+        if cutoff is not None:
+            query = query.where('waktu_ambil', '<', cutoff)
+        return query.select([])
+
+    def delete_older_than(self, cutoff):
+        return self._delete_stream(self._purge_query(cutoff).stream())
+
+    def delete_all(self):
+        deleted = self._delete_stream(self._purge_query().stream())
+        self.clear_rollups()
+        return deleted
+
+    def count_records(self, cutoff=None):
+        # Aggregation query: dihitung di server, tidak membaca dokumen
+        result = self._purge_query(cutoff).count().get()
+        return int(result[0][0].value)
+
+    def purge_key_batches(self, cutoff=None, batch_size=BATCH_LIMIT):
+        keys = []
+        for doc in self._purge_query(cutoff).stream():
+            keys.append(doc.id)
+            if len(keys) == batch_size:
+                yield keys
+                keys = []
+        if keys:
+            yield keys
+
+    def delete_keys(self, keys):
+        batch = self.db.batch()
+        for doc_id in keys:
+            batch.delete(self.collection.document(doc_id))
+        batch.commit()
+        return len(keys)
+
+    def clear_rollups(self):
+        return self._delete_stream(self.rollups.select([]).stream())
+
+    def fetch_rollups(self, start=None, end=None):
+        query = self.rollups
+        if start:
+            query = query.where('hari', '>=', start)
+        if end:
+            query = query.where('hari', '<=', end)
+        return self._read(query, "fetch_rollups", with_id=False)
+
+    def rebuild_rollups(self):
+        self.clear_rollups()
+        deltas = aggregate_rollups(doc.to_dict() for doc in self.collection.stream())
+        items = list(deltas.items())
+        for i in range(0, len(items), BATCH_LIMIT):
+            batch = self.db.batch()
+            self._set_rollups(batch, dict(items[i:i + BATCH_LIMIT]))
+            batch.commit()
+        return len(items)
+
+    def watch(self, callback, limit=1000):
+        query = self.collection.order_by(
+            'waktu_ambil',
+            direction=self._firestore.Query.DESCENDING
+        ).limit(limit)
+
+        def on_snapshot(docs, changes, read_time):
+            # Listener ditagih per dokumen yang berubah (snapshot awal = semua dokumen)
+            inc("firestore.doc_reads", len(changes), op="watch")
+            # Dokumen yang keluar dari window limit juga datang sebagai REMOVED
+            callback([
+                (change.type.name.lower(),
+                 dict(change.document.to_dict() or {}, id=change.document.id))
+                for change in changes
+            ])
+
+        # Watch.is_active jadi False kalau stream putus tanpa recovery (callback
+        # tidak dipanggil); LiveMarketCache memeriksanya dan subscribe ulang
+        return query.on_snapshot(on_snapshot)
+
+
+# ============================================================================
+# 3. SQLITE BACKEND (Local Read Replica / Offline)
+# ============================================================================
+class SQLiteRepository(MarketRepository):
+    """Backend SQLite lokal, aman dipakai dari banyak thread Streamlit"""
+
+    name = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS harga_realtime (
+        id          TEXT PRIMARY KEY,
+        komoditas   TEXT,
+        harga_angka INTEGER,
+        range_harga TEXT,
+        waktu_ambil TEXT,
+        sumber      TEXT,
+        lokasi      TEXT,
+        status      TEXT,
+        extra       TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_harga_waktu
+        ON harga_realtime (waktu_ambil DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_harga_komoditas_waktu
+        ON harga_realtime (komoditas, waktu_ambil DESC);
+    CREATE INDEX IF NOT EXISTS idx_harga_angka
+        ON harga_realtime (harga_angka, id);
+    CREATE TABLE IF NOT EXISTS harga_rollup_harian (
+        komoditas TEXT NOT NULL,
+        kecamatan TEXT NOT NULL,
+        hari      TEXT NOT NULL,
+        "count"   INTEGER NOT NULL,
+        "sum"     REAL NOT NULL,
+        "min"     REAL NOT NULL,
+        "max"     REAL NOT NULL,
+        PRIMARY KEY (komoditas, kecamatan, hari)
+    );
+    CREATE INDEX IF NOT EXISTS idx_rollup_hari
+        ON harga_rollup_harian (hari);
+    CREATE TABLE IF NOT EXISTS harga_rollup_sketch (
+        komoditas TEXT NOT NULL,
+        kecamatan TEXT NOT NULL,
+        hari      TEXT NOT NULL,
+        bin       TEXT NOT NULL,
+        "count"   INTEGER NOT NULL,
+        PRIMARY KEY (komoditas, kecamatan, hari, bin)
+    );
+    CREATE INDEX IF NOT EXISTS idx_rollup_sketch_hari
+        ON harga_rollup_sketch (hari);
+    """
+
+    ROLLUP_UPSERT = """
+    INSERT INTO harga_rollup_harian (komoditas, kecamatan, hari, "count", "sum", "min", "max")
+    VALUES (?,?,?,?,?,?,?)
+    ON CONFLICT (komoditas, kecamatan, hari) DO UPDATE SET
+        "count" = "count" + excluded."count",
+        "sum"   = "sum" + excluded."sum",
+        "min"   = MIN("min", excluded."min"),
+        "max"   = MAX("max", excluded."max")
+    """
+
+    SKETCH_UPSERT = """
+    INSERT INTO harga_rollup_sketch (komoditas, kecamatan, hari, bin, "count")
+    VALUES (?,?,?,?,?)
+    ON CONFLICT (komoditas, kecamatan, hari, bin) DO UPDATE SET
+        "count" = "count" + excluded."count"
+    """
+
+    def __init__(self, path="mentawai_market.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _to_row(record, doc_id):
+        waktu = to_utc_naive(record.get("waktu_ambil"))
+        extra = {k: v for k, v in record.items() if k not in CORE_FIELDS and k != "id"}
+        return (
+            doc_id,
+            record.get("komoditas"),
+            record.get("harga_angka"),
+            record.get("range_harga"),
+            waktu.isoformat(timespec="microseconds") if waktu else None,
+            record.get("sumber"),
+            record.get("lokasi"),
+            record.get("status"),
+            json.dumps(extra, default=str) if extra else None,
+        )
+
+    @staticmethod
+    def _from_row(row):
+        record = {k: row[k] for k in CORE_FIELDS if row[k] is not None}
+        if row["waktu_ambil"]:
+            record["waktu_ambil"] = datetime.datetime.fromisoformat(row["waktu_ambil"])
+        if row["extra"]:
+            record.update(json.loads(row["extra"]))
+        record["id"] = row["id"]
+        return record
+
+    def _existing_records(self, ids):
+        existing = {}
+        for i in range(0, len(ids), BATCH_LIMIT):
+            chunk = ids[i:i + BATCH_LIMIT]
+            for row in self.conn.execute(
+                f"SELECT * FROM harga_realtime WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ):
+                existing[row["id"]] = self._from_row(row)
+        return existing
+
+    def _upsert_rollups(self, deltas):
+        self.conn.executemany(self.ROLLUP_UPSERT, [
+            key + (stats["count"], stats["sum"], stats["min"], stats["max"])
+            for key, stats in deltas.items()
+        ])
+        self.conn.executemany(self.SKETCH_UPSERT, [
+            key + (bin_key, count)
+            for key, stats in deltas.items()
+            for bin_key, count in stats["sketch"].items()
+        ])
+
+    def add(self, record):
+        return self._insert([record])[0]
+
+    def add_many(self, records):
+        return len(self._insert(list(records)))
+
+    def _insert(self, records):
+        records = [lengkapi_lokasi(r) for r in records]
+        ids = [r.get("id") or uuid.uuid4().hex for r in records]
+        rows = [self._to_row(r, doc_id) for r, doc_id in zip(records, ids)]
+        with self._lock, self.conn:
+            # INSERT OR REPLACE: kontribusi versi lama ke rollup dikurangi dulu
+            previous = self._existing_records([r["id"] for r in records if r.get("id")])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO harga_realtime VALUES (?,?,?,?,?,?,?,?,?)",
+                rows
+            )
+            self._upsert_rollups(replacement_rollups(records, previous))
+        return ids
+
+    def fetch_latest(self, limit=1000):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM harga_realtime ORDER BY waktu_ambil DESC, id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def fetch_since(self, waktu, doc_id="", limit=None):
+        waktu_iso = to_utc_naive(waktu).isoformat(timespec="microseconds")
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM harga_realtime"
+                " WHERE waktu_ambil > ? OR (waktu_ambil = ? AND id > ?)"
+                " ORDER BY waktu_ambil, id LIMIT ?",
+                (waktu_iso, waktu_iso, doc_id, limit or -1)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def fetch_filtered(self, komoditas=None, since=None, limit=None):
+        where, params = [], []
+        if komoditas:
+            where.append("komoditas = ?")
+            params.append(komoditas)
+        if since is not None:
+            where.append("waktu_ambil >= ?")
+            params.append(to_utc_naive(since).isoformat(timespec="microseconds"))
+        sql = "SELECT * FROM harga_realtime"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY waktu_ambil DESC, id DESC LIMIT ?"
+        with self._lock:
+            rows = self.conn.execute(sql, params + [limit or -1]).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def fetch_page(self, field, descending=True, limit=50, cursor=None):
+        if field not in ("waktu_ambil", "harga_angka"):
+            raise ValueError(f"Tidak bisa paginasi berdasarkan {field}")
+        order = "DESC" if descending else "ASC"
+        where, params = "", []
+        if cursor is not None:
+            value, doc_id = cursor
+            if isinstance(value, datetime.datetime):
+                value = to_utc_naive(value).isoformat(timespec="microseconds")
+            where = f" WHERE ({field}, id) {'<' if descending else '>'} (?, ?)"
+            params = [value, doc_id]
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM harga_realtime{where}"
+                f" ORDER BY {field} {order}, id {order} LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def delete_older_than(self, cutoff):
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM harga_realtime WHERE waktu_ambil < ?",
+                (to_utc_naive(cutoff).isoformat(timespec="microseconds"),)
+            )
+        return cur.rowcount
+
+    def delete_all(self):
+        with self._lock, self.conn:
+            cur = self.conn.execute("DELETE FROM harga_realtime")
+            self.conn.execute("DELETE FROM harga_rollup_harian")
+            self.conn.execute("DELETE FROM harga_rollup_sketch")
+        return cur.rowcount
+
+    def count_records(self, cutoff=None):
+        sql, params = "SELECT COUNT(*) FROM harga_realtime", []
+        if cutoff is not None:
+            sql += " WHERE waktu_ambil < ?"
+            params.append(to_utc_naive(cutoff).isoformat(timespec="microseconds"))
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def purge_key_batches(self, cutoff=None, batch_size=BATCH_LIMIT):
+        # Keyset pagination per id: lock hanya dipegang selama satu query
+        sql, params = "SELECT id FROM harga_realtime WHERE id > ?", []
+        if cutoff is not None:
+            sql += " AND waktu_ambil < ?"
+            params.append(to_utc_naive(cutoff).isoformat(timespec="microseconds"))
+        sql += " ORDER BY id LIMIT ?"
+        last_id = ""
+        while True:
+            with self._lock:
+                keys = [row[0] for row in self.conn.execute(sql, [last_id, *params, batch_size])]
+            if not keys:
+                return
+            yield keys
+            last_id = keys[-1]
+
+    def delete_keys(self, keys):
+        placeholders = ",".join("?" * len(keys))
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                f"DELETE FROM harga_realtime WHERE id IN ({placeholders})", list(keys)
+            )
+        return cur.rowcount
+
+    def clear_rollups(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM harga_rollup_sketch")
+            return self.conn.execute("DELETE FROM harga_rollup_harian").rowcount
+
+    def fetch_rollups(self, start=None, end=None):
+        where = " WHERE hari >= COALESCE(?, hari) AND hari <= COALESCE(?, hari)"
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM harga_rollup_harian" + where,
+                                     (start, end)).fetchall()
+            bins = self.conn.execute("SELECT * FROM harga_rollup_sketch" + where,
+                                     (start, end)).fetchall()
+        sketches = {}
+        for row in bins:
+            key = (row["komoditas"], row["kecamatan"], row["hari"])
+            sketches.setdefault(key, {})[row["bin"]] = row["count"]
+        return [
+            dict({k: row[k] for k in ROLLUP_COLUMNS if k != "sketch"},
+                 sketch=sketches.get((row["komoditas"], row["kecamatan"], row["hari"])))
+            for row in rows
+        ]
+
+    def rebuild_rollups(self):
+        with self._lock, self.conn:
+            records = [
+                self._from_row(row) for row in
+                self.conn.execute("SELECT * FROM harga_realtime")
+            ]
+            deltas = aggregate_rollups(records)
+            self.conn.execute("DELETE FROM harga_rollup_harian")
+            self.conn.execute("DELETE FROM harga_rollup_sketch")
+            self._upsert_rollups(deltas)
+        return len(deltas)
+
+
+# ============================================================================
+# 4. IN-MEMORY BACKEND (Testing & Benchmark)
+# ============================================================================
+class _MemoryWatch:
+    """Handle subscription MemoryRepository (meniru Watch Firestore)
+
+    Seperti query order_by(waktu_ambil desc).limit(limit): hanya `limit`
+    dokumen terbaru yang terlihat, dokumen yang keluar dari window datang
+    sebagai "removed" dan dokumen yang masuk menggantikannya sebagai "added".
+    """
+
+    def __init__(self, repo, callback, limit):
+        self.repo = repo
+        self.callback = callback
+        self.limit = limit
+        self.is_active = True
+        # id -> (waktu_ambil, id) dokumen di dalam window
+        self._window = {}
+        # Key terkecil di window selama window penuh (None: belum penuh)
+        self._floor = None
+
+    @staticmethod
+    def _key(doc):
+        return (doc["waktu_ambil"], doc["id"])
+
+    def _top(self, docs):
+        return heapq.nlargest(
+            self.limit, (doc for doc in docs.values() if doc.get("waktu_ambil")), key=self._key
+        )
+
+    def _update_floor(self):
+        self._floor = min(self._window.values()) if len(self._window) >= self.limit else None
+
+    def snapshot(self, docs):
+        """Initial window as 'added' changes (called under repo._lock)"""
+        top = self._top(docs)
+        self._window = {doc["id"]: self._key(doc) for doc in top}
+        self._update_floor()
+        return [("added", dict(doc)) for doc in top]
+
+    def translate(self, changes, docs):
+        """Repository changes as this listener sees them (called under repo._lock)"""
+        events = []
+        refill = False
+        for jenis, doc in changes:
+            doc_id = doc["id"]
+            if jenis == "removed" or not doc.get("waktu_ambil"):
+                if self._window.pop(doc_id, None) is not None:
+                    events.append(("removed", dict(doc)))
+                    refill = True
+                continue
+            key = self._key(doc)
+            if doc_id in self._window:
+                # Bergeser ke bawah: bisa jadi ada dokumen luar yang sekarang lebih baru
+                refill = refill or key < self._window[doc_id]
+                self._window[doc_id] = key
+                events.append(("modified", dict(doc)))
+            elif self._floor is None or key > self._floor:
+                self._window[doc_id] = key
+                events.append(("added", dict(doc)))
+                if len(self._window) > self.limit:
+                    keluar = min(self._window, key=self._window.get)
+                    del self._window[keluar]
+                    events.append(("removed", dict(docs.get(keluar) or {"id": keluar})))
+            else:
+                continue
+            self._update_floor()
+        if refill:
+            # Isi ulang window dari dokumen terbaru yang tersisa
+            top = {doc["id"]: doc for doc in self._top(docs)}
+            events.extend(("removed", dict(docs.get(doc_id) or {"id": doc_id}))
+                          for doc_id in self._window if doc_id not in top)
+            events.extend(("added", dict(doc))
+                          for doc_id, doc in top.items() if doc_id not in self._window)
+            self._window = {doc_id: self._key(doc) for doc_id, doc in top.items()}
+            self._update_floor()
+        return events
+
+    def unsubscribe(self):
+        with self.repo._lock:
+            self.is_active = False
+            if self in self.repo._watchers:
+                self.repo._watchers.remove(self)
+
+
+class MemoryRepository(MarketRepository):
+    """Backend in-memory, tanpa network sama sekali (juga fake untuk watch)"""
+
+    name = "memory"
+    supports_watch = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs = {}
+        self._rollups = {}
+        self._watchers = []
+
+    def _apply_rollups(self, deltas):
+        for key, delta in deltas.items():
+            if key in self._rollups:
+                merge_rollup(self._rollups[key], delta)
+            else:
+                self._rollups[key] = dict(delta)
+
+    def _notify(self, changes):
+        if not changes:
+            return
+        with self._lock:
+            deliveries = [(w.callback, w.translate(changes, self._docs)) for w in self._watchers]
+        for callback, events in deliveries:
+            if events:
+                callback(events)
+
+    def add(self, record):
+        doc_id = record.get("id") or uuid.uuid4().hex
+        doc = dict(lengkapi_lokasi(record), id=doc_id)
+        doc["waktu_ambil"] = to_utc_naive(doc.get("waktu_ambil"))
+        with self._lock:
+            old = self._docs.get(doc_id)
+            jenis = "modified" if old is not None else "added"
+            self._docs[doc_id] = doc
+            self._apply_rollups(replacement_rollups([doc], {doc_id: old} if old else {}))
+        self._notify([(jenis, doc)])
+        return doc_id
+
+    @staticmethod
+    def _sort_key(doc):
+        return (doc.get("waktu_ambil") or datetime.datetime.min, doc["id"])
+
+    def fetch_latest(self, limit=1000):
+        with self._lock:
+            docs = sorted(self._docs.values(), key=self._sort_key, reverse=True)
+        return [dict(doc) for doc in docs[:limit]]
+
+    def fetch_since(self, waktu, doc_id="", limit=None):
+        mark = (to_utc_naive(waktu), doc_id)
+        with self._lock:
+            docs = sorted(
+                (doc for doc in self._docs.values()
+                 if doc.get("waktu_ambil") and self._sort_key(doc) > mark),
+                key=self._sort_key
+            )
+        return [dict(doc) for doc in docs[:limit]]
+
+    def fetch_filtered(self, komoditas=None, since=None, limit=None):
+        since = to_utc_naive(since)
+        with self._lock:
+            docs = sorted(
+                (doc for doc in self._docs.values()
+                 if (not komoditas or doc.get("komoditas") == komoditas)
+                 and (since is None or (doc.get("waktu_ambil") and doc["waktu_ambil"] >= since))),
+                key=self._sort_key, reverse=True
+            )
+        return [dict(doc) for doc in docs[:limit]]
+
+    def fetch_page(self, field, descending=True, limit=50, cursor=None):
+        def key(doc):
+            return (doc.get(field) is not None, doc.get(field) or 0, doc["id"])
+
+        with self._lock:
+            docs = sorted(self._docs.values(), key=key, reverse=descending)
+        if cursor is not None:
+            mark = (True, to_utc_naive(cursor[0]) if field == "waktu_ambil" else cursor[0], cursor[1])
+            docs = [d for d in docs if (key(d) < mark if descending else key(d) > mark)]
+        return [dict(doc) for doc in docs[:limit]]
+
+    def delete_older_than(self, cutoff):
+        cutoff = to_utc_naive(cutoff)
+        with self._lock:
+            old_ids = [
+                doc_id for doc_id, doc in self._docs.items()
+                if doc.get("waktu_ambil") and doc["waktu_ambil"] < cutoff
+            ]
+            removed = [("removed", self._docs.pop(doc_id)) for doc_id in old_ids]
+        self._notify(removed)
+        return len(removed)
+
+    def delete_all(self):
+        with self._lock:
+            removed = [("removed", doc) for doc in self._docs.values()]
+            self._docs.clear()
+            self._rollups.clear()
+        self._notify(removed)
+        return len(removed)
+
+    def _purge_ids(self, cutoff=None):
+        cutoff = to_utc_naive(cutoff)
+        return [
+            doc_id for doc_id, doc in self._docs.items()
+            if cutoff is None or (doc.get("waktu_ambil") and doc["waktu_ambil"] < cutoff)
+        ]
+
+    def count_records(self, cutoff=None):
+        with self._lock:
+            return len(self._purge_ids(cutoff))
+
+    def purge_key_batches(self, cutoff=None, batch_size=BATCH_LIMIT):
+        with self._lock:
+            ids = self._purge_ids(cutoff)
+        for i in range(0, len(ids), batch_size):
+            yield ids[i:i + batch_size]
+
+    def delete_keys(self, keys):
+        with self._lock:
+            removed = [("removed", self._docs.pop(k)) for k in keys if k in self._docs]
+        self._notify(removed)
+        return len(removed)
+
+    def clear_rollups(self):
+        with self._lock:
+            count = len(self._rollups)
+            self._rollups.clear()
+        return count
+
+    def fetch_rollups(self, start=None, end=None):
+        with self._lock:
+            return [
+                dict(stats, komoditas=key[0], kecamatan=key[1], hari=key[2])
+                for key, stats in self._rollups.items()
+                if (start is None or key[2] >= start) and (end is None or key[2] <= end)
+            ]
+
+    def rebuild_rollups(self):
+        with self._lock:
+            self._rollups = aggregate_rollups(self._docs.values())
+            return len(self._rollups)
+
+    def watch(self, callback, limit=1000):
+        handle = _MemoryWatch(self, callback, limit)
+        with self._lock:
+            self._watchers.append(handle)
+            initial = handle.snapshot(self._docs)
+        # Snapshot awal dikirim sebagai "added", sama seperti on_snapshot
+        callback(initial)
+        return handle
+
+
+# ============================================================================
+# 5. FACTORY
+# ============================================================================
+def get_repository(backend=None, client=None, sqlite_path=None):
+    """Create repository sesuai MARKET_BACKEND (default: firestore)"""
+    backend = backend or os.environ.get("MARKET_BACKEND", "firestore")
+
+    if backend == "firestore":
+        if client is None:
+            from firebase_admin import firestore
+            client = firestore.client()
+        return FirestoreRepository(client)
+    if backend == "sqlite":
+        return SQLiteRepository(
+            sqlite_path or os.environ.get("MARKET_SQLITE_PATH", "mentawai_market.db")
+        )
+    if backend == "memory":
+        return MemoryRepository()
+
+    raise ValueError(f"Unknown MARKET_BACKEND: {backend}")
@@ -0,0 +1,56 @@
+import datetime
+
+from archive import read_archive, read_archive_records
+from purge import PurgeJob
+from storage import get_repository
+
+NOW = datetime.datetime(2026, 3, 10, 5, 0)
+
+
+def _records():
+    return [
+        {
+            "id": "lama-1", "komoditas": "Cabai Rawit", "harga_angka": 85000,
+            "range_harga": "Rp 85.000", "waktu_ambil": NOW - datetime.timedelta(days=120),
+            "sumber": "Laporan Warga", "lokasi": "Taileleu, Siberut Selatan",
+            "status": "Verified", "catatan": "harga naik setelah badai",
+            "harga_rata_rata": 80000.5,
+        },
+        {
+            "id": "lama-2", "komoditas": "Beras", "harga_angka": 14000,
+            "range_harga": "Rp 14.000", "waktu_ambil": NOW - datetime.timedelta(days=200),
+            "sumber": "Berita", "lokasi": "Sikakap", "status": "Verified",
+            "judul_berita": "Stok beras aman",
+        },
+        {
+            "id": "baru-1", "komoditas": "Beras", "harga_angka": 15000,
+            "range_harga": "Rp 15.000", "waktu_ambil": NOW - datetime.timedelta(days=2),
+            "sumber": "Laporan Warga", "lokasi": "Sikakap", "status": "Verified",
+        },
+    ]
+
+
+def test_archive_then_delete_keeps_every_field(tmp_path):
+    repo = get_repository("memory")
+    repo.add_many(_records())
+    cutoff = NOW - datetime.timedelta(days=90)
+
+    job = PurgeJob(repo, "archive", cutoff, state_path=str(tmp_path / "purge.json"),
+                   archive_root=str(tmp_path / "arsip")).start()
+    job.join(timeout=30)
+
+    assert job.state == "done", job.error
+    assert [r["id"] for r in repo.fetch_latest()] == ["baru-1"]
+
+    archived = {r["id"]: r for r in read_archive_records(root=str(tmp_path / "arsip"))}
+    assert set(archived) == {"lama-1", "lama-2"}
+    for original in _records()[:2]:
+        record = archived[original["id"]]
+        for field, value in original.items():
+            assert record[field] == value, field
+    # Field turunan yang ditulis storage ikut terarsip
+    assert archived["lama-1"]["desa"] == "Taileleu"
+    assert archived["lama-1"]["kecamatan"] == "Siberut Selatan"
+
+    frame = read_archive(root=str(tmp_path / "arsip"))
+    assert list(frame["Doc_ID"]) == ["lama-1", "lama-2"]
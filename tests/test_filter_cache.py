@@ -0,0 +1,42 @@
+import datetime
+import gc
+
+from filter_cache import FilterCache
+from market_data import records_to_frame
+
+T0 = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+def _frame(n):
+    return records_to_frame([
+        {"id": f"doc-{i}", "komoditas": "Beras" if i % 2 else "Gula", "harga_angka": 14000 + i,
+         "waktu_ambil": T0 - datetime.timedelta(hours=i), "sumber": "Laporan Warga",
+         "lokasi": "Sikakap", "status": "Verified"}
+        for i in range(n)
+    ])
+
+
+def test_new_frame_version_misses():
+    cache = FilterCache()
+    old = _frame(4)
+    assert cache.get(old, 7, None, "Beras").count == 2
+    assert cache.get(old, 7, None, "Beras").count == 2
+    assert cache.stats()["hits"] == 1
+
+    # Snapshot baru (objek lain, isi berbeda): versi baru, tidak memakai hasil lama
+    new = _frame(6)
+    assert cache.version(new) != cache.version(old)
+    assert cache.get(new, 7, None, "Beras").count == 3
+    assert cache.stats()["misses"] == 2
+
+
+def test_collected_frame_results_are_dropped():
+    cache = FilterCache()
+    keep = _frame(4)
+    cache.get(keep, 7, None)
+    cache.get(_frame(6), 7, None)
+    gc.collect()
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert len(cache._frames) == 1
+    assert cache.get(keep, 7, None).count == 4
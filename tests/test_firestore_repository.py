@@ -0,0 +1,45 @@
+import datetime
+
+from fake_firestore import FakeFirestoreClient
+from storage import FirestoreRepository
+
+T0 = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+def _repo(n=7):
+    repo = FirestoreRepository(FakeFirestoreClient())
+    # Tiga record per waktu_ambil: urutan harus tetap lengkap di batas halaman
+    repo.add_many([
+        {"id": f"doc-{i:02d}", "komoditas": "Beras", "harga_angka": 14000 + i,
+         "waktu_ambil": T0 + datetime.timedelta(minutes=i // 3),
+         "sumber": "Laporan Warga", "lokasi": "Sikakap", "status": "Verified"}
+        for i in range(n)
+    ])
+    return repo
+
+
+def test_fetch_since_pages_through_equal_timestamps():
+    repo = _repo()
+    seen = []
+    waktu, doc_id = T0, ""
+    while True:
+        docs = repo.fetch_since(waktu, doc_id, limit=2)
+        if not docs:
+            break
+        seen.extend(d["id"] for d in docs)
+        last = docs[-1]
+        waktu, doc_id = last["waktu_ambil"].replace(tzinfo=None), last["id"]
+    assert seen == [f"doc-{i:02d}" for i in range(7)]
+
+
+def test_fetch_page_cursor_walks_every_document():
+    repo = _repo()
+    seen = []
+    cursor = None
+    while True:
+        docs = repo.fetch_page("waktu_ambil", descending=True, limit=3, cursor=cursor)
+        seen.extend(d["id"] for d in docs)
+        if len(docs) < 3:
+            break
+        cursor = (docs[-1]["waktu_ambil"], docs[-1]["id"])
+    assert seen == [f"doc-{i:02d}" for i in reversed(range(7))]
@@ -0,0 +1,84 @@
+import datetime
+import time
+
+from ingest import IngestQueue
+from storage import get_repository
+
+T0 = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+def _report(i):
+    return {"komoditas": "Beras", "harga_angka": 14000 + i, "waktu_ambil": T0,
+            "sumber": "Laporan Warga", "lokasi": "Sikakap", "status": "Pending"}
+
+
+class _FlakyRepo:
+    """Memory repo whose first add_many fails"""
+
+    def __init__(self, failures=1):
+        self.inner = get_repository("memory")
+        self.failures = failures
+
+    def add_many(self, records):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("network down")
+        return self.inner.add_many(records)
+
+
+def test_flush_commits_journal_and_calls_on_flush(tmp_path):
+    repo = get_repository("memory")
+    flushed = []
+    queue = IngestQueue(repo, path=str(tmp_path / "journal.db"), linger=0,
+                        on_flush=flushed.extend, autostart=False)
+    ids = [queue.submit(_report(i)) for i in range(3)]
+    assert [r["id"] for r in queue.pending()] == ids
+
+    assert queue.flush_once() == 3
+    assert queue.pending_count() == 0
+    assert sorted(r["id"] for r in repo.fetch_latest()) == sorted(ids)
+    assert [r["id"] for r in flushed] == ids
+    assert flushed[0]["waktu_ambil"] == T0
+    queue.close()
+
+
+def test_failed_commit_keeps_batch_for_retry(tmp_path):
+    repo = _FlakyRepo()
+    queue = IngestQueue(repo, path=str(tmp_path / "journal.db"), linger=0, autostart=False)
+    ids = [queue.submit(_report(i)) for i in range(2)]
+
+    assert queue.flush_once() == -1
+    assert queue.pending_count() == 2
+    assert "network down" in queue.stats()["last_error"]
+
+    assert queue.flush_once() == 2
+    assert queue.pending_count() == 0
+    assert queue.stats()["last_error"] is None
+    assert sorted(r["id"] for r in repo.inner.fetch_latest()) == sorted(ids)
+    queue.close()
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_failing_on_flush_keeps_flusher_running(tmp_path):
+    repo = get_repository("memory")
+
+    def on_flush(records):
+        raise RuntimeError("cache gone")
+
+    queue = IngestQueue(repo, path=str(tmp_path / "journal.db"), linger=0, on_flush=on_flush)
+    queue.submit(_report(0))
+    # Journal kosong sebelum callback jalan: tunggu error-nya tercatat
+    assert _wait_for(lambda: queue.last_error is not None)
+    assert "cache gone" in queue.last_error
+
+    queue.submit(_report(1))
+    assert queue.flush(timeout=5) == 0
+    assert _wait_for(lambda: repo.count_records() == 2)
+    assert queue._thread.is_alive()
+    queue.close()
@@ -0,0 +1,89 @@
+import datetime
+import time
+
+import live_cache
+from live_cache import LiveMarketCache
+from storage import get_repository
+
+T0 = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+def _record(i, harga=14000):
+    return {"id": f"doc-{i}", "komoditas": "Beras", "harga_angka": harga,
+            "waktu_ambil": T0 + datetime.timedelta(hours=i),
+            "sumber": "Laporan Warga", "lokasi": "Sikakap", "status": "Verified"}
+
+
+def test_repository_writes_reach_live_cache():
+    repo = get_repository("memory")
+    repo.add(_record(0))
+    live = LiveMarketCache(repo, limit=10)
+    assert live.wait_ready(timeout=5)
+    assert list(live.frame()["Doc_ID"]) == ["doc-0"]
+
+    repo.add(_record(1))
+    assert list(live.frame()["Doc_ID"]) == ["doc-1", "doc-0"]
+
+    repo.add(_record(0, harga=15000))
+    frame = live.frame()
+    assert frame.loc[frame["Doc_ID"] == "doc-0", "Harga_Angka"].item() == 15000
+
+    repo.delete_keys(["doc-1"])
+    assert list(live.frame()["Doc_ID"]) == ["doc-0"]
+    live.close()
+
+
+def test_closed_cache_stops_receiving():
+    repo = get_repository("memory")
+    live = LiveMarketCache(repo)
+    live.close()
+    repo.add(_record(0))
+    assert live.frame().empty
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_memory_watch_keeps_the_newest_limit_documents():
+    repo = get_repository("memory")
+    repo.add_many([_record(i) for i in range(5)])
+    live = LiveMarketCache(repo, limit=3)
+    assert list(live.frame()["Doc_ID"]) == ["doc-4", "doc-3", "doc-2"]
+
+    # Yang lebih baru masuk, yang terlama keluar dari window
+    repo.add(_record(5))
+    assert list(live.frame()["Doc_ID"]) == ["doc-5", "doc-4", "doc-3"]
+    # Yang lebih lama dari window tidak terlihat
+    repo.add(_record(-1))
+    assert list(live.frame()["Doc_ID"]) == ["doc-5", "doc-4", "doc-3"]
+    # Hapus di dalam window: record berikutnya mengisi tempatnya
+    repo.delete_keys(["doc-4"])
+    assert list(live.frame()["Doc_ID"]) == ["doc-5", "doc-3", "doc-2"]
+    live.close()
+
+
+def test_broken_stream_is_resubscribed(monkeypatch):
+    monkeypatch.setattr(live_cache, "RESUBSCRIBE_BASE", 0.05)
+    repo = get_repository("memory")
+    repo.add(_record(0))
+    live = LiveMarketCache(repo, check_interval=0.02)
+    assert list(live.frame()["Doc_ID"]) == ["doc-0"]
+
+    # Stream putus tanpa sepengetahuan cache, dan subscribe ulang gagal dulu
+    original_watch = repo.watch
+    monkeypatch.setattr(repo, "watch", lambda *args: (_ for _ in ()).throw(ConnectionError("offline")))
+    live._watch.unsubscribe()
+    repo.add(_record(1))
+    assert _wait_for(lambda: live.last_error is not None)
+    assert live.down_since is not None and live.stale_seconds() > 0
+    assert list(live.frame()["Doc_ID"]) == ["doc-0"]
+
+    monkeypatch.setattr(repo, "watch", original_watch)
+    assert _wait_for(lambda: live.down_since is None)
+    assert live.reconnects == 1 and live.stale_seconds() == 0
+    assert list(live.frame()["Doc_ID"]) == ["doc-1", "doc-0"]
+    live.close()
@@ -0,0 +1,23 @@
+from loadgen import SeedJob, SeedManager
+from storage import get_repository
+
+
+def test_seed_job_runs_in_background():
+    repo = get_repository("memory")
+    seeder = SeedManager(repo, seed=None, batch_size=1000, commit_size=250)
+    job = seeder.start(3000)
+    job.join(timeout=30)
+
+    progress = job.progress()
+    assert progress["state"] == "done"
+    assert progress["written"] == 3000
+    assert repo.count_records() == 3000
+
+
+def test_seed_job_cancel_stops_before_next_batch():
+    repo = get_repository("memory")
+    job = SeedJob(repo, 5000, seed=None, batch_size=1000)
+    job.cancel()
+    job.start().join(timeout=30)
+    assert job.progress()["state"] == "cancelled"
+    assert repo.count_records() == 0
@@ -0,0 +1,32 @@
+import datetime
+
+import pandas as pd
+
+from lokasi import LocationIndex
+
+T0 = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+def _frame(lokasi):
+    # Urut terbaru dulu, seperti snapshot
+    waktu = [T0 - datetime.timedelta(days=i) for i in range(len(lokasi))]
+    return pd.DataFrame({"Lokasi": lokasi, "Raw_Time": pd.to_datetime(waktu)})
+
+
+def test_alternating_frames_reuse_built_index():
+    index = LocationIndex()
+    snapshot = _frame(["Taileleu, Siberut Selatan", "Sikakap", "Muara, Siberut Selatan"])
+    filtered = _frame(["Sikakap"])
+
+    for _ in range(3):
+        assert list(index.positions(snapshot, "siberut")) == [0, 2]
+        assert list(index.positions(filtered, "sika")) == [0]
+
+    assert index._frames.builds == 2
+
+
+def test_since_filter_on_newest_first_frame():
+    index = LocationIndex()
+    snapshot = _frame(["Sikakap", "Sikakap", "Sikakap"])
+    since = T0 - datetime.timedelta(days=1)
+    assert list(index.positions(snapshot, "sikakap", since)) == [0, 1]
@@ -0,0 +1,99 @@
+import datetime
+import threading
+import time
+
+from market_data import MarketDataSync
+from storage import get_repository
+
+T0 = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+def _record(i):
+    return {"id": f"doc-{i}", "komoditas": "Beras", "harga_angka": 14000 + i,
+            "waktu_ambil": T0 + datetime.timedelta(minutes=i),
+            "sumber": "Laporan Warga", "lokasi": "Sikakap", "status": "Verified"}
+
+
+def _wait_refresh(sync):
+    deadline = time.monotonic() + 5
+    while sync._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_periodic_resync_drops_records_deleted_elsewhere():
+    repo = get_repository("memory")
+    repo.add_many([_record(i) for i in range(5)])
+    sync = MarketDataSync(repo, ttl=0, resync_interval=3600)
+    assert len(sync.get()) == 5
+
+    # Writer lain menghapus record: delta sync tidak melihatnya
+    repo.delete_keys(["doc-1"])
+    sync.get()
+    _wait_refresh(sync)
+    assert "doc-1" in set(sync.frame["Doc_ID"])
+
+    sync.resync_interval = 0
+    sync.get()
+    _wait_refresh(sync)
+    assert "doc-1" not in set(sync.frame["Doc_ID"])
+
+
+def test_concurrent_gets_start_one_refresh():
+    repo = get_repository("memory")
+    repo.add_many([_record(i) for i in range(3)])
+    sync = MarketDataSync(repo, ttl=0)
+    sync.get()
+
+    started = []
+    release = threading.Event()
+    original = sync._refresh
+
+    def slow_refresh():
+        started.append(1)
+        release.wait(5)
+        original()
+    sync._refresh = slow_refresh
+
+    threads = [threading.Thread(target=sync.get) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    release.set()
+    _wait_refresh(sync)
+    assert len(started) == 1
+
+
+def test_full_reload_only_when_requested_by_default():
+    repo = get_repository("memory")
+    repo.add_many([_record(i) for i in range(3)])
+    sync = MarketDataSync(repo, ttl=0)
+    sync.get()
+    repo.delete_keys(["doc-0"])
+    for _ in range(3):
+        sync.get()
+        _wait_refresh(sync)
+    assert "doc-0" in set(sync.frame["Doc_ID"])
+
+    sync.request_resync()
+    sync.get()
+    _wait_refresh(sync)
+    assert "doc-0" not in set(sync.frame["Doc_ID"])
+
+
+def test_empty_collection_loads_once():
+    repo = get_repository("memory")
+    loads = []
+    original = repo.fetch_latest
+    repo.fetch_latest = lambda limit=1000: loads.append(limit) or original(limit)
+    sync = MarketDataSync(repo, ttl=300)
+    for _ in range(5):
+        assert sync.get().empty
+    assert len(loads) == 1
+
+    # Record pertama masuk lewat refresh background, bukan load yang memblokir
+    repo.add(_record(0))
+    sync.invalidate()
+    sync.get()
+    _wait_refresh(sync)
+    assert list(sync.frame["Doc_ID"]) == ["doc-0"]
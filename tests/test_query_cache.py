@@ -0,0 +1,69 @@
+import threading
+import time
+
+from query_cache import QueryCache
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _blocking_loader(value, release, calls):
+    def loader():
+        calls.append(value)
+        release.wait(5)
+        return value
+    return loader
+
+
+def test_concurrent_misses_share_one_load():
+    cache = QueryCache()
+    release, calls, results = threading.Event(), [], []
+    loader = _blocking_loader("hasil", release, calls)
+    threads = [threading.Thread(target=lambda: results.append(cache.get(("page",), loader)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    assert _wait_for(lambda: cache.counters["joined"] == 4)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert calls == ["hasil"]
+    assert results == ["hasil"] * 5
+    assert cache.get(("page",), loader) == "hasil"
+    assert cache.stats()["inflight"] == 0
+
+
+def test_invalidation_during_load_discards_stale_result():
+    cache = QueryCache()
+    release, calls, results = threading.Event(), [], []
+    key = ("filtered", "Beras", None)
+    stale = threading.Thread(
+        target=lambda: results.append(cache.get(key, _blocking_loader("lama", release, calls))))
+    stale.start()
+    assert _wait_for(lambda: calls == ["lama"])
+
+    cache.invalidate(key)
+    # Tidak ikut menunggu load yang sudah basi
+    assert cache.get(key, lambda: "baru") == "baru"
+    release.set()
+    stale.join(5)
+
+    assert results == ["lama"]
+    assert cache.get(key, lambda: "lagi") == "baru"
+    assert cache.stats()["inflight"] == 0
+
+
+def test_invalidating_many_keys_leaves_no_state():
+    cache = QueryCache()
+    for cursor in range(1000):
+        key = ("page", "waktu_ambil", cursor)
+        cache.get(key, lambda: cursor)
+        cache.invalidate(key)
+    cache.invalidate(lambda key: key[0] == "pending")
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["inflight"] == 0
@@ -0,0 +1,51 @@
+import datetime
+
+import pytest
+
+from fake_firestore import FakeFirestoreClient
+from rollups import rollups_to_frame, summarize_rollups
+from storage import FirestoreRepository, get_repository
+
+T0 = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+def _repos(tmp_path):
+    return {
+        "memory": get_repository("memory"),
+        "sqlite": get_repository("sqlite", sqlite_path=str(tmp_path / "market.db")),
+        "firestore": FirestoreRepository(FakeFirestoreClient()),
+    }
+
+
+def _record(doc_id, komoditas, harga):
+    return {"id": doc_id, "komoditas": komoditas, "harga_angka": harga, "waktu_ambil": T0,
+            "sumber": "Laporan Warga", "lokasi": "Taileleu, Siberut Selatan",
+            "status": "Verified"}
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite", "firestore"])
+def test_rewriting_an_id_replaces_its_rollup_contribution(tmp_path, backend):
+    repo = _repos(tmp_path)[backend]
+    repo.add_many([_record("a", "Beras", 14000), _record("b", "Beras", 16000)])
+    repo.add(_record("a", "Beras", 15000))
+    repo.add(_record("b", "Gula", 18000))
+
+    rollups = rollups_to_frame(repo.fetch_rollups())
+    beras = summarize_rollups(rollups[rollups["komoditas"] == "Beras"])
+    gula = summarize_rollups(rollups[rollups["komoditas"] == "Gula"])
+    assert beras["count"] == 1 and beras["mean"] == 15000
+    assert gula["count"] == 1 and gula["mean"] == 18000
+    assert abs(beras["median"] - 15000) / 15000 <= 0.01
+    assert int(rollups["count"].sum()) == repo.count_records() == 2
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite", "firestore"])
+def test_rewrite_at_same_price_keeps_sketch(tmp_path, backend):
+    repo = _repos(tmp_path)[backend]
+    repo.add_many([_record("a", "Beras", 14000), _record("b", "Beras", 16000)])
+    repo.add(_record("a", "Beras", 14000))
+
+    summary = summarize_rollups(rollups_to_frame(repo.fetch_rollups()))
+    assert summary["count"] == 2 and summary["mean"] == 15000
+    assert summary["median"] is not None
+    assert 14000 * 0.99 <= summary["median"] <= 16000 * 1.01
@@ -0,0 +1,71 @@
+import asyncio
+
+from scheduler import BACKOFF_BASE, MAX_BACKOFF, ScrapeScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(outcomes, clock):
+    """Scheduler whose run_source follows outcomes[name] (True = sukses)"""
+    calls = []
+
+    async def run_source(source):
+        calls.append((source["name"], clock.now))
+        if not outcomes[source["name"]].pop(0):
+            raise ConnectionError("timeout")
+        return {"bytes": 100, "items": 2}
+
+    sources = [{"name": "berita", "interval": 900, "jitter": 0},
+               {"name": "dinas", "interval": 60, "jitter": 0}]
+    scheduler = ScrapeScheduler(sources, run_source, report=None, clock=clock)
+    return scheduler, calls
+
+
+def _tick(scheduler, clock, at):
+    clock.now = at
+    asyncio.run(scheduler.run(max_ticks=1))
+
+
+def test_next_run_after_success_uses_per_source_interval():
+    clock = FakeClock()
+    scheduler, calls = _scheduler({"berita": [True, True], "dinas": [True, True]}, clock)
+    _tick(scheduler, clock, 0)
+    berita, dinas = scheduler.states
+    assert (berita.next_run, dinas.next_run) == (900, 60)
+
+    # Belum jatuh tempo: tidak dijalankan
+    _tick(scheduler, clock, 59)
+    _tick(scheduler, clock, 60)
+    assert calls == [("berita", 0), ("dinas", 0), ("dinas", 60)]
+    assert dinas.next_run == 120 and dinas.totals["bytes"] == 200
+
+
+def test_backoff_doubles_until_capped_then_recovers():
+    clock = FakeClock()
+    failures = 10
+    scheduler, _ = _scheduler({"berita": [False] * failures + [True], "dinas": [True] * 20}, clock)
+    berita = scheduler.states[0]
+
+    delays = []
+    for _ in range(failures):
+        start = berita.next_run
+        _tick(scheduler, clock, start)
+        delays.append(berita.next_run - start)
+    expected = [min(MAX_BACKOFF, BACKOFF_BASE * 2 ** i) for i in range(failures)]
+    assert delays == expected
+    assert delays[-1] == MAX_BACKOFF
+    assert berita.consecutive_failures == failures and berita.failures == failures
+    assert berita.last_error == "ConnectionError: timeout"
+
+    # Sukses: kembali ke interval normal, backoff di-reset
+    start = berita.next_run
+    _tick(scheduler, clock, start)
+    assert berita.next_run == start + 900
+    assert berita.consecutive_failures == 0 and berita.last_error is None
+    assert berita.runs == failures + 1
@@ -0,0 +1,89 @@
+import asyncio
+from collections import Counter
+
+import httpx
+
+from scrape_engine import HttpCache, ScrapeEngine
+
+ETAG = '"v1"'
+
+
+def _source(url):
+    return {"name": url.rsplit("/", 1)[-1], "url": url}
+
+
+def test_etag_round_trip_after_commit(tmp_path):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == ETAG:
+            return httpx.Response(304, headers={"ETag": ETAG})
+        return httpx.Response(200, headers={"ETag": ETAG}, content=b"<html>kopra</html>")
+
+    cache = HttpCache(str(tmp_path / "state.db"))
+    source = _source("https://berita.example/harga")
+
+    async def run():
+        async with ScrapeEngine(cache, transport=httpx.MockTransport(handler)) as engine:
+            first = await engine.fetch(source)
+            # Belum di-commit: halaman belum dianggap sudah dilihat
+            again = await engine.fetch(source)
+            engine.commit(again)
+            third = await engine.fetch(source)
+        return first, again, third
+
+    first, again, third = asyncio.run(run())
+    assert first.ok and first.body == b"<html>kopra</html>"
+    assert again.ok
+    assert third.not_modified and third.bytes == 0 and not third.ok
+    assert seen == [None, None, ETAG]
+    cache.close()
+
+
+def test_failed_fetch_keeps_old_validators(tmp_path):
+    cache = HttpCache(str(tmp_path / "state.db"))
+    url = "https://berita.example/harga"
+    cache.store(url, etag=ETAG)
+
+    def handler(request):
+        return httpx.Response(500, headers={"ETag": '"v2"'})
+
+    async def run():
+        async with ScrapeEngine(cache, transport=httpx.MockTransport(handler)) as engine:
+            result = await engine.fetch(_source(url))
+            engine.commit(result)
+        return result
+
+    result = asyncio.run(run())
+    assert result.error == "HTTP 500"
+    assert cache.validators(url) == {"If-None-Match": ETAG}
+    cache.close()
+
+
+def test_fetch_all_respects_per_host_limit():
+    active, peak = Counter(), Counter()
+    total = {"active": 0, "peak": 0}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] += 1
+        total["active"] += 1
+        peak[host] = max(peak[host], active[host])
+        total["peak"] = max(total["peak"], total["active"])
+        await asyncio.sleep(0.02)
+        active[host] -= 1
+        total["active"] -= 1
+        return httpx.Response(200, content=request.url.path.encode())
+
+    sources = [_source(f"https://{host}.example/{i}") for host in ("a", "b", "c") for i in range(6)]
+
+    async def run():
+        async with ScrapeEngine(per_host_limit=2, transport=httpx.MockTransport(handler)) as engine:
+            return await engine.fetch_all(sources)
+
+    results = asyncio.run(run())
+    assert [r.body.decode() for r in results] == [f"/{i}" for _ in range(3) for i in range(6)]
+    assert max(peak.values()) == 2
+    # Host berbeda tetap jalan bersamaan
+    assert total["peak"] > 2
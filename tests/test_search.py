@@ -0,0 +1,54 @@
+import threading
+
+import pandas as pd
+
+from search import SearchIndex
+
+
+def _frame(names):
+    return pd.DataFrame({
+        "Komoditas": names,
+        "Lokasi": ["Sikakap"] * len(names),
+        "Sumber": ["Laporan Warga"] * len(names),
+        "Harga": [14000.0] * len(names),
+    })
+
+
+def test_alternating_frames_reuse_built_rows():
+    index = SearchIndex()
+    snapshot = _frame(["Beras", "Gula", "Beras Merah"])
+    filtered = _frame(["Gula"])
+
+    for _ in range(3):
+        assert list(index.search(snapshot, "beras")) == [0, 2]
+        assert list(index.search(filtered, "gula")) == [0]
+
+    assert index._frames.builds == 2
+
+
+def test_collected_frame_is_forgotten():
+    index = SearchIndex()
+    index.search(_frame(["Beras"]), "beras")
+    assert len(index._frames) == 0
+
+
+def test_concurrent_build_and_search_agree():
+    index = SearchIndex()
+    frames = [_frame([f"Beras {i}", f"Gula {i}", "Kopra Kering"]) for i in range(20)]
+    errors = []
+
+    def worker(build):
+        try:
+            for df in frames:
+                if build:
+                    index.build(df)
+                assert list(index.search(df, "kopra")) == [2]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i % 2 == 0,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
@@ -0,0 +1,62 @@
+import datetime
+import os
+import time
+
+from market_data import MarketDataSync, records_to_frame
+from purge import PurgeJob
+from snapshot import SnapshotRegistry, SnapshotStore
+from storage import get_repository
+
+T0 = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+def _record(i):
+    return {"id": f"doc-{i}", "komoditas": "Beras", "harga_angka": 14000 + i,
+            "waktu_ambil": T0 + datetime.timedelta(days=i),
+            "sumber": "Laporan Warga", "lokasi": "Sikakap", "status": "Verified"}
+
+
+def _wait(store):
+    deadline = time.monotonic() + 5
+    while store._saving and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_purge_invalidates_disk_snapshot(tmp_path):
+    repo = get_repository("memory")
+    repo.add_many([_record(i) for i in range(5)])
+    store = SnapshotStore(str(tmp_path / "snap.arrow"), backend="memory", interval=0)
+    registry = SnapshotRegistry()
+    old = registry.publish(records_to_frame(repo.fetch_latest()))
+    store.save_async(old)
+    _wait(store)
+    assert os.path.exists(store.path)
+
+    job = PurgeJob(repo, "old", T0 + datetime.timedelta(days=2),
+                   state_path=str(tmp_path / "purge.json"), on_change=store.invalidate).start()
+    job.join(timeout=30)
+    assert job.state == "done", job.error
+    assert not os.path.exists(store.path)
+
+    # Versi sebelum purge tidak boleh ditulis ulang, versi baru boleh
+    assert not store.save_async(old)
+    new = registry.publish(records_to_frame(repo.fetch_latest()))
+    assert store.save_async(new)
+    _wait(store)
+    assert set(store.load().frame["Doc_ID"]) == {"doc-2", "doc-3", "doc-4"}
+
+
+def test_old_seed_catches_up_with_full_reload():
+    repo = get_repository("memory")
+    repo.add_many([_record(i) for i in range(5)])
+    docs = repo.fetch_latest()
+    sync = MarketDataSync(repo, ttl=0, resync_interval=3600)
+    saved_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=2)
+    sync.seed(records_to_frame(docs), (T0 + datetime.timedelta(days=4), "doc-4"), saved_at)
+
+    repo.delete_keys(["doc-0"])
+    sync.get()
+    deadline = time.monotonic() + 5
+    while (sync._refreshing or sync.last_sync is None) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "doc-0" not in set(sync.frame["Doc_ID"])
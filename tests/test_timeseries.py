@@ -0,0 +1,29 @@
+import datetime
+
+import pandas as pd
+
+from timeseries import TimeSeriesEngine
+
+T0 = datetime.datetime(2026, 3, 1, 8, 0)
+
+
+def _frame(n):
+    waktu = [T0 - datetime.timedelta(hours=i) for i in range(n)]
+    return pd.DataFrame({"Komoditas": ["Beras"] * n, "Harga_Angka": range(14000, 14000 + n),
+                         "Raw_Time": pd.to_datetime(waktu)})
+
+
+def test_series_cached_per_frame_and_resolution():
+    engine = TimeSeriesEngine()
+    a, b = _frame(48), _frame(24)
+    for _ in range(3):
+        assert engine.series(a, "hari")["count"].sum() == 48
+        assert engine.series(b, "hari")["count"].sum() == 24
+    engine.series(a, "jam")
+    assert engine.builds == 3
+
+
+def test_collected_frame_is_forgotten():
+    engine = TimeSeriesEngine()
+    engine.series(_frame(5), "hari")
+    assert len(engine._frames) == 0
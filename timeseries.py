@@ -0,0 +1,165 @@
+"""
+Deret waktu harga per komoditas untuk chart "Tren Pergerakan Harga".
+
+Baris mentah dikelompokkan per (komoditas, bucket waktu WIB) pada resolusi
+per jam, per hari atau per minggu (mulai Senin), masing-masing dengan
+open/high/low/close/mean/count. Resolusi dipilih dari rentang filter, lalu
+tiap seri dipangkas dengan LTTB (Largest-Triangle-Three-Buckets) supaya
+Altair hanya menerima titik secukupnya yang tetap mewakili seluruh periode
+(puncak & lembah tidak hilang seperti pada tail/sampling biasa).
+
+Hasil resample di-cache per frame snapshot di FrameCache (frame tidak pernah
+dimutasi), jadi rerun hanya memfilter & memangkas seri yang sudah jadi.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import FRAME_CACHE_SIZE, FrameCache
+
+WIB_OFFSET = np.timedelta64(7, "h")
+
+# Nama resolusi -> (label, panjang bucket)
+RESOLUTIONS = {
+    "jam": ("per jam", np.timedelta64(1, "h")),
+    "hari": ("per hari", np.timedelta64(1, "D")),
+    "minggu": ("per minggu", np.timedelta64(7, "D")),
+}
+
+# Rentang (hari) maksimum untuk tiap resolusi; di atasnya pakai mingguan
+MAX_DAYS = {"jam": 7, "hari": 180}
+
+# Batas titik untuk seluruh chart, dibagi rata antar komoditas
+CHART_POINTS = 1200
+MIN_SERIES_POINTS = 60
+
+SERIES_COLUMNS = ["Komoditas", "Waktu", "open", "high", "low", "close", "mean", "count"]
+
+
+def pilih_resolusi(hari):
+    """Resolution name for a date range of `hari` days"""
+    for resolusi, batas in MAX_DAYS.items():
+        if hari <= batas:
+            return resolusi
+    return "minggu"
+
+
+def bucket_wib(waktu, resolusi):
+    """Start of the WIB bucket (naive datetime64[s]) for each UTC timestamp"""
+    wib = np.asarray(waktu, dtype="datetime64[us]") + WIB_OFFSET
+    if resolusi == "jam":
+        bucket = wib.astype("datetime64[h]")
+    else:
+        bucket = wib.astype("datetime64[D]")
+        if resolusi == "minggu":
+            # 1970-01-01 hari Kamis: mundur ke Senin sebelumnya
+            bucket = bucket - (bucket.astype(np.int64) + 3) % 7
+    return bucket.astype("datetime64[s]")
+
+
+def resample(df, resolusi):
+    """OHLC/mean/count per (Komoditas, bucket WIB), sorted by komoditas then time"""
+    if df.empty:
+        return pd.DataFrame(columns=SERIES_COLUMNS)
+    waktu = df['Raw_Time'].to_numpy()
+    harga = df['Harga_Angka'].to_numpy()
+    komoditas = df['Komoditas']
+    valid = ~np.isnat(waktu)
+    if not valid.all():
+        waktu, harga, komoditas = waktu[valid], harga[valid], komoditas[valid]
+
+    # Open/close butuh urutan waktu naik; snapshot urut terbaru dulu -> cukup dibalik
+    if (waktu[1:] <= waktu[:-1]).all():
+        order = slice(None, None, -1)
+    else:
+        order = np.argsort(waktu, kind="stable")
+    frame = pd.DataFrame({
+        "Komoditas": komoditas.iloc[order].array,
+        "Waktu": bucket_wib(waktu[order], resolusi),
+        "harga": harga[order],
+    })
+    series = frame.groupby(["Komoditas", "Waktu"], observed=True, sort=True)["harga"].agg(
+        open="first", high="max", low="min", close="last", mean="mean", count="size"
+    )
+    return series.reset_index()
+
+
+def lttb(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Titik pertama & terakhir selalu dipakai; sisanya dibagi threshold-2 bucket
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Titik pembanding = rata-rata bucket berikutnya (atau titik terakhir)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            cx, cy = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs(
+            (x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a])
+        )
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def downsample(series, max_points=CHART_POINTS, min_points=MIN_SERIES_POINTS):
+    """LTTB per komoditas on the mean line, bounded to ~max_points in total"""
+    if series.empty:
+        return series
+    groups = series.groupby("Komoditas", observed=True, sort=False).indices
+    per_series = max(min_points, max_points // len(groups))
+    waktu = series['Waktu'].to_numpy().astype(np.int64)
+    mean = series['mean'].to_numpy()
+    keep = []
+    for positions in groups.values():
+        keep.append(positions[lttb(waktu[positions], mean[positions], per_series)])
+    return series.iloc[np.sort(np.concatenate(keep))]
+
+
+class TimeSeriesEngine:
+    """Resampled series per snapshot frame and resolution, filtered per request"""
+
+    def __init__(self, max_frames=FRAME_CACHE_SIZE):
+        self._lock = threading.Lock()
+        # Per frame: {resolusi: series}
+        self._frames = FrameCache(max_frames)
+        self.builds = 0
+
+    def series(self, df, resolusi):
+        """Full resampled series for df (cached while df is alive)"""
+        with self._lock:
+            per_frame = self._frames.get(df, lambda _: {})
+            cached = per_frame.get(resolusi)
+        if cached is not None:
+            return cached
+        result = resample(df, resolusi)
+        with self._lock:
+            per_frame[resolusi] = result
+            self.builds += 1
+        return result
+
+    def chart_series(self, df, hari, since=None, komoditas=None, max_points=CHART_POINTS,
+                     cache=True):
+        """(resolusi, raw bucket count, downsampled series) for the dashboard chart;
+        cache=False for one-off frames (e.g. a lokasi search result)"""
+        resolusi = pilih_resolusi(hari)
+        series = self.series(df, resolusi) if cache else resample(df, resolusi)
+        if komoditas:
+            series = series[series['Komoditas'] == komoditas]
+        if since is not None:
+            # Bucket yang sebagian masuk rentang tetap ikut
+            _, panjang = RESOLUTIONS[resolusi]
+            since_wib = np.datetime64(since, "s") + WIB_OFFSET
+            series = series[(series['Waktu'].to_numpy() + panjang) > since_wib]
+        return resolusi, len(series), downsample(series, max_points)